@@ -3,15 +3,32 @@ AI Client Factory
 
 Provides a unified interface for multiple AI providers (Gemini, OpenAI, Anthropic).
 Uses database configuration for API keys and model settings.
+
+Static instructions can be passed separately from the per-request content as
+the ``system_prompt`` keyword argument; each provider is then asked to cache
+them (see ai/prompt_cache.py). A Pydantic model passed as ``response_schema``
+asks Gemini and OpenAI for JSON matching it (see ai/structured_output.py);
+parse the text with ``parse_json_response``.
+
+Clients are kept in a process-wide registry (``get_ai_client``) keyed by
+configuration id and version, so SDK clients and their pooled HTTP
+connections are reused across requests and threads instead of being rebuilt
+per call.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
+import threading
 import time
 import os
 from typing import Dict, Any, Optional
 from abc import ABC, abstractmethod
 
+from ai.prompt_cache import anthropic_system, gemini_generate_content, openai_messages
+from ai.structured_output import gemini_json_config, openai_response_format
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +45,13 @@ class BaseAIClient(ABC):
 
     @abstractmethod
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        """Generate AI response"""
+        """
+        Generate AI response.
+
+        Keyword arguments include temperature, max_tokens, system_prompt
+        (static instructions, cached by the provider) and response_schema
+        (Pydantic model constraining the JSON output; Anthropic ignores it).
+        """
         pass
 
     @abstractmethod
@@ -38,6 +61,23 @@ class BaseAIClient(ABC):
         """Generate AI response with document context"""
         pass
 
+    # The async variants run the blocking SDK call in a worker thread. The
+    # SDK's own async clients are bound to the event loop they were created
+    # in, which would defeat sharing one client across views and Celery
+    # tasks; the synchronous HTTP pools are thread-safe.
+
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Async generate(); lets callers await several requests concurrently."""
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+
+    async def agenerate_with_document(
+        self, prompt: str, document: bytes, mime_type: str, **kwargs
+    ) -> Dict[str, Any]:
+        """Async generate_with_document()."""
+        return await asyncio.to_thread(
+            self.generate_with_document, prompt, document, mime_type, **kwargs
+        )
+
 
 class GeminiClient(BaseAIClient):
     """Google Gemini AI client"""
@@ -54,22 +94,43 @@ class GeminiClient(BaseAIClient):
 
         self.client = genai.Client(api_key=self.api_key)
 
+    @property
+    def cache_scope(self):
+        """Cached contents belong to the project of the API key."""
+        return hashlib.sha256(self.api_key.encode()).hexdigest()[:12]
+
+    def _usage(self, response):
+        usage = response.usage_metadata
+        if usage is None:
+            return {}
+        return {
+            "input_tokens": usage.prompt_token_count or 0,
+            "output_tokens": usage.candidates_token_count or 0,
+            "total_tokens": usage.total_token_count or 0,
+            "cached_tokens": usage.cached_content_token_count or 0,
+        }
+
+    def _json_config(self, kwargs):
+        schema = kwargs.get("response_schema")
+        return gemini_json_config(schema) if schema else {}
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Generate response using Gemini"""
-        from google.genai import types
-
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                temperature=kwargs.get("temperature", self.temperature),
-                max_output_tokens=kwargs.get("max_tokens", self.max_tokens),
-            ),
+        response = gemini_generate_content(
+            self.client,
+            self.model,
+            [prompt],
+            system_prompt=kwargs.get("system_prompt"),
+            scope=self.cache_scope,
+            temperature=kwargs.get("temperature", self.temperature),
+            max_output_tokens=kwargs.get("max_tokens", self.max_tokens),
+            **self._json_config(kwargs),
         )
 
         return {
             "text": response.text,
             "success": True,
+            "usage": self._usage(response),
         }
 
     def generate_with_document(
@@ -83,23 +144,26 @@ class GeminiClient(BaseAIClient):
             types.Part.from_bytes(data=document, mime_type=mime_type),
         ]
 
-        response = self.client.models.generate_content(
-            model=self.model,
-            contents=contents,
-            config=types.GenerateContentConfig(
-                temperature=kwargs.get("temperature", self.temperature),
-                max_output_tokens=kwargs.get("max_tokens", self.max_tokens),
-                thinking_config=(
-                    types.ThinkingConfig(include_thoughts=True)
-                    if kwargs.get("include_thoughts")
-                    else None
-                ),
+        response = gemini_generate_content(
+            self.client,
+            self.model,
+            contents,
+            system_prompt=kwargs.get("system_prompt"),
+            scope=self.cache_scope,
+            temperature=kwargs.get("temperature", self.temperature),
+            max_output_tokens=kwargs.get("max_tokens", self.max_tokens),
+            thinking_config=(
+                types.ThinkingConfig(include_thoughts=True)
+                if kwargs.get("include_thoughts")
+                else None
             ),
+            **self._json_config(kwargs),
         )
 
         return {
             "text": response.text,
             "success": True,
+            "usage": self._usage(response),
         }
 
 
@@ -123,23 +187,33 @@ class OpenAIClient(BaseAIClient):
                 "openai package is required. Install with: pip install openai"
             )
 
+    def _usage(self, response):
+        details = getattr(response.usage, "prompt_tokens_details", None)
+        return {
+            "input_tokens": response.usage.prompt_tokens,
+            "output_tokens": response.usage.completion_tokens,
+            "total_tokens": response.usage.total_tokens,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        }
+
+    def _response_format(self, kwargs):
+        schema = kwargs.get("response_schema")
+        return {"response_format": openai_response_format(schema)} if schema else {}
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Generate response using OpenAI"""
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+            messages=openai_messages(prompt, kwargs.get("system_prompt")),
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
+            **self._response_format(kwargs),
         )
 
         return {
             "text": response.choices[0].message.content,
             "success": True,
-            "usage": {
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            },
+            "usage": self._usage(response),
         }
 
     def generate_with_document(
@@ -148,10 +222,11 @@ class OpenAIClient(BaseAIClient):
         """Generate response with document using OpenAI (via base64 encoding for images)"""
         import base64
 
-        messages = [{"role": "user", "content": []}]
+        messages = openai_messages([], kwargs.get("system_prompt"))
+        content = messages[-1]["content"]
 
         # Add text prompt
-        messages[0]["content"].append(
+        content.append(
             {
                 "type": "text",
                 "text": prompt,
@@ -161,7 +236,7 @@ class OpenAIClient(BaseAIClient):
         # Add document as image if applicable
         if mime_type.startswith("image/"):
             base64_data = base64.b64encode(document).decode("utf-8")
-            messages[0]["content"].append(
+            content.append(
                 {
                     "type": "image_url",
                     "image_url": {
@@ -172,23 +247,20 @@ class OpenAIClient(BaseAIClient):
         elif mime_type == "application/pdf":
             # For PDFs, convert to text or use a vision model
             # OpenAI doesn't natively support PDF, so we extract text
-            messages[0]["content"][0]["text"] = f"[PDF Document Content]\n\n{prompt}"
+            content[0]["text"] = f"[PDF Document Content]\n\n{prompt}"
 
         response = self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=kwargs.get("temperature", self.temperature),
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
+            **self._response_format(kwargs),
         )
 
         return {
             "text": response.choices[0].message.content,
             "success": True,
-            "usage": {
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens,
-            },
+            "usage": self._usage(response),
         }
 
 
@@ -212,23 +284,32 @@ class AnthropicClient(BaseAIClient):
                 "anthropic package is required. Install with: pip install anthropic"
             )
 
+    def _usage(self, response):
+        usage = response.usage
+        # Cache reads and writes are reported separately from input_tokens
+        cached = getattr(usage, "cache_read_input_tokens", 0) or 0
+        created = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        input_tokens = usage.input_tokens + cached + created
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": usage.output_tokens,
+            "total_tokens": input_tokens + usage.output_tokens,
+            "cached_tokens": cached,
+        }
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Generate response using Anthropic Claude"""
         response = self.client.messages.create(
             model=self.model,
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
             messages=[{"role": "user", "content": prompt}],
+            **anthropic_system(kwargs.get("system_prompt")),
         )
 
         return {
             "text": response.content[0].text,
             "success": True,
-            "usage": {
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens,
-                "total_tokens": response.usage.input_tokens
-                + response.usage.output_tokens,
-            },
+            "usage": self._usage(response),
         }
 
     def generate_with_document(
@@ -278,17 +359,13 @@ class AnthropicClient(BaseAIClient):
             model=self.model,
             max_tokens=kwargs.get("max_tokens", self.max_tokens),
             messages=[{"role": "user", "content": content}],
+            **anthropic_system(kwargs.get("system_prompt")),
         )
 
         return {
             "text": response.content[0].text,
             "success": True,
-            "usage": {
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens,
-                "total_tokens": response.usage.input_tokens
-                + response.usage.output_tokens,
-            },
+            "usage": self._usage(response),
         }
 
 
@@ -306,7 +383,7 @@ def create_ai_client(config=None) -> BaseAIClient:
         # Get from database
         from manager_panel.models import AIConfiguration
 
-        config = AIConfiguration.get_primary_config()
+        config = AIConfiguration.get_cached_primary_config()
 
         if config is None:
             # Fallback to environment variables
@@ -344,9 +421,56 @@ def create_ai_client(config=None) -> BaseAIClient:
         raise ValueError(f"Unsupported AI provider: {config.provider}")
 
 
+# Process-wide client registry: {(config id, version): client}
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _registry_key(config):
+    if config is None:
+        # Environment fallback
+        api_key = os.getenv("GEMINI_API_KEY") or ""
+        fingerprint = hashlib.sha256(api_key.encode()).hexdigest()[:12]
+        return ("env", fingerprint, os.getenv("GEMINI_MODEL", "gemini-2.5-pro"))
+    # updated_at changes whenever the key, model or parameters are edited
+    return (config.pk, config.updated_at)
+
+
+def get_ai_client(config=None) -> BaseAIClient:
+    """
+    Return a shared AI client for a configuration, creating it on first use.
+
+    Clients are reused until their configuration is saved again, so
+    connections stay warm across requests. Thread-safe.
+
+    Args:
+        config: AIConfiguration model instance, or None to use primary config
+    """
+    if config is None:
+        from manager_panel.models import AIConfiguration
+
+        config = AIConfiguration.get_cached_primary_config()
+
+    key = _registry_key(config)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = create_ai_client(config)
+            # Drop clients of older versions of the same configuration
+            for old_key in [k for k in _clients if k[0] == key[0]]:
+                del _clients[old_key]
+            _clients[key] = client
+            logger.info(f"Created AI client for configuration {key[0]}")
+    return client
+
+
 def get_primary_ai_client() -> BaseAIClient:
     """Get the primary AI client from database configuration"""
-    return create_ai_client(config=None)
+    return get_ai_client(config=None)
 
 
 def generate_ai_response(
@@ -374,14 +498,15 @@ def generate_ai_response(
     Returns:
         Dict with response text and metadata
     """
-    from manager_panel.models import AIConfiguration, AIUsageLog
+    from manager_panel.models import AIConfiguration
+    from manager_panel.usage_buffer import record_usage
     import time
 
     start_time = time.time()
 
     # Get configuration
     if config is None:
-        config = AIConfiguration.get_primary_config()
+        config = AIConfiguration.get_cached_primary_config()
 
     if config is None:
         # Fallback to legacy behavior
@@ -389,7 +514,7 @@ def generate_ai_response(
         return _legacy_generate_ai(prompt, document, mime_type, **kwargs)
 
     try:
-        client = create_ai_client(config)
+        client = get_ai_client(config)
 
         if document and mime_type:
             result = client.generate_with_document(
@@ -401,10 +526,10 @@ def generate_ai_response(
         # Calculate response time
         response_time_ms = int((time.time() - start_time) * 1000)
 
-        # Log usage
+        # Log usage and update config usage (buffered, saved in batches)
         usage = result.get("usage", {})
-        AIUsageLog.objects.create(
-            configuration=config,
+        record_usage(
+            config,
             user=user,
             endpoint=kwargs.get("endpoint", "unknown"),
             request_type=request_type,
@@ -415,9 +540,6 @@ def generate_ai_response(
             response_time_ms=response_time_ms,
         )
 
-        # Update config usage
-        config.increment_usage(usage.get("total_tokens", 0))
-
         return result
 
     except Exception as e:
@@ -426,8 +548,8 @@ def generate_ai_response(
 
         # Log error
         if config:
-            AIUsageLog.objects.create(
-                configuration=config,
+            record_usage(
+                config,
                 user=user,
                 endpoint=kwargs.get("endpoint", "unknown"),
                 request_type=request_type,
@@ -435,7 +557,6 @@ def generate_ai_response(
                 error_message=error_message,
                 response_time_ms=response_time_ms,
             )
-            config.record_error(error_message)
 
         logger.error(f"AI generation error: {e}")
         return {
@@ -0,0 +1,322 @@
+"""
+Streaming audio normalization for speech recognition.
+
+Speaking recordings are stored as WebM/OGG/MP3/M4A/WAV, while Azure speech
+recognition wants 16 kHz, 16-bit, mono PCM. ``normalize_audio`` pipes a
+recording through ffmpeg without intermediate files: sources that aren't on
+the local disk (S3 objects, uploads) are streamed into ffmpeg's stdin in
+chunks and raw PCM is read back from its stdout. Memory use is bounded by the
+clip's duration (32 KB per second of audio), not by the size of the upload.
+
+MP4-family containers (M4A/MP4/MOV/3GP, e.g. Safari and iOS recordings) may
+keep their index (moov atom) at the end of the file, which ffmpeg can't reach
+on a pipe. Those are spooled to a temporary file first unless they are
+already on the local disk.
+
+Uploads are stored as recorded and converted off the request path by Celery
+tasks (``store_wav_derivative``), which save a normalized WAV next to them.
+WAVs that are already 16 kHz mono PCM, such as those derivatives, are decoded
+in-process with the ``wave`` module, so evaluating a speaking attempt whose
+uploads have been normalized doesn't start any ffmpeg process.
+"""
+
+import io
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import wave
+from dataclasses import dataclass
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit
+CHANNELS = 1
+CHUNK_SIZE = 64 * 1024
+FFMPEG_TIMEOUT = 60  # seconds
+
+# Containers ffmpeg needs to seek in, so they can't be streamed through a pipe
+SEEKABLE_INPUT_EXTENSIONS = (".mp4", ".m4a", ".mov", ".3gp", ".3g2")
+SEEKABLE_INPUT_CONTENT_TYPES = (
+    "audio/mp4",
+    "audio/x-m4a",
+    "audio/m4a",
+    "video/mp4",
+    "video/quicktime",
+    "audio/3gpp",
+    "video/3gpp",
+    "audio/3gpp2",
+    "video/3gpp2",
+)
+
+
+class AudioConversionError(RuntimeError):
+    """Raised when a recording can't be normalized."""
+
+
+@dataclass(frozen=True)
+class StoredAudio:
+    """A recording in Django storage, referenced by name and read lazily."""
+
+    name: str
+
+    def __str__(self):
+        return self.name
+
+
+def _local_path(source):
+    """Return a path ffmpeg can open directly, or None to stream the source."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, StoredAudio):
+        try:
+            return default_storage.path(source.name)
+        except NotImplementedError:
+            # Remote storage (S3)
+            return None
+    if hasattr(source, "temporary_file_path"):
+        # Large uploads are already written to disk by Django
+        return source.temporary_file_path()
+    return None
+
+
+def _needs_seekable_input(source):
+    """Whether ffmpeg must be able to seek in the source (MP4 family)."""
+    if _source_name(source).lower().endswith(SEEKABLE_INPUT_EXTENSIONS):
+        return True
+    content_type = (getattr(source, "content_type", None) or "").split(";")[0]
+    return content_type.strip().lower() in SEEKABLE_INPUT_CONTENT_TYPES
+
+
+def _spool_to_temp_file(source):
+    """Copy a StoredAudio or file-like source to a temporary file; returns its path."""
+    suffix = os.path.splitext(_source_name(source))[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        try:
+            if isinstance(source, StoredAudio):
+                with default_storage.open(source.name, "rb") as audio_file:
+                    for chunk in iter(lambda: audio_file.read(CHUNK_SIZE), b""):
+                        temp_file.write(chunk)
+            else:
+                if hasattr(source, "seek"):
+                    source.seek(0)
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                    temp_file.write(chunk)
+        except Exception:
+            os.unlink(temp_file.name)
+            raise
+    return temp_file.name
+
+
+def _source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", None) or ""
+
+
+def _read_normalized_wav(source):
+    """Return the samples of a WAV already in the target format, else None."""
+    try:
+        if isinstance(source, StoredAudio):
+            audio_file = default_storage.open(source.name, "rb")
+        elif isinstance(source, (str, os.PathLike)):
+            audio_file = open(source, "rb")
+        else:
+            audio_file = source
+            if hasattr(audio_file, "seek"):
+                audio_file.seek(0)
+        try:
+            with wave.open(audio_file, "rb") as wav_file:
+                params = (
+                    wav_file.getnchannels(),
+                    wav_file.getsampwidth(),
+                    wav_file.getframerate(),
+                )
+                if params != (CHANNELS, SAMPLE_WIDTH, SAMPLE_RATE):
+                    return None
+                return wav_file.readframes(wav_file.getnframes()) or None
+        finally:
+            if audio_file is not source:
+                audio_file.close()
+    except Exception as e:
+        # Not a plain PCM WAV (or unreadable); ffmpeg reports real errors
+        logger.debug(f"In-process WAV decoding skipped for {source}: {e}")
+        return None
+
+
+def _feed(source, pipe):
+    """Copy a StoredAudio or file-like source into ffmpeg's stdin."""
+    try:
+        if isinstance(source, StoredAudio):
+            audio_file = default_storage.open(source.name, "rb")
+        else:
+            audio_file = source
+            if hasattr(audio_file, "seek"):
+                audio_file.seek(0)
+        try:
+            for chunk in iter(lambda: audio_file.read(CHUNK_SIZE), b""):
+                pipe.write(chunk)
+        finally:
+            if audio_file is not source:
+                audio_file.close()
+    except (BrokenPipeError, ValueError):
+        # ffmpeg exited early; its exit status reports why
+        pass
+    except Exception as e:
+        logger.error(f"Failed to stream {source} to ffmpeg: {e}")
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def normalize_audio(source, timeout=FFMPEG_TIMEOUT) -> bytes:
+    """
+    Decode a recording to 16 kHz, 16-bit, mono PCM.
+
+    WAV files already in that format are read directly; everything else goes
+    through ffmpeg.
+
+    Args:
+        source: File path, StoredAudio, or a readable file object (e.g. an
+            UploadedFile)
+        timeout: Seconds before ffmpeg is killed
+
+    Returns:
+        Raw little-endian PCM samples
+
+    Raises:
+        AudioConversionError: If ffmpeg is missing, fails or times out
+    """
+    if _source_name(source).lower().endswith(".wav"):
+        pcm = _read_normalized_wav(source)
+        if pcm is not None:
+            return pcm
+
+    local_path = _local_path(source)
+    if local_path or not _needs_seekable_input(source):
+        return _run_ffmpeg(source, local_path, timeout)
+
+    try:
+        spooled_path = _spool_to_temp_file(source)
+    except Exception as e:
+        raise AudioConversionError(f"Could not read recording {source}: {e}")
+    try:
+        return _run_ffmpeg(source, spooled_path, timeout)
+    finally:
+        os.unlink(spooled_path)
+
+
+def _run_ffmpeg(source, local_path, timeout):
+    """Run ffmpeg on local_path, or on source streamed to stdin if it's None."""
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        local_path or "pipe:0",
+        "-vn",
+        "-f",
+        "s16le",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-ac",
+        str(CHANNELS),
+        "pipe:1",
+    ]
+
+    try:
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL if local_path else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise AudioConversionError("FFmpeg not found. Please install FFmpeg.")
+
+    # stdin and stderr are serviced by threads so none of the pipes can fill
+    # up and block ffmpeg while stdout is read here
+    stderr_output = []
+    threads = [
+        threading.Thread(
+            target=lambda: stderr_output.append(process.stderr.read()), daemon=True
+        )
+    ]
+    if not local_path:
+        threads.append(
+            threading.Thread(target=_feed, args=(source, process.stdin), daemon=True)
+        )
+    for thread in threads:
+        thread.start()
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        pcm = process.stdout.read()
+        process.wait()
+    finally:
+        timer.cancel()
+        for thread in threads:
+            thread.join()
+
+    if timed_out.is_set():
+        raise AudioConversionError("Audio conversion timed out")
+    if process.returncode != 0:
+        stderr = b"".join(stderr_output).decode(errors="replace").strip()
+        raise AudioConversionError(f"FFmpeg conversion failed: {stderr}")
+    if not pcm:
+        raise AudioConversionError("Conversion produced no audio")
+
+    logger.debug(f"Normalized {source}: {len(pcm)} bytes of PCM")
+    return pcm
+
+
+def pcm_to_wav(pcm: bytes) -> bytes:
+    """Wrap normalized PCM in a WAV container."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(CHANNELS)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def wav_name_for(name: str) -> str:
+    """Storage name of the normalized WAV derivative of a recording."""
+    return f"{os.path.splitext(name)[0]}_16k.wav"
+
+
+def store_wav_derivative(name: str) -> str:
+    """
+    Save a 16 kHz mono WAV copy of a recording in storage.
+
+    Any previous derivative of the recording is replaced.
+
+    Returns:
+        Storage name of the WAV file
+
+    Raises:
+        AudioConversionError: If the recording can't be decoded
+    """
+    wav_data = pcm_to_wav(normalize_audio(StoredAudio(name)))
+    wav_name = wav_name_for(name)
+    if default_storage.exists(wav_name):
+        default_storage.delete(wav_name)
+    return default_storage.save(wav_name, ContentFile(wav_data))
@@ -4,11 +4,244 @@ Extracts and generates IELTS test content from PDF files using Gemini AI.
 Adapted from BandBooster project for current IELTS Mock System.
 """
 
+import functools
+import hashlib
 import json
+import logging
+from typing import Any, Dict, List, Optional
+from decouple import config
+from pydantic import BaseModel, ConfigDict
 from django.conf import settings
-from ai.tools import generate_ai, change_to_json
+from ai.tools import generate_ai, change_to_json, get_gemini_client
+from ai import full_test_extraction
+from ai.full_test_extraction import LAYOUT_PROMPT, extract_full_test_by_sections
+from ai.result_cache import get_cached_result, make_cache_key, store_result
+from ai.structured_output import json_schema_for
 
+logger = logging.getLogger(__name__)
 
+# "sections" extracts full test books section by section, "single" in one prompt
+FULL_TEST_EXTRACTION_MODE = config("FULL_TEST_EXTRACTION_MODE", default="sections")
+
+# The extraction instructions are static, so they are sent as the system
+# prompt (cached by the provider) and each request only carries the PDF
+PDF_REQUEST_PROMPT = "Extract the content of the attached PDF as instructed."
+
+
+# Response schemas. Gemini is asked for JSON matching them and responses are
+# validated against them (see ai/structured_output.py). They pin down the
+# structure the importers rely on; type-specific details such as
+# question_data are free-form, and keys not listed here are kept.
+
+
+class _ExtractionSchema(BaseModel):
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+
+class QuestionExample(_ExtractionSchema):
+    question: Optional[str] = None
+    answer: Optional[str] = None
+    explanation: Optional[str] = None
+
+
+class QuestionChoice(_ExtractionSchema):
+    key: str
+    text: str
+
+
+class ExtractedQuestion(_ExtractionSchema):
+    order: int
+    text: Optional[str] = None
+    question_text: Optional[str] = None
+    correct_answer: Optional[str] = None
+    choices: Optional[List[QuestionChoice]] = None
+
+
+class QuestionGroup(_ExtractionSchema):
+    title: Optional[str] = None
+    question_type: str
+    description: Optional[str] = None
+    example: Optional[QuestionExample] = None
+    question_data: Optional[Dict[str, Any]] = None
+    questions: List[ExtractedQuestion]
+
+
+class ExtractedPassage(_ExtractionSchema):
+    passage_number: int
+    title: str
+    summary: Optional[str] = None
+    content: str
+    difficulty: Optional[str] = None
+    question_groups: List[QuestionGroup]
+
+
+class ExtractedListeningPart(_ExtractionSchema):
+    part_number: int
+    title: str
+    description: Optional[str] = None
+    scenario: Optional[str] = None
+    difficulty: Optional[str] = None
+    question_groups: List[QuestionGroup]
+
+
+class ExtractedWritingTask(_ExtractionSchema):
+    task_type: str
+    chart_type: Optional[str] = None
+    prompt: str
+    difficulty: Optional[str] = None
+    min_words: Optional[int] = None
+    has_visual: Optional[bool] = None
+    visual_description: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+
+
+class CueCard(_ExtractionSchema):
+    main_prompt: str
+    bullet_points: List[str] = []
+    preparation_time: Optional[str] = None
+    speaking_time: Optional[str] = None
+
+
+class ExtractedSpeakingTopic(_ExtractionSchema):
+    part_number: int
+    topic: str
+    questions: Optional[List[str]] = None
+    cue_card: Optional[CueCard] = None
+
+
+class _ExtractionResult(_ExtractionSchema):
+    success: bool
+    content_type: Optional[str] = None
+    error: Optional[str] = None
+
+
+class ReadingExtraction(_ExtractionResult):
+    passages: List[ExtractedPassage] = []
+
+
+class ListeningExtraction(_ExtractionResult):
+    parts: List[ExtractedListeningPart] = []
+
+
+class WritingExtraction(_ExtractionResult):
+    tasks: List[ExtractedWritingTask] = []
+
+
+class SpeakingExtraction(_ExtractionResult):
+    topics: List[ExtractedSpeakingTopic] = []
+
+
+class ListeningSection(_ExtractionSchema):
+    parts: List[ExtractedListeningPart] = []
+
+
+class ReadingSection(_ExtractionSchema):
+    passages: List[ExtractedPassage] = []
+
+
+class WritingSection(_ExtractionSchema):
+    tasks: List[ExtractedWritingTask] = []
+
+
+class SpeakingSection(_ExtractionSchema):
+    topics: List[ExtractedSpeakingTopic] = []
+
+
+class ExtractedTest(_ExtractionSchema):
+    test_number: int
+    test_name: Optional[str] = None
+    listening: Optional[ListeningSection] = None
+    reading: Optional[ReadingSection] = None
+    writing: Optional[WritingSection] = None
+    speaking: Optional[SpeakingSection] = None
+
+
+class FullTestExtraction(_ExtractionResult):
+    book_info: Optional[Dict[str, Any]] = None
+    tests: List[ExtractedTest] = []
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class ContentTypeDetection(_ExtractionSchema):
+    success: bool
+    detected_types: List[str] = []
+    primary_type: str
+    confidence: Optional[str] = None
+    summary: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _prompt_version(*sources):
+    """
+    Hash of what shapes an extraction's output: prompt strings, response
+    schemas (Pydantic models) and functions (their prompts and code).
+    """
+    digest = hashlib.sha256()
+    for source in sources:
+        if isinstance(source, str):
+            digest.update(source.encode())
+            continue
+        if isinstance(source, type) and issubclass(source, BaseModel):
+            digest.update(json.dumps(json_schema_for(source), sort_keys=True).encode())
+            continue
+        code = getattr(source, "__wrapped__", source).__code__
+        digest.update(code.co_code)
+        for constant in code.co_consts:
+            if isinstance(constant, str):
+                digest.update(constant.encode())
+    return digest.hexdigest()[:12]
+
+
+def _cached_extraction(request_type, *prompt_sources):
+    """
+    Cache a PDF generator's successful results (see ai/result_cache.py).
+
+    Results are keyed by the document's SHA-256, the version of the
+    generator's prompt (and of prompt_sources, for generators that build on
+    other prompts) and the model, so uploading the same PDF again returns
+    the stored result instead of running the model. Partial results (failed
+    or missing sections) aren't stored.
+    """
+
+    def decorator(generator):
+        @functools.wraps(generator)
+        def wrapper(pdf_bytes, pdf_mime_type="application/pdf", *args, **kwargs):
+            try:
+                _, model = get_gemini_client()
+            except Exception:
+                return generator(pdf_bytes, pdf_mime_type, *args, **kwargs)
+
+            cache_key = make_cache_key(
+                request_type,
+                hashlib.sha256(pdf_bytes).hexdigest(),
+                pdf_mime_type,
+                _prompt_version(generator, *prompt_sources),
+                model,
+                args,
+                {k: v for k, v in kwargs.items() if k != "progress_callback"},
+            )
+            cached = get_cached_result(cache_key)
+            if cached is not None:
+                logger.info(f"{request_type} served from the extraction cache")
+                return cached
+
+            result = generator(pdf_bytes, pdf_mime_type, *args, **kwargs)
+            if (
+                isinstance(result, dict)
+                and result.get("success") is not False
+                and not result.get("error")
+                and not result.get("failed_sections")
+                and not result.get("partial")
+            ):
+                store_result(cache_key, request_type, model, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+@_cached_extraction("pdf_reading", ReadingExtraction)
 def generate_reading_passages_from_pdf(pdf_bytes, pdf_mime_type="application/pdf"):
     """
     Extract reading passages WITH QUESTIONS from PDF and structure them for IELTS reading test.
@@ -749,7 +982,13 @@ Now analyze the provided PDF and extract reading passages with questions followi
 """
 
     try:
-        result = generate_ai(prompt=prompt, document=pdf_bytes, mime_type=pdf_mime_type)
+        result = generate_ai(
+            prompt=PDF_REQUEST_PROMPT,
+            system_prompt=prompt,
+            document=pdf_bytes,
+            mime_type=pdf_mime_type,
+            response_schema=ReadingExtraction,
+        )
         return result
     except Exception as e:
         return {
@@ -759,6 +998,7 @@ Now analyze the provided PDF and extract reading passages with questions followi
         }
 
 
+@_cached_extraction("pdf_listening", ListeningExtraction)
 def generate_listening_parts_from_pdf(pdf_bytes, pdf_mime_type="application/pdf"):
     """
     Extract listening transcripts WITH QUESTIONS from PDF and structure them for IELTS listening test.
@@ -1268,7 +1508,13 @@ Now analyze the provided PDF and extract listening parts with questions followin
 """
 
     try:
-        result = generate_ai(prompt=prompt, document=pdf_bytes, mime_type=pdf_mime_type)
+        result = generate_ai(
+            prompt=PDF_REQUEST_PROMPT,
+            system_prompt=prompt,
+            document=pdf_bytes,
+            mime_type=pdf_mime_type,
+            response_schema=ListeningExtraction,
+        )
         return result
     except Exception as e:
         return {
@@ -1278,6 +1524,7 @@ Now analyze the provided PDF and extract listening parts with questions followin
         }
 
 
+@_cached_extraction("pdf_writing", WritingExtraction)
 def generate_writing_tasks_from_pdf(pdf_bytes, pdf_mime_type="application/pdf"):
     """
     Extract writing tasks from PDF and structure them for IELTS writing test.
@@ -1384,7 +1631,13 @@ Now analyze the provided PDF and extract the writing tasks following the format
 """
 
     try:
-        result = generate_ai(prompt=prompt, document=pdf_bytes, mime_type=pdf_mime_type)
+        result = generate_ai(
+            prompt=PDF_REQUEST_PROMPT,
+            system_prompt=prompt,
+            document=pdf_bytes,
+            mime_type=pdf_mime_type,
+            response_schema=WritingExtraction,
+        )
         return result
     except Exception as e:
         return {
@@ -1394,6 +1647,7 @@ Now analyze the provided PDF and extract the writing tasks following the format
         }
 
 
+@_cached_extraction("pdf_speaking", SpeakingExtraction)
 def generate_speaking_topics_from_pdf(pdf_bytes, pdf_mime_type="application/pdf"):
     """
     Extract speaking topics from PDF and structure them for IELTS speaking test.
@@ -1493,7 +1747,13 @@ Now analyze the provided PDF and extract the speaking topics following the forma
 """
 
     try:
-        result = generate_ai(prompt=prompt, document=pdf_bytes, mime_type=pdf_mime_type)
+        result = generate_ai(
+            prompt=PDF_REQUEST_PROMPT,
+            system_prompt=prompt,
+            document=pdf_bytes,
+            mime_type=pdf_mime_type,
+            response_schema=SpeakingExtraction,
+        )
         return result
     except Exception as e:
         return {
@@ -1503,21 +1763,61 @@ Now analyze the provided PDF and extract the speaking topics following the forma
         }
 
 
-def generate_cambridge_full_test_from_pdf(pdf_bytes, pdf_mime_type="application/pdf"):
+@_cached_extraction(
+    "pdf_full_test",
+    generate_listening_parts_from_pdf,
+    generate_reading_passages_from_pdf,
+    generate_writing_tasks_from_pdf,
+    generate_speaking_topics_from_pdf,
+    ListeningExtraction,
+    ReadingExtraction,
+    WritingExtraction,
+    SpeakingExtraction,
+    FullTestExtraction,
+    LAYOUT_PROMPT,
+    full_test_extraction.BookLayout,
+    full_test_extraction.plan_sections,
+    full_test_extraction._extract_chunk,
+    full_test_extraction._merge,
+)
+def generate_cambridge_full_test_from_pdf(
+    pdf_bytes, pdf_mime_type="application/pdf", mode=None, progress_callback=None
+):
     """
     Extract a COMPLETE Cambridge IELTS test (or similar full test book) from PDF.
     This extracts ALL sections: Listening (Parts 1-4), Reading (Passages 1-3),
-    Writing (Tasks 1-2), and Speaking (Parts 1-3) in one go.
+    Writing (Tasks 1-2), and Speaking (Parts 1-3).
 
     Designed for bulk upload of Cambridge IELTS books or similar test preparation materials.
 
+    In "sections" mode (FULL_TEST_EXTRACTION_MODE, the default) the PDF is split
+    into one document per test section and the sections are extracted
+    concurrently (see ai/full_test_extraction.py). "single" mode, and documents
+    that can't be split, are extracted with one prompt.
+
     Args:
         pdf_bytes: PDF file content as bytes
         pdf_mime_type: MIME type of the PDF
+        mode: "sections" or "single" (default: FULL_TEST_EXTRACTION_MODE)
+        progress_callback: Optional callable(done, total, partial_result) for
+            section-wise extraction
 
     Returns:
         dict: Complete test data with all sections
     """
+    if (mode or FULL_TEST_EXTRACTION_MODE) == "sections":
+        try:
+            result = extract_full_test_by_sections(
+                pdf_bytes, pdf_mime_type, progress_callback
+            )
+            if result is not None:
+                return result
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"AI processing error: {str(e)}",
+                "content_type": "full_test",
+            }
 
     prompt = """
 You are an expert IELTS test content analyzer specializing in Cambridge IELTS book extraction.
@@ -2917,7 +3217,13 @@ Now analyze the PDF and extract ALL complete IELTS tests following this format.
 """
 
     try:
-        result = generate_ai(prompt=prompt, document=pdf_bytes, mime_type=pdf_mime_type)
+        result = generate_ai(
+            prompt=PDF_REQUEST_PROMPT,
+            system_prompt=prompt,
+            document=pdf_bytes,
+            mime_type=pdf_mime_type,
+            response_schema=FullTestExtraction,
+        )
         return result
     except Exception as e:
         return {
@@ -2927,6 +3233,7 @@ Now analyze the PDF and extract ALL complete IELTS tests following this format.
         }
 
 
+@_cached_extraction("pdf_detection", ContentTypeDetection)
 def detect_content_type_from_pdf(pdf_bytes, pdf_mime_type="application/pdf"):
     """
     Automatically detect what type of IELTS content is in the PDF.
@@ -2979,7 +3286,13 @@ Now analyze the provided PDF and detect the content type following the format ab
 """
 
     try:
-        result = generate_ai(prompt=prompt, document=pdf_bytes, mime_type=pdf_mime_type)
+        result = generate_ai(
+            prompt=PDF_REQUEST_PROMPT,
+            system_prompt=prompt,
+            document=pdf_bytes,
+            mime_type=pdf_mime_type,
+            response_schema=ContentTypeDetection,
+        )
         return result
     except Exception as e:
         return {
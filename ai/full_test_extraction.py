@@ -0,0 +1,348 @@
+"""
+Section-wise (map/reduce) extraction of full IELTS test books.
+
+Sending a whole Cambridge book through one prompt makes latency that of a
+single huge generation, and one malformed JSON fragment fails every test.
+``extract_full_test_by_sections`` instead:
+
+1. asks the model for the book's layout: the page ranges of each test's
+   listening, reading, writing and speaking sections and of its answer key;
+2. splits the PDF into one document per section (listening and reading
+   chunks also get the answer key pages);
+3. extracts the chunks concurrently with the per-type generators in
+   ``ai.content_generator``, retrying a failed chunk on its own;
+4. merges the sections into the ``full_test`` format and validates them.
+
+It returns None when the document can't be split (HTML, pypdf missing, no
+layout found), and the caller falls back to single-prompt extraction.
+"""
+
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from decouple import config
+from django.db import connections
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Sections extracted at once
+FULL_TEST_EXTRACTION_CONCURRENCY = config(
+    "FULL_TEST_EXTRACTION_CONCURRENCY", default=4, cast=int
+)
+# Attempts per section before it is reported as failed
+FULL_TEST_CHUNK_ATTEMPTS = config("FULL_TEST_CHUNK_ATTEMPTS", default=2, cast=int)
+
+SECTIONS = ("listening", "reading", "writing", "speaking")
+
+# Key of the extracted items in each section, and how many a test has
+SECTION_ITEMS = {
+    "listening": ("parts", 4),
+    "reading": ("passages", 3),
+    "writing": ("tasks", 2),
+    "speaking": ("topics", 3),
+}
+
+# Sections whose answers are printed in the answer key
+ANSWER_KEY_SECTIONS = ("listening", "reading")
+
+LAYOUT_PROMPT = """
+You are an expert at navigating IELTS test books (Cambridge IELTS or similar).
+Do NOT extract any questions. Only map where each test's sections are.
+
+Page numbers are positions in the PDF file: the first page of the file is 1,
+whatever number is printed on it. Use [start, end] ranges, inclusive. Use null
+for a section that isn't in the document.
+
+For every test in the document, return:
+- "listening": pages with the listening questions (all 4 parts)
+- "reading": pages with the reading passages and their questions
+- "writing": pages with the writing tasks (including Task 1 visuals)
+- "speaking": pages with the speaking parts
+- "answer_key": pages with this test's listening and reading answers
+
+Return ONLY valid JSON:
+{
+    "success": true,
+    "total_pages": 160,
+    "book_info": {"title": "Cambridge IELTS 10", "total_tests": 4},
+    "tests": [
+        {
+            "test_number": 1,
+            "test_name": "Test 1",
+            "listening": [[10, 17]],
+            "reading": [[18, 31]],
+            "writing": [[32, 33]],
+            "speaking": [[34, 34]],
+            "answer_key": [[127, 128]]
+        }
+    ]
+}
+
+If the document contains no IELTS tests, return:
+{"success": false, "error": "No IELTS tests found", "tests": []}
+"""
+
+
+PageRanges = Optional[List[List[int]]]
+
+
+class TestLayout(BaseModel):
+    test_number: int
+    test_name: Optional[str] = None
+    listening: PageRanges = None
+    reading: PageRanges = None
+    writing: PageRanges = None
+    speaking: PageRanges = None
+    answer_key: PageRanges = None
+
+
+class BookLayout(BaseModel):
+    """Response schema of LAYOUT_PROMPT."""
+
+    success: bool
+    error: Optional[str] = None
+    total_pages: Optional[int] = None
+    book_info: Optional[Dict[str, Any]] = None
+    tests: List[TestLayout] = []
+
+
+def _load_pdf_reader(pdf_bytes):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.warning("pypdf is not installed; section-wise extraction disabled")
+        return None
+    try:
+        return PdfReader(io.BytesIO(pdf_bytes))
+    except Exception as e:
+        logger.warning(f"Could not read PDF for section-wise extraction: {e}")
+        return None
+
+
+def _page_numbers(ranges, total_pages):
+    """0-based page indexes of [start, end] ranges (1-based, inclusive)."""
+    pages = []
+    for page_range in ranges or []:
+        try:
+            start, end = (int(n) for n in page_range)
+        except (TypeError, ValueError):
+            continue
+        start, end = max(start, 1), min(end, total_pages)
+        pages.extend(page for page in range(start - 1, end) if page not in pages)
+    return pages
+
+
+def split_pdf(reader, pages):
+    """Return a PDF made of the given 0-based pages of reader."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for page in pages:
+        writer.add_page(reader.pages[page])
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def plan_sections(pdf_bytes, pdf_mime_type="application/pdf"):
+    """Ask the model for the page ranges of every test's sections."""
+    from .content_generator import PDF_REQUEST_PROMPT
+    from .tools import generate_ai
+
+    plan = generate_ai(
+        prompt=PDF_REQUEST_PROMPT,
+        system_prompt=LAYOUT_PROMPT,
+        document=pdf_bytes,
+        mime_type=pdf_mime_type,
+        response_schema=BookLayout,
+    )
+    if not isinstance(plan, dict) or plan.get("success") is False:
+        return None
+    return plan
+
+
+def _section_generators():
+    from . import content_generator
+
+    return {
+        "listening": content_generator.generate_listening_parts_from_pdf,
+        "reading": content_generator.generate_reading_passages_from_pdf,
+        "writing": content_generator.generate_writing_tasks_from_pdf,
+        "speaking": content_generator.generate_speaking_topics_from_pdf,
+    }
+
+
+def _extract_chunk(generator, section, chunk_bytes):
+    """
+    Extract one section, retrying on failure. Runs in a worker thread.
+
+    Returns:
+        (items, error) tuple; items is None if every attempt failed
+    """
+    items_key, _ = SECTION_ITEMS[section]
+    error = None
+    try:
+        for attempt in range(1, FULL_TEST_CHUNK_ATTEMPTS + 1):
+            result = generator(chunk_bytes, "application/pdf")
+            items = result.get(items_key) if isinstance(result, dict) else None
+            if items and result.get("success") is not False:
+                return items, None
+            error = (
+                result.get("error") if isinstance(result, dict) else None
+            ) or f"No {items_key} extracted"
+            logger.warning(
+                f"Extracting {section} failed (attempt {attempt}/"
+                f"{FULL_TEST_CHUNK_ATTEMPTS}): {error}"
+            )
+        return None, error
+    finally:
+        # Worker threads get their own database connections
+        connections.close_all()
+
+
+def _merge(plan, extracted, failed):
+    """Assemble extracted sections into the full_test result format."""
+    tests = []
+    warnings = []
+    totals = {section: 0 for section in SECTIONS}
+    extracted_sections = set()
+
+    for test in plan["tests"]:
+        number = test["test_number"]
+        merged = {
+            "test_number": number,
+            "test_name": test.get("test_name") or f"Test {number}",
+        }
+        for section in SECTIONS:
+            items = extracted.get((number, section))
+            if items is None:
+                continue
+            items_key, expected = SECTION_ITEMS[section]
+            merged[section] = {items_key: items}
+            totals[section] += len(items)
+            extracted_sections.add(section)
+            if len(items) != expected:
+                warnings.append(
+                    f"Test {number} {section}: {len(items)} {items_key} "
+                    f"(expected {expected})"
+                )
+        if len(merged) > 2:
+            tests.append(merged)
+
+    book_info = dict(plan.get("book_info") or {})
+    book_info.setdefault("total_tests", len(plan["tests"]))
+    book_info["extracted_tests"] = len(tests)
+
+    result = {
+        "success": bool(tests),
+        "content_type": "full_test",
+        "book_info": book_info,
+        "tests": tests,
+        "metadata": {
+            "total_listening_parts": totals["listening"],
+            "total_reading_passages": totals["reading"],
+            "total_writing_tasks": totals["writing"],
+            "total_speaking_parts": totals["speaking"],
+            "extraction_mode": "sections",
+            "warnings": warnings,
+        },
+    }
+    if failed:
+        result["partial"] = True
+        result["failed_sections"] = failed
+    missing = [section for section in SECTIONS if section not in extracted_sections]
+    if missing:
+        result["partial"] = True
+        result["extracted_sections"] = sorted(extracted_sections)
+        result["missing_sections"] = missing
+    if not tests:
+        result["error"] = "No test sections could be extracted from the document"
+    return result
+
+
+def extract_full_test_by_sections(
+    pdf_bytes, pdf_mime_type="application/pdf", progress_callback=None
+):
+    """
+    Extract every test of a book section by section, concurrently.
+
+    Args:
+        pdf_bytes: PDF file content as bytes
+        pdf_mime_type: MIME type of the document
+        progress_callback: Optional callable(done, total, partial_result),
+            called after each section finishes
+
+    Returns:
+        dict in the full_test format, or None if the document can't be
+        extracted this way
+    """
+    if pdf_mime_type != "application/pdf":
+        return None
+    reader = _load_pdf_reader(pdf_bytes)
+    if reader is None:
+        return None
+    total_pages = len(reader.pages)
+
+    plan = plan_sections(pdf_bytes, pdf_mime_type)
+    if not plan or not plan.get("tests"):
+        logger.info("No section layout found; using single-prompt extraction")
+        return None
+
+    generators = _section_generators()
+    chunks = {}
+    for index, test in enumerate(plan["tests"], start=1):
+        test["test_number"] = test.get("test_number") or index
+        answer_pages = _page_numbers(test.get("answer_key"), total_pages)
+        for section in SECTIONS:
+            pages = _page_numbers(test.get(section), total_pages)
+            if not pages:
+                continue
+            if section in ANSWER_KEY_SECTIONS:
+                pages += [page for page in answer_pages if page not in pages]
+            chunks[(test["test_number"], section)] = split_pdf(reader, pages)
+
+    if not chunks:
+        logger.info("Section layout has no usable pages; using single prompt")
+        return None
+
+    logger.info(
+        f"Extracting {len(chunks)} sections of {len(plan['tests'])} tests "
+        f"({total_pages} pages)"
+    )
+    extracted = {}
+    failed = []
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(FULL_TEST_EXTRACTION_CONCURRENCY, len(chunks))),
+        thread_name_prefix="extract",
+    )
+    try:
+        futures = {
+            executor.submit(
+                _extract_chunk, generators[section], section, chunk_bytes
+            ): (test_number, section)
+            for (test_number, section), chunk_bytes in chunks.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            test_number, section = futures[future]
+            try:
+                items, error = future.result()
+            except Exception as e:
+                items, error = None, str(e)
+            if items is None:
+                failed.append(
+                    {"test_number": test_number, "section": section, "error": error}
+                )
+            else:
+                extracted[(test_number, section)] = items
+            if progress_callback:
+                progress_callback(done, len(chunks), _merge(plan, extracted, failed))
+    except BaseException:
+        # e.g. the task's soft time limit: don't wait for the running sections
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+    return _merge(plan, extracted, failed)
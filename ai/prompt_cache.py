@@ -0,0 +1,151 @@
+"""
+Provider-side caching of static system prompts.
+
+The writing examiner prompt, the speaking rubric and the PDF extraction
+instructions are the same on every request; only the essay, transcript or
+document changes. Callers pass the static part as ``system_prompt`` and the
+providers are asked to cache it:
+
+- Gemini: an explicit cached content (``client.caches.create``) per model and
+  prompt, shared by all processes through the Django cache. Prompts below the
+  model's minimum cache size are sent as ``system_instruction``, which still
+  benefits from Gemini's implicit prefix caching.
+- OpenAI: the prompt is sent as the leading system message, which OpenAI
+  caches automatically as a prompt prefix.
+- Anthropic: the system block is marked with ``cache_control``.
+"""
+
+import hashlib
+import logging
+
+from decouple import config
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Lifetime of Gemini cached contents; 0 disables explicit caching
+GEMINI_PROMPT_CACHE_TTL = config("GEMINI_PROMPT_CACHE_TTL", default=3600, cast=int)
+
+# Stop using a cached content this long before Gemini expires it
+_EXPIRY_MARGIN = 300  # seconds
+
+
+def _gemini_cache_key(scope, model, system_prompt):
+    digest = hashlib.sha256(system_prompt.encode()).hexdigest()[:32]
+    return f"gemini_prompt_cache_{scope}_{model}_{digest}"
+
+
+def get_gemini_cached_content(client, model, system_prompt, scope="default"):
+    """
+    Return the name of a Gemini cached content holding system_prompt.
+
+    Args:
+        client: google.genai Client
+        model: Model the cached content is created for
+        system_prompt: Static instructions to cache
+        scope: Identifies the API key/project, since cached contents are
+            only visible to the project that created them
+
+    Returns:
+        Cached content name, or None to send the prompt uncached
+    """
+    if GEMINI_PROMPT_CACHE_TTL <= _EXPIRY_MARGIN:
+        return None
+    from google.genai import types
+
+    key = _gemini_cache_key(scope, model, system_prompt)
+    try:
+        name = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Prompt cache registry unavailable: {e}")
+        return None
+    if name is not None:
+        # "" marks prompts Gemini refused to cache (e.g. too short)
+        return name or None
+
+    try:
+        cached_content = client.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=system_prompt,
+                ttl=f"{GEMINI_PROMPT_CACHE_TTL}s",
+            ),
+        )
+        name = cached_content.name
+        logger.info(f"Created Gemini cached content {name} for {model}")
+    except Exception as e:
+        logger.info(f"Gemini prompt not cacheable, sending it in full: {e}")
+        name = ""
+
+    try:
+        cache.set(key, name, timeout=GEMINI_PROMPT_CACHE_TTL - _EXPIRY_MARGIN)
+    except Exception:
+        pass
+    return name or None
+
+
+def forget_gemini_cached_content(model, system_prompt, scope="default"):
+    """Drop a cached content that Gemini no longer accepts."""
+    try:
+        cache.delete(_gemini_cache_key(scope, model, system_prompt))
+    except Exception:
+        pass
+
+
+def gemini_generate_content(
+    client, model, contents, system_prompt=None, scope="default", **config_kwargs
+):
+    """
+    client.models.generate_content() with system_prompt served from cache.
+
+    config_kwargs are passed to GenerateContentConfig (temperature, ...).
+    """
+    from google.genai import types
+
+    if system_prompt:
+        cached_name = get_gemini_cached_content(client, model, system_prompt, scope)
+        if cached_name:
+            try:
+                return client.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        cached_content=cached_name, **config_kwargs
+                    ),
+                )
+            except Exception as e:
+                if "cache" not in str(e).lower():
+                    raise
+                # Deleted or expired on Gemini's side
+                logger.warning(f"Gemini cached content {cached_name} rejected: {e}")
+                forget_gemini_cached_content(model, system_prompt, scope)
+        config_kwargs["system_instruction"] = system_prompt
+
+    return client.models.generate_content(
+        model=model,
+        contents=contents,
+        config=types.GenerateContentConfig(**config_kwargs),
+    )
+
+
+def openai_messages(content, system_prompt=None):
+    """Chat messages with the static system prompt first (cached as a prefix)."""
+    messages = [{"role": "user", "content": content}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": system_prompt})
+    return messages
+
+
+def anthropic_system(system_prompt=None):
+    """messages.create() kwargs caching the static system prompt."""
+    if not system_prompt:
+        return {}
+    return {
+        "system": [
+            {
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+    }
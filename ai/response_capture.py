@@ -0,0 +1,126 @@
+"""
+Sampled capture of raw AI responses for debugging.
+
+``generate_ai`` used to write every raw response to ``ai-response/`` on the
+worker's local disk. Capturing is now opt-in and off the request path:
+
+- ``AI_RESPONSE_CAPTURE_RATE`` (0.0-1.0, default 0) is the fraction of
+  responses captured;
+- ``AI_RESPONSE_CAPTURE_FAILURES`` also captures every response that could
+  not be parsed as JSON;
+- captures are written by a Celery task to the default storage (local media
+  or S3) under ``ai-responses/<YYYY-MM-DD>/``, with unique names;
+- ``prune_ai_response_captures`` (Celery beat, daily) deletes the days older
+  than ``AI_RESPONSE_CAPTURE_RETENTION_DAYS``.
+"""
+
+import datetime
+import json
+import logging
+import random
+import uuid
+
+from decouple import config
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_DIR = "ai-responses"
+
+# Fraction of successful responses captured; 0 disables sampling
+AI_RESPONSE_CAPTURE_RATE = config("AI_RESPONSE_CAPTURE_RATE", default=0.0, cast=float)
+# Capture every response that failed to parse
+AI_RESPONSE_CAPTURE_FAILURES = config(
+    "AI_RESPONSE_CAPTURE_FAILURES", default=False, cast=bool
+)
+# Days of captures kept
+AI_RESPONSE_CAPTURE_RETENTION_DAYS = config(
+    "AI_RESPONSE_CAPTURE_RETENTION_DAYS", default=7, cast=int
+)
+# Longer responses are truncated
+AI_RESPONSE_CAPTURE_MAX_CHARS = config(
+    "AI_RESPONSE_CAPTURE_MAX_CHARS", default=1_000_000, cast=int
+)
+
+
+def should_capture(failed=False):
+    if failed and AI_RESPONSE_CAPTURE_FAILURES:
+        return True
+    return AI_RESPONSE_CAPTURE_RATE > 0 and random.random() < AI_RESPONSE_CAPTURE_RATE
+
+
+def capture_response(
+    text, request_type="general", model=None, failed=False, error=None
+):
+    """
+    Queue a raw AI response for capture if it is sampled.
+
+    Never blocks on storage and never raises; the response is dropped if the
+    task can't be queued.
+    """
+    if not text or not should_capture(failed):
+        return
+    from manager_panel.tasks import store_ai_response_capture
+
+    capture = {
+        "captured_at": timezone.now().isoformat(),
+        "request_type": request_type,
+        "model": model,
+        "failed": failed,
+        "error": error,
+        "truncated": len(text) > AI_RESPONSE_CAPTURE_MAX_CHARS,
+        "text": text[:AI_RESPONSE_CAPTURE_MAX_CHARS],
+    }
+    try:
+        store_ai_response_capture.delay(capture)
+    except Exception as e:
+        logger.warning(f"Could not queue AI response capture: {e}")
+
+
+def save_capture(capture):
+    """Write a capture to storage. Returns the stored file name."""
+    captured_at = datetime.datetime.fromisoformat(capture["captured_at"])
+    name = (
+        f"{CAPTURE_DIR}/{captured_at:%Y-%m-%d}/"
+        f"{captured_at:%H%M%S}_{capture['request_type']}"
+        f"{'_failed' if capture['failed'] else ''}_{uuid.uuid4().hex[:12]}.json"
+    )
+    content = json.dumps(capture, ensure_ascii=False).encode("utf-8")
+    return default_storage.save(name, ContentFile(content))
+
+
+def prune_captures(retention_days=None):
+    """
+    Delete captures older than retention_days.
+
+    Returns:
+        Number of files deleted
+    """
+    if retention_days is None:
+        retention_days = AI_RESPONSE_CAPTURE_RETENTION_DAYS
+    cutoff = timezone.now().date() - datetime.timedelta(days=retention_days)
+
+    try:
+        days, _ = default_storage.listdir(CAPTURE_DIR)
+    except (FileNotFoundError, NotADirectoryError):
+        return 0
+
+    deleted = 0
+    for day in days:
+        try:
+            if datetime.date.fromisoformat(day) >= cutoff:
+                continue
+        except ValueError:
+            continue
+        _, files = default_storage.listdir(f"{CAPTURE_DIR}/{day}")
+        for file_name in files:
+            default_storage.delete(f"{CAPTURE_DIR}/{day}/{file_name}")
+            deleted += 1
+        try:
+            # Removes the empty directory on local storage
+            default_storage.delete(f"{CAPTURE_DIR}/{day}")
+        except OSError:
+            pass
+    return deleted
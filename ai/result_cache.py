@@ -0,0 +1,93 @@
+"""
+Database cache for deterministic AI results.
+
+Writing checks run at temperature 0 with a fixed system prompt, so the same
+essay, task and model give the same evaluation. Results are stored in
+``AIResultCache`` under a SHA-256 of everything that affects them, so
+identical resubmissions and task retries are answered from the database
+instead of spending tokens. Entries expire after a TTL and are purged daily
+by ``manager_panel.tasks.purge_ai_result_cache``.
+
+The cache is best effort: database errors are logged and the request is sent
+to the provider as usual.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from datetime import timedelta
+
+from decouple import config
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+AI_RESULT_CACHE_TIMEOUT = config(
+    "AI_RESULT_CACHE_TIMEOUT", default=60 * 60 * 24 * 30, cast=int
+)  # 30 days; 0 disables the cache
+
+
+def normalize_text(text):
+    """
+    Normalize whitespace without changing the text's structure.
+
+    Trailing spaces, runs of spaces and runs of blank lines are collapsed,
+    but paragraph breaks are kept (paragraphing is part of the evaluation).
+    """
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def make_cache_key(*parts):
+    """SHA-256 hex digest of the JSON encoding of parts."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_cached_result(key):
+    """Return the stored result for key if present and not expired."""
+    if not AI_RESULT_CACHE_TIMEOUT:
+        return None
+    from manager_panel.models import AIResultCache
+
+    try:
+        entries = AIResultCache.objects.filter(key=key, expires_at__gt=timezone.now())
+        result = entries.values_list("result", flat=True).first()
+        if result is not None:
+            entries.update(hits=F("hits") + 1)
+        return result
+    except Exception as e:
+        logger.warning(f"AI result cache unavailable: {e}")
+        return None
+
+
+def store_result(key, request_type, model_name, result):
+    """Store a successful result under key, replacing any expired entry."""
+    if not AI_RESULT_CACHE_TIMEOUT:
+        return
+    from manager_panel.models import AIResultCache
+
+    try:
+        AIResultCache.objects.update_or_create(
+            key=key,
+            defaults={
+                "request_type": request_type,
+                "model_name": model_name,
+                "result": result,
+                "hits": 0,
+                "expires_at": timezone.now()
+                + timedelta(seconds=AI_RESULT_CACHE_TIMEOUT),
+            },
+        )
+    except Exception as e:
+        logger.warning(f"Failed to cache AI result: {e}")
+
+
+def purge_expired_results():
+    """Delete expired entries. Returns the number of rows deleted."""
+    from manager_panel.models import AIResultCache
+
+    deleted, _ = AIResultCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -10,11 +10,11 @@ This module provides comprehensive evaluation of IELTS Speaking responses based
 Uses Microsoft Azure for Speech-to-Text and Google Gemini for AI evaluation.
 """
 
+import hashlib
 import logging
-import os
 import json
-import subprocess
-import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
 
@@ -22,104 +22,54 @@ import azure.cognitiveservices.speech as speechsdk
 from google import genai
 from google.genai import types
 from decouple import config
+from django.core.cache import cache
+from ai.audio_pipeline import AudioConversionError, normalize_audio
 from ai.tools import generate_ai, change_to_json
 
 logger = logging.getLogger(__name__)
 
+# Recordings of one attempt transcribed in parallel, and how long to wait for
+# a single recording before giving up on it
+TRANSCRIPTION_CONCURRENCY = config(
+    "SPEAKING_TRANSCRIPTION_CONCURRENCY", default=4, cast=int
+)
+TRANSCRIPTION_TIMEOUT = config("SPEAKING_TRANSCRIPTION_TIMEOUT", default=120, cast=int)
 
-def convert_audio_to_wav(input_path: str) -> str:
-    """
-    Convert audio file to WAV format suitable for Azure Speech SDK.
+# Successful transcriptions are cached by the SHA-256 of the normalized PCM, so
+# task retries and re-evaluations don't send the same clip to Azure again.
+# Bump the version when the recognition settings change.
+TRANSCRIPT_CACHE_VERSION = 1
+TRANSCRIPT_CACHE_TIMEOUT = config(
+    "SPEAKING_TRANSCRIPT_CACHE_TIMEOUT", default=60 * 60 * 24 * 30, cast=int
+)
 
-    Azure Speech SDK requires:
-    - WAV format with proper headers
-    - 16kHz sample rate (recommended)
-    - 16-bit PCM
-    - Mono channel
 
-    Args:
-        input_path: Path to the input audio file (WebM, MP3, etc.)
+def _audio_digest(pcm: bytes) -> str:
+    """SHA-256 hex digest of normalized PCM."""
+    return hashlib.sha256(pcm).hexdigest()
 
-    Returns:
-        Path to the converted WAV file (temporary file)
 
-    Raises:
-        RuntimeError: If conversion fails
-    """
-    # Check if input is already a proper WAV file
-    if input_path.lower().endswith(".wav"):
-        # Still convert to ensure proper format for Azure
-        pass
+def _transcript_cache_key(digest: str) -> str:
+    return f"speaking_transcript_v{TRANSCRIPT_CACHE_VERSION}_{digest}"
 
-    # Create a temporary file for the output
-    temp_fd, temp_path = tempfile.mkstemp(suffix=".wav")
-    os.close(temp_fd)
 
+def get_cached_transcription(digest: str) -> Optional[Dict]:
+    """Return the cached transcription of a normalized clip, if any."""
     try:
-        # Use ffmpeg to convert to WAV with Azure-compatible settings
-        # -ar 16000: 16kHz sample rate
-        # -ac 1: mono channel
-        # -sample_fmt s16: 16-bit signed integer
-        # -y: overwrite output file
-        cmd = [
-            "ffmpeg",
-            "-i",
-            input_path,
-            "-ar",
-            "16000",
-            "-ac",
-            "1",
-            "-sample_fmt",
-            "s16",
-            "-y",
-            temp_path,
-        ]
+        return cache.get(_transcript_cache_key(digest))
+    except Exception as e:
+        logger.warning(f"Transcript cache unavailable: {e}")
+        return None
 
-        logger.info(f"Converting audio: {input_path} -> {temp_path}")
 
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=60  # 60 second timeout
+def cache_transcription(digest: str, result: Dict) -> None:
+    """Store a successful transcription of a normalized clip."""
+    try:
+        cache.set(
+            _transcript_cache_key(digest), result, timeout=TRANSCRIPT_CACHE_TIMEOUT
         )
-
-        if result.returncode != 0:
-            logger.error(f"FFmpeg conversion failed: {result.stderr}")
-            # Try alternative conversion without sample_fmt (for older ffmpeg)
-            cmd_alt = [
-                "ffmpeg",
-                "-i",
-                input_path,
-                "-ar",
-                "16000",
-                "-ac",
-                "1",
-                "-acodec",
-                "pcm_s16le",
-                "-y",
-                temp_path,
-            ]
-            result = subprocess.run(cmd_alt, capture_output=True, text=True, timeout=60)
-            if result.returncode != 0:
-                raise RuntimeError(f"FFmpeg conversion failed: {result.stderr}")
-
-        # Verify the output file exists and has content
-        if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
-            raise RuntimeError("Conversion produced empty or missing file")
-
-        logger.info(f"Audio conversion successful: {os.path.getsize(temp_path)} bytes")
-        return temp_path
-
-    except subprocess.TimeoutExpired:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        raise RuntimeError("Audio conversion timed out")
-    except FileNotFoundError:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        raise RuntimeError("FFmpeg not found. Please install FFmpeg.")
     except Exception as e:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        raise RuntimeError(f"Audio conversion failed: {str(e)}")
+        logger.warning(f"Failed to cache transcript: {e}")
 
 
 class AzureSpeechRecognizer:
@@ -132,12 +82,47 @@ class AzureSpeechRecognizer:
         if not self.speech_key or not self.speech_region:
             raise ValueError("Azure Speech credentials not configured")
 
-    def transcribe_audio(self, audio_file_path: str) -> Dict[str, any]:
+    def transcribe_audio(self, audio) -> Dict[str, any]:
+        """
+        Transcribe a recording to text with pronunciation assessment.
+
+        The recording is decoded by ffmpeg straight from its source (see
+        ``ai/audio_pipeline.py``) and the PCM is pushed to Azure, so nothing
+        is written to temporary files.
+
+        Args:
+            audio: Path, StoredAudio or file object of the recording (WebM,
+                MP3, WAV, ...)
+
+        Returns:
+            Dictionary containing (see transcribe_pcm):
+                - transcript: Full text transcript
+                - pronunciation_score: Overall pronunciation score (0-100)
+                - success: Whether recognition succeeded
+        """
+        try:
+            pcm = normalize_audio(audio)
+        except AudioConversionError as e:
+            logger.error(f"Audio conversion failed for {audio}: {e}")
+            return {
+                "transcript": "",
+                "pronunciation_score": 0,
+                "fluency_score": 0,
+                "accuracy_score": 0,
+                "completeness_score": 0,
+                "words": [],
+                "success": False,
+                "error": str(e),
+            }
+        return self.transcribe_pcm(pcm, label=str(audio))
+
+    def transcribe_pcm(self, pcm: bytes, label: str = "audio") -> Dict[str, any]:
         """
-        Transcribe audio file to text with pronunciation assessment.
+        Transcribe 16 kHz, 16-bit, mono PCM with pronunciation assessment.
 
         Args:
-            audio_file_path: Path to the audio file
+            pcm: Normalized samples (see ai.audio_pipeline.normalize_audio)
+            label: Name of the recording, for logging
 
         Returns:
             Dictionary containing:
@@ -148,18 +133,13 @@ class AzureSpeechRecognizer:
                 - completeness_score: Completeness score (0-100)
                 - words: List of word-level details with pronunciation scores
         """
-        converted_path = None
         try:
-            # Convert audio to WAV format if needed (WebM, MP3, etc. -> WAV)
-            # Azure Speech SDK requires proper WAV format
-            if (
-                not audio_file_path.lower().endswith(".wav") or True
-            ):  # Always convert for safety
-                logger.info(f"Converting audio file to WAV format: {audio_file_path}")
-                converted_path = convert_audio_to_wav(audio_file_path)
-                audio_file_to_use = converted_path
-            else:
-                audio_file_to_use = audio_file_path
+            # Skip Azure for clips transcribed before (e.g. on task retries)
+            audio_digest = _audio_digest(pcm)
+            cached_result = get_cached_transcription(audio_digest)
+            if cached_result is not None:
+                logger.info(f"Using cached transcription for {label}")
+                return cached_result
 
             # Configure speech recognition
             speech_config = speechsdk.SpeechConfig(
@@ -169,8 +149,10 @@ class AzureSpeechRecognizer:
             # Set recognition language to English
             speech_config.speech_recognition_language = "en-US"
 
-            # Configure audio input
-            audio_config = speechsdk.audio.AudioConfig(filename=audio_file_to_use)
+            # Configure audio input; the push stream's default format is
+            # 16 kHz, 16-bit, mono PCM
+            audio_stream = speechsdk.audio.PushAudioInputStream()
+            audio_config = speechsdk.audio.AudioConfig(stream=audio_stream)
 
             # Enable pronunciation assessment
             pronunciation_config = speechsdk.PronunciationAssessmentConfig(
@@ -190,6 +172,8 @@ class AzureSpeechRecognizer:
             pronunciation_config.apply_to(speech_recognizer)
 
             # Perform recognition
+            audio_stream.write(pcm)
+            audio_stream.close()
             result = speech_recognizer.recognize_once()
 
             if result.reason == speechsdk.ResultReason.RecognizedSpeech:
@@ -258,7 +242,7 @@ class AzureSpeechRecognizer:
                                 omitted_words.append(word)
                             elif error_type == "Insertion":
                                 inserted_words.append(word)
-                return {
+                transcription = {
                     "transcript": result.text,
                     "pronunciation_score": pronunciation_result.pronunciation_score,
                     "fluency_score": pronunciation_result.fluency_score,
@@ -272,9 +256,11 @@ class AzureSpeechRecognizer:
                     "mispronunciation_count": len(mispronounced_words),
                     "success": True,
                 }
+                cache_transcription(audio_digest, transcription)
+                return transcription
 
             elif result.reason == speechsdk.ResultReason.NoMatch:
-                logger.warning(f"No speech recognized in audio file: {audio_file_path}")
+                logger.warning(f"No speech recognized in audio: {label}")
                 return {
                     "transcript": "",
                     "pronunciation_score": 0,
@@ -313,32 +299,67 @@ class AzureSpeechRecognizer:
                 "success": False,
                 "error": str(e),
             }
-        finally:
-            # Clean up converted temporary file
-            if converted_path and os.path.exists(converted_path):
+
+    def transcribe_many(self, audio_files: Dict) -> Dict[str, Dict]:
+        """
+        Transcribe several audio files concurrently.
+
+        Up to TRANSCRIPTION_CONCURRENCY recognitions run at once, so the total
+        latency is close to the slowest clip instead of the sum of all clips.
+        A clip not finished TRANSCRIPTION_TIMEOUT seconds after it is awaited
+        is reported as a failed transcription.
+
+        Args:
+            audio_files: Dictionary mapping keys (e.g. question IDs) to recordings
+                (paths or StoredAudio)
+
+        Returns:
+            Dictionary mapping the same keys, in the same order, to
+            transcribe_audio() results
+        """
+        if not audio_files:
+            return {}
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(TRANSCRIPTION_CONCURRENCY, len(audio_files))),
+            thread_name_prefix="transcribe",
+        )
+        try:
+            futures = {
+                key: executor.submit(self.transcribe_audio, path)
+                for key, path in audio_files.items()
+            }
+            results = {}
+            for key, future in futures.items():
                 try:
-                    os.remove(converted_path)
-                    logger.debug(f"Cleaned up temporary WAV file: {converted_path}")
-                except Exception as cleanup_err:
-                    logger.warning(
-                        f"Failed to clean up temp file {converted_path}: {cleanup_err}"
+                    results[key] = future.result(timeout=TRANSCRIPTION_TIMEOUT)
+                except FutureTimeoutError:
+                    logger.error(
+                        f"Transcription timed out after {TRANSCRIPTION_TIMEOUT}s: "
+                        f"{audio_files[key]}"
                     )
+                    results[key] = {
+                        "transcript": "",
+                        "pronunciation_score": 0,
+                        "fluency_score": 0,
+                        "accuracy_score": 0,
+                        "completeness_score": 0,
+                        "words": [],
+                        "success": False,
+                        "error": "Transcription timed out",
+                    }
+            return results
+        finally:
+            # Don't block on recognitions that timed out
+            executor.shutdown(wait=False, cancel_futures=True)
 
 
 class GeminiSpeakingEvaluator:
     """Evaluates IELTS Speaking responses using Google Gemini AI."""
 
-    # IELTS Speaking Band Descriptors
-    EVALUATION_PROMPT = """You are an expert IELTS Speaking examiner. Evaluate the following speaking response according to the official IELTS Speaking assessment criteria.
-
-**IELTS Speaking Part**: {part_type}
-**Question**: {question}
-**Transcript**: {transcript}
-
-**Pronunciation Data from Azure**:
-- Overall Pronunciation Score: {pronunciation_score}/100
-- Fluency Score: {fluency_score}/100
-- Accuracy Score: {accuracy_score}/100
+    # IELTS Speaking Band Descriptors. Static, so it is sent as the system
+    # prompt and cached by the provider; RESPONSE_PROMPT carries the answer.
+    RUBRIC_PROMPT = """You are an expert IELTS Speaking examiner. Evaluate the speaking response you are given according to the official IELTS Speaking assessment criteria.
 
 Evaluate the response based on these four criteria:
 
@@ -378,37 +399,47 @@ Evaluate the response based on these four criteria:
 - Band 0: Did not attempt
 
 Provide your evaluation in the following JSON format:
-{{
-    "fluency_and_coherence": {{
+{
+    "fluency_and_coherence": {
         "score":0.0,
         "feedback": "Detailed feedback on fluency and coherence..."
-    }},
-    "lexical_resource": {{
+    },
+    "lexical_resource": {
         "score": 0.0,
         "feedback": "Detailed feedback on vocabulary usage..."
-    }},
-    "grammatical_range_and_accuracy": {{
+    },
+    "grammatical_range_and_accuracy": {
         "score": 0.0,
         "feedback": "Detailed feedback on grammar..."
-    }},
-    "pronunciation": {{
+    },
+    "pronunciation": {
         "score": 0.0,
         "feedback": "Detailed feedback on pronunciation..."
-    }},
+    },
     "overall_band_score": 0.0,
     "overall_feedback": "Comprehensive overall feedback...",
     "strengths": ["Strength 1", "Strength 2", "Strength 3"],
     "areas_for_improvement": ["Area 1", "Area 2", "Area 3"],
-    "pronunciation_improvements": {{
+    "pronunciation_improvements": {
         "specific_words": ["List specific mispronounced words that need practice"],
         "phonetic_tips": ["Specific tips for improving pronunciation of problematic sounds"],
         "practice_exercises": ["Suggested practice exercises or techniques"]
-    }}
-}}
+    }
+}
 
 Ensure all scores are realistic IELTS band scores (0-9, in 0.5 increments). The overall band score should be the average of the four criteria, rounded to the nearest 0.5.
 If mispronounced words are provided, give specific guidance on how to improve pronunciation of those words."""
 
+    RESPONSE_PROMPT = """**IELTS Speaking Part**: {part_type}
+**Question**: {question}
+**Transcript**: {transcript}
+
+**Pronunciation Data from Azure**:
+- Overall Pronunciation Score: {pronunciation_score}/100
+- Fluency Score: {fluency_score}/100
+- Accuracy Score: {accuracy_score}/100
+"""
+
     def __init__(self):
         self.api_key = config("GEMINI_API_KEY")
         self.model_name = config("GEMINI_MODEL", default="gemini-2.5-flash")
@@ -470,7 +501,7 @@ If mispronounced words are provided, give specific guidance on how to improve pr
 
             # Format the prompt
             prompt = (
-                self.EVALUATION_PROMPT.format(
+                self.RESPONSE_PROMPT.format(
                     part_type=part_type,
                     question=question,
                     transcript=transcript,
@@ -484,7 +515,9 @@ If mispronounced words are provided, give specific guidance on how to improve pr
             )
 
             # Call Gemini API
-            response = generate_ai(prompt, model="gemini-2.5-flash")
+            response = generate_ai(
+                prompt, model="gemini-2.5-flash", system_prompt=self.RUBRIC_PROMPT
+            )
             if response is None:
                 raise ValueError("Gemini API returned no response text")
 
@@ -544,13 +577,14 @@ If mispronounced words are provided, give specific guidance on how to improve pr
 
 
 def evaluate_speaking_attempt(
-    audio_files: Dict[str, str], questions: List[Dict[str, str]], part_type: str
+    audio_files: Dict, questions: List[Dict[str, str]], part_type: str
 ) -> Dict:
     """
     Complete evaluation pipeline for a speaking attempt.
 
     Args:
-        audio_files: Dictionary mapping question IDs to audio file paths
+        audio_files: Dictionary mapping question IDs to recordings (paths or
+            StoredAudio)
         questions: List of question dictionaries with 'id' and 'text'
         part_type: Speaking part type (e.g., "Part 1: Introduction & Interview")
 
@@ -597,6 +631,15 @@ def evaluate_speaking_attempt(
                 "is_partial": True,
             }
 
+        # Transcribe all answered questions in parallel
+        transcriptions = speech_recognizer.transcribe_many(
+            {
+                str(question["id"]): audio_files[str(question["id"])]
+                for question in questions
+                if str(question["id"]) in audio_files
+            }
+        )
+
         # Process each audio file
         transcripts = []
         pronunciation_scores = []
@@ -621,11 +664,7 @@ def evaluate_speaking_attempt(
                 )
                 continue
 
-            audio_path = audio_files[question_id]
-
-            # Transcribe audio
-            logger.info(f"Transcribing audio for question {question_id}")
-            transcription_result = speech_recognizer.transcribe_audio(audio_path)
+            transcription_result = transcriptions[question_id]
 
             if not transcription_result["success"]:
                 logger.error(f"Transcription failed for question {question_id}")
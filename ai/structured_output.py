@@ -0,0 +1,67 @@
+"""
+Schema-constrained JSON output.
+
+Generators describe their output with a Pydantic model. The providers are
+asked for JSON matching its JSON Schema (Gemini ``response_json_schema``,
+OpenAI ``json_schema`` response format), so the response text parses in one
+pass and is validated against the same model. ``change_to_json``'s repairs
+are only a fallback for output that wasn't constrained (e.g. Anthropic, or a
+schema the provider rejected).
+"""
+
+import functools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def json_schema_for(schema):
+    """JSON Schema of a Pydantic model (computed once per model)."""
+    return schema.model_json_schema()
+
+
+def gemini_json_config(schema=None):
+    """GenerateContentConfig kwargs requesting JSON (matching schema)."""
+    config = {"response_mime_type": "application/json"}
+    if schema is not None:
+        config["response_json_schema"] = json_schema_for(schema)
+    return config
+
+
+def openai_response_format(schema):
+    """chat.completions.create() response_format for a Pydantic model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema.__name__,
+            "schema": json_schema_for(schema),
+            # Schemas keep extra keys, which strict mode doesn't allow
+            "strict": False,
+        },
+    }
+
+
+def parse_json_response(text, schema=None):
+    """
+    Parse a model's JSON response, validated against schema if given.
+
+    Returns:
+        dict with the keys present in the response (defaults aren't added)
+
+    Raises:
+        ValueError: If no JSON can be recovered or it doesn't match schema
+            (pydantic.ValidationError is a ValueError)
+    """
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        from ai.tools import change_to_json
+
+        logger.warning(f"Response is not valid JSON ({e}); attempting repair")
+        data = change_to_json(text)
+
+    if schema is None:
+        return data
+    return schema.model_validate(data).model_dump(mode="json", exclude_unset=True)
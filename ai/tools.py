@@ -1,44 +1,55 @@
-import datetime
+import hashlib
 import json
+import logging
 import os
 import ssl
-from random import random
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
-import random
 import httpx
 
+from ai.prompt_cache import gemini_generate_content
+from ai.response_capture import capture_response
+from ai.structured_output import gemini_json_config, parse_json_response
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Global client instance - will be lazy-loaded from database or environment
 _client = None
 _client_config = None
+_client_scope = "default"  # API key fingerprint, scopes cached prompts
+
+
+def _key_scope(api_key):
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
 
 
 def get_gemini_client():
     """
     Get or create Gemini client. Tries database config first, falls back to env vars.
     """
-    global _client, _client_config
+    global _client, _client_config, _client_scope
 
     # Try to get configuration from database
     try:
         from manager_panel.models import AIConfiguration
 
-        db_config = AIConfiguration.get_primary_config()
+        db_config = AIConfiguration.get_cached_primary_config()
 
         if db_config and db_config.provider == "gemini":
             # Check if we need to recreate client (config changed)
             if _client is None or _client_config != db_config.id:
                 _client = genai.Client(api_key=db_config.api_key)
                 _client_config = db_config.id
-                print(
+                _client_scope = _key_scope(db_config.api_key)
+                logger.info(
                     f"Using AI config from database: {db_config.name} ({db_config.model_name})"
                 )
             return _client, db_config.model_name
     except Exception as e:
-        print(f"Could not load AI config from database: {e}")
+        logger.warning(f"Could not load AI config from database: {e}")
 
     # Fallback to environment variables
     api_key = os.getenv("GEMINI_API_KEY")
@@ -50,10 +61,11 @@ def get_gemini_client():
         )
 
     if _client is None:
+        _client_scope = _key_scope(api_key)
         try:
             _client = genai.Client(api_key=api_key)
         except Exception as e:
-            print(f"Failed to create secure client: {e}")
+            logger.warning(f"Failed to create secure client: {e}")
             # Fallback with relaxed SSL
             try:
                 ssl_context = ssl.create_default_context()
@@ -66,7 +78,7 @@ def get_gemini_client():
                     api_key=api_key, http_options={"client": http_client}
                 )
             except Exception as e2:
-                print(f"Failed to create client with relaxed SSL: {e2}")
+                logger.error(f"Failed to create client with relaxed SSL: {e2}")
                 _client = genai.Client(api_key=api_key)
 
     return _client, model
@@ -165,13 +177,13 @@ def change_to_json(text):
 
     # If there are missing closing braces/brackets, add them
     if open_braces > close_braces:
-        print(
-            f"WARNING: Missing {open_braces - close_braces} closing brace(s), adding them"
+        logger.warning(
+            f"Missing {open_braces - close_braces} closing brace(s), adding them"
         )
         json_str += "}" * (open_braces - close_braces)
     if open_brackets > close_brackets:
-        print(
-            f"WARNING: Missing {open_brackets - close_brackets} closing bracket(s), adding them"
+        logger.warning(
+            f"Missing {open_brackets - close_brackets} closing bracket(s), adding them"
         )
         json_str += "]" * (open_brackets - close_brackets)
 
@@ -179,23 +191,16 @@ def change_to_json(text):
     try:
         return json.loads(json_str)
     except json.JSONDecodeError as e:
-        # Log the problematic JSON for debugging
-        print(f"JSON parsing failed at position {e.pos}")
-        print(f"Error: {e.msg}")
-        # Show context around the error
+        # Log the context around the error; the raw response is captured
+        # by generate_ai (see ai/response_capture.py)
         start = max(0, e.pos - 100)
         end = min(len(json_str), e.pos + 100)
-        print(f"Context: ...{json_str[start:end]}...")
-
-        # Save problematic JSON to file for debugging
-        debug_file = f"failed_json_{random.randint(10000, 99999)}.json"
-        with open(debug_file, "w", encoding="utf-8") as f:
-            f.write(json_str)
-        print(f"Saved failed JSON to {debug_file}")
-        print(
-            f"JSON structure: {open_braces} {{ vs {close_braces} }}, {open_brackets} [ vs {close_brackets} ]"
+        logger.warning(
+            f"JSON parsing failed at position {e.pos}: {e.msg}. "
+            f"Context: ...{json_str[start:end]}... "
+            f"Structure: {open_braces} {{ vs {close_braces} }}, "
+            f"{open_brackets} [ vs {close_brackets} ]"
         )
-
         raise
 
 
@@ -206,6 +211,8 @@ def generate_ai(
     document=None,
     max_retries=3,
     request_type="general",
+    system_prompt=None,
+    response_schema=None,
 ) -> dict:
     """
     Generate AI response using Gemini API with retry logic.
@@ -219,6 +226,11 @@ def generate_ai(
         document: Binary document data (if provided)
         max_retries: Maximum number of retry attempts for network errors
         request_type: Type of request for tracking (e.g., 'content_generation', 'writing_check')
+        system_prompt: Static instructions shared by many requests; cached by
+            Gemini instead of being resent in full (see ai/prompt_cache.py)
+        response_schema: Pydantic model the response must match; Gemini is
+            asked for JSON in that shape (see ai/structured_output.py).
+            Without it the response is still requested as JSON.
 
     Returns:
         dict: Parsed JSON response from AI
@@ -235,7 +247,7 @@ def generate_ai(
     try:
         from manager_panel.models import AIConfiguration
 
-        db_config = AIConfiguration.get_primary_config()
+        db_config = AIConfiguration.get_cached_primary_config()
     except Exception:
         pass
 
@@ -243,9 +255,10 @@ def generate_ai(
     if model is None:
         model = config_model
 
-    print("DOCUMENT MIME TYPE:", mime_type)
-    print("DOCUMENT SIZE:", len(document) if document else 0)
-    print(f"Using model: {model}")
+    logger.debug(
+        f"generate_ai: model={model} request_type={request_type} "
+        f"mime_type={mime_type} document_size={len(document) if document else 0}"
+    )
 
     last_error = None
 
@@ -254,8 +267,8 @@ def generate_ai(
         try:
             if attempt > 0:
                 wait_time = 2**attempt  # Exponential backoff: 2s, 4s, 8s
-                print(
-                    f"Retry attempt {attempt + 1}/{max_retries} after {wait_time}s..."
+                logger.info(
+                    f"Retry attempt {attempt + 1}/{max_retries} after {wait_time}s"
                 )
                 time.sleep(wait_time)
 
@@ -269,31 +282,43 @@ def generate_ai(
                     )
                 )
 
-            print(
-                f"Sending request to Gemini AI (attempt {attempt + 1}/{max_retries})..."
+            logger.debug(
+                f"Sending request to Gemini AI (attempt {attempt + 1}/{max_retries})"
             )
-            response = ai_client.models.generate_content(
-                model=model,
-                contents=contents,
-                config=types.GenerateContentConfig(
+            json_config = gemini_json_config(response_schema)
+            try:
+                response = gemini_generate_content(
+                    ai_client,
+                    model,
+                    contents,
+                    system_prompt=system_prompt,
+                    scope=_client_scope,
                     temperature=0.0,
                     thinking_config=types.ThinkingConfig(
                         include_thoughts=True,
                     ),
-                ),
-            )
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            response_dir = "ai-response"
-            os.makedirs(
-                response_dir, exist_ok=True
-            )  # Create directory if it doesn't exist
-            response_file = f"{response_dir}/ai_response_{timestamp}.json"
-            with open(response_file, "w", encoding="utf-8") as f:
-                f.write(response.text)
-            print(f"Saved raw response to {response_file}")
-
-            text = change_to_json(response.text)
-            print("PARSED JSON SUCCESS")
+                    **json_config,
+                )
+            except Exception as e:
+                if response_schema is None or "schema" not in str(e).lower():
+                    raise
+                # Schema not supported by this model: plain JSON mode
+                logger.warning(f"Response schema rejected, requesting plain JSON: {e}")
+                response = gemini_generate_content(
+                    ai_client,
+                    model,
+                    contents,
+                    system_prompt=system_prompt,
+                    scope=_client_scope,
+                    temperature=0.0,
+                    thinking_config=types.ThinkingConfig(
+                        include_thoughts=True,
+                    ),
+                    **gemini_json_config(),
+                )
+            text = parse_json_response(response.text, response_schema)
+            # Sampled, written to storage by a Celery task (off this path)
+            capture_response(response.text, request_type, model)
 
             # Track usage on successful response
             if db_config:
@@ -301,42 +326,48 @@ def generate_ai(
                     response_time_ms = int((time.time() - start_time) * 1000)
                     # Estimate tokens (Gemini doesn't always provide token count in response)
                     # Rough estimate: ~4 chars per token
-                    estimated_tokens = (len(prompt) + len(response.text)) // 4
-
-                    # Update config usage stats
-                    db_config.increment_usage(estimated_tokens)
-
-                    # Create usage log if model exists
-                    try:
-                        from manager_panel.models import AIUsageLog
-
-                        AIUsageLog.objects.create(
-                            configuration=db_config,
-                            endpoint="generate_ai",
-                            request_type=request_type,
-                            input_tokens=len(prompt) // 4,
-                            output_tokens=len(response.text) // 4,
-                            total_tokens=estimated_tokens,
-                            success=True,
-                            response_time_ms=response_time_ms,
-                        )
-                    except Exception as log_error:
-                        print(f"Failed to create usage log: {log_error}")
+                    prompt_length = len(prompt) + len(system_prompt or "")
+                    estimated_tokens = (prompt_length + len(response.text)) // 4
+
+                    # Usage log and config usage stats (buffered, saved in batches)
+                    from manager_panel.usage_buffer import record_usage
+
+                    record_usage(
+                        db_config,
+                        endpoint="generate_ai",
+                        request_type=request_type,
+                        input_tokens=prompt_length // 4,
+                        output_tokens=len(response.text) // 4,
+                        total_tokens=estimated_tokens,
+                        success=True,
+                        response_time_ms=response_time_ms,
+                    )
                 except Exception as track_error:
-                    print(f"Failed to track usage: {track_error}")
+                    logger.warning(f"Failed to track usage: {track_error}")
 
             return text
 
         except json.JSONDecodeError as e:
-            print(f"JSON parsing error: {e}")
+            logger.warning(f"JSON parsing error in {request_type} response: {e}")
             if "response" in locals():
-                print(f"Response text (first 1000 chars): {response.text[:1000]}")
-                print(f"Response text (last 500 chars): {response.text[-500:]}")
+                capture_response(
+                    response.text, request_type, model, failed=True, error=str(e)
+                )
 
-            # Track error
+            # Track error (through the usage buffer, so a later flush of
+            # buffered successes can't overwrite it)
             if db_config:
                 try:
-                    db_config.record_error(f"JSON parsing error: {str(e)}")
+                    from manager_panel.usage_buffer import record_usage
+
+                    record_usage(
+                        db_config,
+                        endpoint="generate_ai",
+                        request_type=request_type,
+                        success=False,
+                        error_message=f"JSON parsing error: {str(e)}",
+                        response_time_ms=int((time.time() - start_time) * 1000),
+                    )
                 except Exception:
                     pass
 
@@ -346,12 +377,26 @@ def generate_ai(
                 "details": str(e),
             }
         except ValueError as e:
-            print(f"Value error: {e}")
+            logger.warning(f"Value error in {request_type} response: {e}")
+            if "response" in locals():
+                capture_response(
+                    response.text, request_type, model, failed=True, error=str(e)
+                )
 
-            # Track error
+            # Track error (through the usage buffer, so a later flush of
+            # buffered successes can't overwrite it)
             if db_config:
                 try:
-                    db_config.record_error(f"Value error: {str(e)}")
+                    from manager_panel.usage_buffer import record_usage
+
+                    record_usage(
+                        db_config,
+                        endpoint="generate_ai",
+                        request_type=request_type,
+                        success=False,
+                        error_message=f"Value error: {str(e)}",
+                        response_time_ms=int((time.time() - start_time) * 1000),
+                    )
                 except Exception:
                     pass
 
@@ -360,14 +405,12 @@ def generate_ai(
                 "success": False,
             }
         except (ConnectionError, TimeoutError) as e:
-            print(f"Network error on attempt {attempt + 1}: {e}")
+            logger.warning(f"Network error on attempt {attempt + 1}: {e}")
             last_error = e
             if attempt < max_retries - 1:
                 continue  # Retry
             # Last attempt failed
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Gemini request failed after retries")
             return {
                 "error": "Network connection failed after multiple retries. Please check your internet connection and try again. If you're behind a proxy or firewall, ensure the Gemini AI API (generativelanguage.googleapis.com) is accessible.",
                 "success": False,
@@ -375,7 +418,7 @@ def generate_ai(
             }
         except Exception as e:
             error_message = str(e)
-            print(f"Error on attempt {attempt + 1}: {e}")
+            logger.warning(f"Error on attempt {attempt + 1}: {e}")
 
             # Check if it's a retryable network error
             if any(
@@ -384,13 +427,11 @@ def generate_ai(
             ):
                 last_error = e
                 if attempt < max_retries - 1:
-                    print(f"Network error detected, will retry...")
+                    logger.info("Network error detected, will retry")
                     continue  # Retry
 
             # Non-retryable error or last attempt
-            import traceback
-
-            traceback.print_exc()
+            logger.exception("Gemini request failed")
 
             # Provide more specific error messages for common issues
             if "SSL" in error_message or "ssl" in error_message.lower():
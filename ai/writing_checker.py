@@ -5,10 +5,18 @@ This version strictly follows official IELTS descriptors and prevents
 models from overrating essays (e.g., giving 8.0 for 7.0-level writing).
 """
 
+import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from django.conf import settings
+from pydantic import BaseModel, ConfigDict
+from ai.result_cache import (
+    get_cached_result,
+    make_cache_key,
+    normalize_text,
+    store_result,
+)
 from ai.tools import generate_ai
 import time
 
@@ -132,6 +140,44 @@ Return ONLY the JSON structure defined earlier.
 """
 
 
+# ======================================================
+#               RESPONSE SCHEMA
+# ======================================================
+
+
+class SentenceCorrection(BaseModel):
+    original: str
+    corrected: str
+    explanation: str
+
+
+class WritingCheckResult(BaseModel):
+    """The OUTPUT FORMAT of SYSTEM_PROMPT; Gemini's output is constrained to it."""
+
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    inline: str
+    sentences: List[SentenceCorrection]
+    summary: str
+    band_score: str
+    corrected_essay: str
+    task_response_or_achievement: float
+    coherence_and_cohesion: float
+    lexical_resource: float
+    grammatical_range_and_accuracy: float
+
+
+# Part of the result cache key, so editing either prompt (or the response
+# schema) invalidates cached checks
+PROMPT_VERSION = hashlib.sha256(
+    (
+        SYSTEM_PROMPT
+        + create_user_prompt("{essay}", "{task}", "{question}")
+        + json.dumps(WritingCheckResult.model_json_schema(), sort_keys=True)
+    ).encode()
+).hexdigest()[:12]
+
+
 # ======================================================
 #          MAIN CHECKING FUNCTION (IMPROVED)
 # ======================================================
@@ -151,11 +197,22 @@ def check_writing(
 
     model_to_use = model or getattr(settings, "OPENAI_MODEL", "gemini-2.5-flash")
 
-    full_prompt = (
-        SYSTEM_PROMPT
-        + "\n\n"
-        + create_user_prompt(essay_text, task_type, task_question)
+    # Identical resubmissions and task retries reuse the stored evaluation
+    cache_key = make_cache_key(
+        "writing_check",
+        PROMPT_VERSION,
+        model_to_use,
+        task_type,
+        normalize_text(task_question or ""),
+        normalize_text(essay_text),
     )
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        logger.info("BandBooster AI writing check served from cache")
+        cached["tokens_used"] = 0
+        return cached
+
+    user_prompt = create_user_prompt(essay_text, task_type, task_question)
 
     last_error = None
 
@@ -163,8 +220,13 @@ def check_writing(
         try:
             logger.info(f"BandBooster AI writing check (attempt {attempt + 1})")
 
+            # The examiner prompt is static and cached by the provider
             response = generate_ai(
-                prompt=full_prompt, model=model_to_use, max_retries=max_retries
+                prompt=user_prompt,
+                system_prompt=SYSTEM_PROMPT,
+                model=model_to_use,
+                max_retries=max_retries,
+                response_schema=WritingCheckResult,
             )
 
             # If the AI reported structured failure, retry
@@ -202,6 +264,7 @@ def check_writing(
                 else None
             )
 
+            store_result(cache_key, "writing_check", model_to_use, response)
             return response
 
         except Exception as e:
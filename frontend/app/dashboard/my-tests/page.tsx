@@ -11,6 +11,8 @@ export default function MyTestsPage() {
   const [attempts, setAttempts] = useState<TestAttemptHistory[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     loadAttempts();
@@ -21,7 +23,8 @@ export default function MyTestsPage() {
       setIsLoading(true);
       setError(null);
       const data = await getMyAttempts();
-      setAttempts(data);
+      setAttempts(data.attempts);
+      setNextCursor(data.pagination?.next_cursor ?? null);
     } catch (err: any) {
       if (err instanceof EmailNotVerifiedError) {
         // Redirect to verification flow
@@ -35,6 +38,20 @@ export default function MyTestsPage() {
     }
   };
 
+  const loadMoreAttempts = async () => {
+    if (!nextCursor) return;
+    try {
+      setIsLoadingMore(true);
+      const data = await getMyAttempts(nextCursor);
+      setAttempts((prev) => [...prev, ...data.attempts]);
+      setNextCursor(data.pagination?.next_cursor ?? null);
+    } catch (err: any) {
+      console.error('Error loading more attempts:', err);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const getStatusBadge = (status: ExamStatus) => {
     const badges = {
       NOT_STARTED: { label: 'Not Started', className: 'bg-slate-100 text-slate-600 dark:bg-slate-800 dark:text-slate-400' },
@@ -182,6 +199,14 @@ export default function MyTestsPage() {
               </div>
             </div>
           ))}
+          {nextCursor && (
+            <div className="flex justify-center pt-2">
+              <button onClick={loadMoreAttempts} disabled={isLoadingMore}
+                className="px-6 py-2 bg-white dark:bg-slate-800 border border-slate-200 dark:border-slate-700 text-slate-700 dark:text-slate-300 rounded-lg text-sm font-medium hover:border-blue-400 dark:hover:border-blue-600 transition-colors disabled:opacity-60">
+                {isLoadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -910,14 +910,11 @@ const AIContentGenerator: React.FC = () => {
     setUploadProgress(10);
 
     try {
-      // Simulate progress during upload
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => Math.min(prev + 5, 90));
-      }, 2000);
-
-      const response = await managerAPI.generateFullTestFromPdf(selectedFile);
+      // Progress is reported by the extraction job while it runs
+      const response = await managerAPI.generateFullTestFromPdf(selectedFile, job => {
+        setUploadProgress(prev => Math.max(prev, job.progress || 0));
+      });
 
-      clearInterval(progressInterval);
       setUploadProgress(100);
 
       if (response.success && response.data) {
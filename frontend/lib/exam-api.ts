@@ -14,7 +14,7 @@ import type {
   NextSectionResponse,
   SubmitTestResponse,
   ExamResult,
-  TestAttemptHistory,
+  TestAttemptHistoryPage,
 } from "@/types/exam";
 
 const API_BASE = "/exams/api";
@@ -197,6 +197,28 @@ export async function submitAnswer(
   return response.data || { success: false, message: "No response from server" };
 }
 
+/**
+ * Submit many reading/listening answers in one request
+ * @param attemptId - Attempt ID or UUID
+ * @param answers - Map of question ID to answer
+ */
+export async function submitAnswers(
+  attemptId: number | string,
+  answers: Record<number, string>
+): Promise<{
+  success: boolean;
+  saved?: number;
+  invalid_question_ids?: number[];
+  message?: string;
+}> {
+  const response = await apiClient.post<{
+    success: boolean;
+    saved: number;
+    invalid_question_ids: number[];
+  }>(`${API_BASE}/attempt/${attemptId}/submit-answers/`, { answers });
+  return response.data || { success: false, message: "No response from server" };
+}
+
 /**
  * Submit a writing task answer
  * @param attemptId - Attempt ID or UUID
@@ -293,16 +315,20 @@ export async function getTestResults(attemptId: number | string): Promise<any> {
 }
 
 /**
- * Get all test attempts for the current user
+ * Get a page of test attempts for the current user (newest first)
+ * @param cursor - next_cursor returned by the previous page
  */
-export async function getMyAttempts(): Promise<TestAttemptHistory[]> {
-  const response = await apiClient.get<{ attempts: TestAttemptHistory[] }>(
-    `${API_BASE}/my-attempts/`
+export async function getMyAttempts(
+  cursor?: string | null
+): Promise<TestAttemptHistoryPage> {
+  const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+  const response = await apiClient.get<TestAttemptHistoryPage>(
+    `${API_BASE}/my-attempts/${params}`
   );
   if (!response.data || !response.data.attempts) {
     throw new Error("No attempts data received from server");
   }
-  return response.data.attempts;
+  return response.data;
 }
 
 // ============================================================================
@@ -949,16 +949,70 @@ class ManagerAPIClient {
   // AI Content Generation
   /**
    * Generate IELTS content from PDF using AI
+   * Extraction runs as a background job; this resolves once the job finishes
    * @param file PDF file to extract content from
    * @param contentType Type of content to extract (auto, reading, listening, writing, speaking)
-   * @returns Extracted content data
+   * @param onProgress Optional callback receiving the job while it runs
+   * @returns Finished extraction job (success, content_type, data or error)
    */
-  async generateContentFromPdf(file: File, contentType: string = 'auto'): Promise<any> {
+  async generateContentFromPdf(
+    file: File,
+    contentType: string = 'auto',
+    onProgress?: (job: any) => void
+  ): Promise<any> {
     const formData = new FormData();
     formData.append('pdf_file', file);
     formData.append('content_type', contentType);
-    
-    return this.uploadFile('/tests/ai-generate/', formData,);
+
+    const job = await this.uploadFile<any>('/tests/ai-generate/', formData);
+    return this.waitForExtractionJob(job.job_id, onProgress);
+  }
+
+  /**
+   * Get an AI content extraction job (progress, or the extracted data once completed)
+   * @param jobId Job UUID returned when the extraction was started
+   */
+  async getExtractionJob(jobId: string): Promise<any> {
+    return this.get(`/tests/ai-jobs/${jobId}/`);
+  }
+
+  /**
+   * List recent AI content extraction jobs, so earlier results can be reopened
+   * @param params Optional filters (status, limit)
+   */
+  async getExtractionJobs(params: Record<string, any> = {}): Promise<{ jobs: any[] }> {
+    return this.get<{ jobs: any[] }>('/tests/ai-jobs/', params);
+  }
+
+  /**
+   * Poll an extraction job until it is completed or failed
+   * @param jobId Job UUID
+   * @param onProgress Optional callback receiving the job on every poll
+   * @param interval Polling interval in milliseconds
+   * @param maxWait Milliseconds to wait before giving up. The server reports
+   *   jobs lost past its 30 minute task limit as failed; this is a backstop.
+   * @returns Finished job
+   */
+  async waitForExtractionJob(
+    jobId: string,
+    onProgress?: (job: any) => void,
+    interval = 3000,
+    maxWait = 35 * 60 * 1000
+  ): Promise<any> {
+    const deadline = Date.now() + maxWait;
+    while (true) {
+      const job = await this.getExtractionJob(jobId);
+      onProgress?.(job);
+      if (job.status === 'completed' || job.status === 'failed') {
+        return job;
+      }
+      if (Date.now() >= deadline) {
+        throw new Error(
+          'The extraction is taking too long. Check the job list later or try again.'
+        );
+      }
+      await this.sleep(interval);
+    }
   }
 
   /**
@@ -1040,15 +1094,17 @@ class ManagerAPIClient {
   /**
    * Generate COMPLETE IELTS test(s) from a Cambridge IELTS book PDF or similar
    * Extracts all sections: Listening, Reading, Writing, Speaking in one request
+   * Extraction runs as a background job; this resolves once the job finishes
    * @param file PDF file (Cambridge IELTS book or similar)
-   * @returns Complete test data with all sections for multiple tests
+   * @param onProgress Optional callback receiving the job while it runs
+   * @returns Finished extraction job with complete test data for multiple tests
    */
-  async generateFullTestFromPdf(file: File): Promise<any> {
+  async generateFullTestFromPdf(file: File, onProgress?: (job: any) => void): Promise<any> {
     const formData = new FormData();
     formData.append('pdf_file', file);
-    
-    // Use longer timeout for full book processing (20 minutes)
-    return this.uploadFile('/tests/ai-generate-full/', formData, 1200000);
+
+    const job = await this.uploadFile<any>('/tests/ai-generate-full/', formData);
+    return this.waitForExtractionJob(job.job_id, onProgress);
   }
 
   /**
@@ -251,6 +251,15 @@ export interface TestAttemptHistory {
   overall_score: number | null;
 }
 
+export interface TestAttemptHistoryPage {
+  attempts: TestAttemptHistory[];
+  pagination: {
+    page_size: number;
+    has_next: boolean;
+    next_cursor: string | null;
+  };
+}
+
 // ============================================================================
 // ANSWER SUBMISSION TYPES
 // ============================================================================
@@ -0,0 +1,299 @@
+"""
+Write-behind buffer for Reading/Listening answers.
+
+With ``ANSWER_WRITE_BEHIND`` enabled, autosaved answers are written to a
+Redis hash per attempt instead of the database:
+
+    answer_buffer:exam:<attempt_id>     {question_id: answer_text}
+    answer_buffer:teacher:<attempt_id>  (TeacherExamAttempt answers)
+    answer_buffer:dirty                 set of attempt refs with pending answers
+    answer_buffer:lock:<ref>            held while an attempt's buffer is flushed
+
+``flush_answer_buffers_task`` (Celery beat, every ``ANSWER_FLUSH_INTERVAL``
+seconds) persists dirty buffers with one bulk upsert per attempt.
+``submit_test``, ``next_section`` and section data reads flush the attempt
+synchronously, so the database is current whenever answers are read.
+
+Taking a buffer and saving it happen under the attempt's lock, so a
+synchronous flush waits for a periodic flush in progress instead of finding
+the buffer empty while those answers are still being saved, and saves of an
+attempt's answers never overtake each other.
+"""
+
+import logging
+import time
+import uuid
+
+from django.conf import settings
+
+from .answer_key import get_answer_key, get_answer_key_entry, stored_correctness
+from .etags import bump_attempt_version
+from .models import ExamAttempt, UserAnswer
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "answer_buffer"
+DIRTY_SET_KEY = f"{KEY_PREFIX}:dirty"
+BUFFER_TTL = 60 * 60 * 24 * 2  # Safety net; buffers are flushed within seconds
+FLUSH_BATCH_SIZE = 500
+LOCK_TIMEOUT_MS = 30_000  # Expires the lock of a flusher that died
+LOCK_WAIT = 10  # Seconds a synchronous flush waits for the lock
+
+# Delete the lock only if it's still ours (it may have expired and been retaken)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class AnswerFlushError(Exception):
+    """An attempt's buffered answers could not be persisted."""
+
+
+def is_write_behind_enabled():
+    return getattr(settings, "ANSWER_WRITE_BEHIND", False)
+
+
+def _get_connection():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def _attempt_ref(attempt):
+    from teacher.models import TeacherExamAttempt
+
+    kind = "teacher" if isinstance(attempt, TeacherExamAttempt) else "exam"
+    return f"{kind}:{attempt.id}"
+
+
+def _buffer_key(ref):
+    return f"{KEY_PREFIX}:{ref}"
+
+
+def _lock_key(ref):
+    return f"{KEY_PREFIX}:lock:{ref}"
+
+
+def _acquire_lock(conn, ref, wait=0):
+    """Take the attempt's flush lock; returns its token, or None on timeout."""
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while True:
+        if conn.set(_lock_key(ref), token, nx=True, px=LOCK_TIMEOUT_MS):
+            return token
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)
+
+
+def _release_lock(conn, ref, token):
+    conn.eval(_RELEASE_LOCK_SCRIPT, 1, _lock_key(ref), token)
+
+
+def _load_attempt(ref):
+    """Load the attempt referenced by a buffer ref (None if it was deleted)."""
+    from teacher.models import TeacherExamAttempt
+
+    kind, attempt_id = ref.split(":", 1)
+    if kind == "teacher":
+        attempt = (
+            TeacherExamAttempt.objects.select_related("exam__mock_exam")
+            .filter(id=attempt_id)
+            .first()
+        )
+        if attempt:
+            # Add mock_test reference for compatibility (TeacherExam has mock_exam)
+            attempt.exam.mock_test = attempt.exam.mock_exam
+        return attempt
+    return (
+        ExamAttempt.objects.select_related("exam__mock_test")
+        .filter(id=attempt_id)
+        .first()
+    )
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+
+def save_answers(attempt, answers):
+    """
+    Persist {question_id: answer_text} for an attempt with one bulk upsert.
+
+    Answers to questions that don't exist are skipped.
+
+    Returns:
+        Number of answers saved
+    """
+    from teacher.models import TeacherExamAttempt, TeacherUserAnswer
+
+    answer_model = (
+        TeacherUserAnswer if isinstance(attempt, TeacherExamAttempt) else UserAnswer
+    )
+    mock_exam = attempt.exam.mock_test
+    answer_key = get_answer_key(mock_exam)
+
+    user_answers = []
+    for question_id, answer in answers.items():
+        entry = answer_key.get(question_id) or get_answer_key_entry(
+            mock_exam, question_id
+        )
+        if entry is None:
+            continue
+        user_answers.append(
+            answer_model(
+                exam_attempt=attempt,
+                question_id=question_id,
+                answer_text=answer,
+                # bulk_create skips save(), so set the flag check_correctness() would
+                is_correct=stored_correctness(entry, answer),
+            )
+        )
+
+    if user_answers:
+        answer_model.objects.bulk_create(
+            user_answers,
+            update_conflicts=True,
+            unique_fields=["exam_attempt", "question"],
+            update_fields=["answer_text", "is_correct", "updated_at"],
+        )
+        # bulk_create sends no post_save signals
+        bump_attempt_version(type(attempt), attempt.pk)
+    return len(user_answers)
+
+
+# ============================================================================
+# BUFFERING
+# ============================================================================
+
+
+def buffer_answers(attempt, answers):
+    """
+    Store answers for an attempt, buffered in Redis when write-behind is on.
+
+    Falls back to saving synchronously when write-behind is disabled or Redis
+    is unavailable, so answers are never dropped.
+    """
+    if not is_write_behind_enabled():
+        return save_answers(attempt, answers)
+
+    ref = _attempt_ref(attempt)
+    try:
+        pipe = _get_connection().pipeline()
+        pipe.hset(
+            _buffer_key(ref),
+            mapping={
+                str(question_id): answer for question_id, answer in answers.items()
+            },
+        )
+        pipe.expire(_buffer_key(ref), BUFFER_TTL)
+        pipe.sadd(DIRTY_SET_KEY, ref)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Answer buffer unavailable, saving {ref} directly: {e}")
+        return save_answers(attempt, answers)
+    return len(answers)
+
+
+def _take_buffer(conn, ref):
+    """Atomically read and clear an attempt's buffer."""
+    pipe = conn.pipeline()
+    pipe.hgetall(_buffer_key(ref))
+    pipe.delete(_buffer_key(ref))
+    data, _ = pipe.execute()
+    return {int(question_id): answer.decode() for question_id, answer in data.items()}
+
+
+def _restore_buffer(conn, ref, answers):
+    """Put answers back after a failed flush; answers buffered since then win."""
+    pipe = conn.pipeline()
+    for question_id, answer in answers.items():
+        pipe.hsetnx(_buffer_key(ref), str(question_id), answer)
+    pipe.expire(_buffer_key(ref), BUFFER_TTL)
+    pipe.sadd(DIRTY_SET_KEY, ref)
+    pipe.execute()
+
+
+def _flush_ref(conn, ref, attempt=None):
+    """Persist an attempt's buffer. The caller holds the attempt's lock."""
+    answers = _take_buffer(conn, ref)
+    if not answers:
+        return 0
+
+    try:
+        attempt = attempt or _load_attempt(ref)
+        if attempt is None:
+            logger.info(f"Dropping buffered answers of deleted attempt {ref}")
+            return 0
+        return save_answers(attempt, answers)
+    except Exception:
+        _restore_buffer(conn, ref, answers)
+        raise
+
+
+def flush_attempt_answers(attempt):
+    """
+    Synchronously persist an attempt's buffered answers.
+
+    Waits up to LOCK_WAIT seconds for a flush of the attempt in progress.
+
+    Returns:
+        Number of answers saved
+
+    Raises:
+        AnswerFlushError: If the answers could not be persisted; they stay
+            buffered (or are put back) for the periodic flush to retry
+    """
+    if not is_write_behind_enabled():
+        return 0
+
+    ref = _attempt_ref(attempt)
+    try:
+        conn = _get_connection()
+        token = _acquire_lock(conn, ref, wait=LOCK_WAIT)
+        if token is None:
+            raise AnswerFlushError(f"Timed out waiting for the flush lock of {ref}")
+        try:
+            conn.srem(DIRTY_SET_KEY, ref)
+            return _flush_ref(conn, ref, attempt)
+        finally:
+            _release_lock(conn, ref, token)
+    except Exception as e:
+        logger.error(f"Failed to flush answer buffer {ref}: {e}", exc_info=True)
+        if isinstance(e, AnswerFlushError):
+            raise
+        raise AnswerFlushError(str(e)) from e
+
+
+def flush_dirty_attempts(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Persist the buffers of up to batch_size dirty attempts.
+
+    Returns:
+        (attempts flushed, answers saved) tuple
+    """
+    conn = _get_connection()
+    refs = conn.spop(DIRTY_SET_KEY, batch_size) or []
+
+    flushed = 0
+    saved = 0
+    for ref in refs:
+        ref = ref.decode() if isinstance(ref, bytes) else ref
+        try:
+            token = _acquire_lock(conn, ref)
+            if token is None:
+                # Being flushed synchronously; check again next run
+                conn.sadd(DIRTY_SET_KEY, ref)
+                continue
+            try:
+                saved += _flush_ref(conn, ref)
+                flushed += 1
+            finally:
+                _release_lock(conn, ref, token)
+        except Exception as e:
+            logger.error(f"Failed to flush answer buffer {ref}: {e}", exc_info=True)
+    return flushed, saved
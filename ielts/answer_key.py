@@ -0,0 +1,245 @@
+"""
+Compiled answer keys for Reading/Listening grading.
+
+Grading used to call ``Question.get_correct_answer()`` for every question,
+which costs two queries per MCQ/MCMA question. Instead, the answer key for a
+whole MockExam is compiled once, stored in the cache and shared by every
+grader (answer submission, results, scoring).
+
+Each entry maps ``question_id`` to:
+    {
+        "question_type": "MCMA",          # TestHead.QuestionType value
+        "correct_answer": "AC",           # same value get_correct_answer() returns
+        "accepted": ["ac"],               # lower-cased accepted answers ("|" variants)
+        "mcma_keys": ["A", "C"],          # correct choice letters (MCMA only)
+        "weight": 2,                      # contribution to the 40-question total
+    }
+
+Keys are versioned with a global content version which is bumped whenever
+a Question, Choice, TestHead, ListeningPart, ReadingPassage or a MockExam's
+Reading/Listening content changes (see ``ielts/signals.py``). Cached section
+payloads (``ielts/section_payload.py``) share the same version.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import Prefetch, Q
+
+from .models import Choice, Question, TestHead
+
+logger = logging.getLogger(__name__)
+
+CONTENT_VERSION_KEY = "ielts_content_version"
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24  # 24 hours; invalidation is version based
+
+CHOICE_QUESTION_TYPES = (
+    TestHead.QuestionType.MULTIPLE_CHOICE,
+    TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS,
+)
+
+
+# ============================================================================
+# CONTENT VERSION
+# ============================================================================
+
+
+def get_content_version():
+    """Return the current exam content version (starts at 1)."""
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        cache.add(CONTENT_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CONTENT_VERSION_KEY) or 1
+    return version
+
+
+def bump_content_version():
+    """Invalidate compiled answer keys and section payloads."""
+    try:
+        return cache.incr(CONTENT_VERSION_KEY)
+    except ValueError:
+        # Key does not exist yet (or was evicted)
+        cache.set(CONTENT_VERSION_KEY, 2, timeout=None)
+        return 2
+
+
+# ============================================================================
+# COMPILATION
+# ============================================================================
+
+
+def _choice_keys(choices):
+    """Return sorted letter keys (A, B, C...) of the correct choices."""
+    ordered = sorted(choices, key=lambda choice: choice.id)
+    return sorted(
+        chr(65 + index) for index, choice in enumerate(ordered) if choice.is_correct
+    )
+
+
+def build_entry(question, choices=None):
+    """
+    Build an answer key entry for a single question.
+
+    Args:
+        question: Question instance (test_head should be select_related)
+        choices: Optional iterable of the question's choices. When omitted,
+            prefetched choices are used if available, otherwise they are queried.
+    """
+    test_head = question.test_head
+    question_type = test_head.question_type if test_head else None
+
+    mcma_keys = []
+    if question_type in CHOICE_QUESTION_TYPES:
+        if choices is None:
+            choices = question.choices.all()
+        keys = _choice_keys(choices)
+        correct_answer = "".join(keys)
+        if question_type == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS:
+            mcma_keys = keys
+    else:
+        correct_answer = question.correct_answer_text or ""
+
+    if question_type == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS:
+        weight = max(1, len(set(correct_answer)))
+    else:
+        weight = 1
+
+    return {
+        "question_type": question_type,
+        "correct_answer": correct_answer,
+        "accepted": correct_answer.lower().split("|") if correct_answer else [],
+        "mcma_keys": mcma_keys,
+        "weight": weight,
+    }
+
+
+def build_answer_key(mock_exam):
+    """
+    Compile the answer key for all Reading/Listening questions of a MockExam.
+
+    Uses two queries regardless of the number of questions.
+    """
+    questions = (
+        Question.objects.filter(
+            Q(test_head__listening__mock_tests=mock_exam)
+            | Q(test_head__reading__mock_tests=mock_exam)
+        )
+        .select_related("test_head")
+        .prefetch_related(
+            Prefetch(
+                "choices",
+                queryset=Choice.objects.only("id", "is_correct", "question_id"),
+            )
+        )
+        .distinct()
+    )
+    return {
+        question.id: build_entry(question, question.choices.all())
+        for question in questions
+    }
+
+
+def _cache_key(mock_exam_id, version):
+    return f"answer_key_{mock_exam_id}_v{version}"
+
+
+def get_answer_key(mock_exam):
+    """
+    Return the compiled answer key for a MockExam, building it on cache miss.
+
+    Returns:
+        Dict mapping question_id to answer key entry
+    """
+    if mock_exam is None:
+        return {}
+
+    cache_key = _cache_key(mock_exam.id, get_content_version())
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = build_answer_key(mock_exam)
+        cache.set(cache_key, answer_key, timeout=ANSWER_KEY_TIMEOUT)
+        logger.debug(
+            f"Compiled answer key for MockExam {mock_exam.id} "
+            f"({len(answer_key)} questions)"
+        )
+    return answer_key
+
+
+def get_answer_key_entry(mock_exam, question):
+    """
+    Return the answer key entry for a question within a MockExam.
+
+    Falls back to compiling the entry from the question itself when the
+    question does not belong to the exam (e.g. stale client data).
+    """
+    question_id = question if isinstance(question, int) else question.id
+    entry = get_answer_key(mock_exam).get(question_id)
+    if entry is None:
+        if isinstance(question, int):
+            question = (
+                Question.objects.select_related("test_head")
+                .filter(id=question_id)
+                .first()
+            )
+            if question is None:
+                return None
+        entry = build_entry(question)
+    return entry
+
+
+# ============================================================================
+# GRADING
+# ============================================================================
+
+
+def grade_entry(entry, user_answer_text):
+    """
+    Grade a user answer against an answer key entry.
+
+    Returns:
+        (score, max_score) tuple. MCMA questions get partial credit (one point
+        per correct selection, no penalty for wrong ones); every other type is
+        all or nothing with a max_score of 1.
+    """
+    user_answer = (user_answer_text or "").strip()
+    correct_answer = entry["correct_answer"]
+    question_type = entry["question_type"]
+
+    if question_type == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS:
+        if not correct_answer:
+            return (0, 1)
+        correct_set = set(entry["mcma_keys"])
+        return (len(set(user_answer.upper()) & correct_set), len(correct_set))
+
+    if not correct_answer:
+        return (0, 1)
+
+    if question_type == TestHead.QuestionType.MULTIPLE_CHOICE:
+        is_correct = sorted(user_answer.upper()) == sorted(correct_answer.upper())
+    else:
+        is_correct = user_answer.lower() in entry["accepted"]
+
+    return (1 if is_correct else 0, 1)
+
+
+def stored_correctness(entry, user_answer_text, default=False):
+    """
+    Return the ``is_correct`` flag stored on UserAnswer/TeacherUserAnswer rows.
+
+    Uses the same rules as ``UserAnswer.check_correctness()`` so answers saved
+    in bulk (which skips ``save()``) get the same flag as answers saved one
+    by one. ``default`` is returned when the question has no correct answer.
+    """
+    correct_answer = entry["correct_answer"] if entry else None
+    if not correct_answer:
+        return default
+
+    # Normalize both answers for comparison (lowercase, strip whitespace)
+    user_ans = user_answer_text.strip().lower() if user_answer_text else ""
+    correct_ans = correct_answer.strip().lower()
+
+    # For short answer questions (allow slight variations)
+    if entry["question_type"] == TestHead.QuestionType.SHORT_ANSWER:
+        return correct_ans in user_ans or user_ans in correct_ans
+    # For TFNG, YNNG, MCQ and other types
+    return user_ans == correct_ans
@@ -3,22 +3,24 @@ API Views for IELTS Mock Test System.
 RESTful API endpoints for Vue.js SPA.
 """
 
+import base64
+import binascii
 import logging
+from datetime import datetime
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from django.core.files.storage import default_storage
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db.models import Prefetch, Q, Count
-from collections import defaultdict
+from django.db.models import Q, Count
 
 logger = logging.getLogger(__name__)
 
 from .models import (
     ExamAttempt,
     MockExam,
-    Question,
     SpeakingQuestion,
     SpeakingAnswer,
     SpeakingDefaultAudio,
@@ -34,11 +36,10 @@ from .models import (
 from .serializers import (
     ExamAttemptSerializer,
     MockExamSerializer,
-    ListeningPartSerializer,
-    ReadingPassageSerializer,
     WritingTaskSerializer,
     SpeakingTopicSerializer,
     AnswerSubmissionSerializer,
+    BatchAnswerSubmissionSerializer,
     WritingSubmissionSerializer,
     SpeakingSubmissionSerializer,
 )
@@ -46,8 +47,19 @@ from .analysis import (
     analyze_reading_performance,
     analyze_listening_performance,
     identify_strengths_and_weaknesses,
-    calculate_band_score,
 )
+from .answer_buffer import (
+    AnswerFlushError,
+    buffer_answers,
+    flush_attempt_answers,
+    is_write_behind_enabled,
+)
+from .answer_key import build_entry, get_answer_key, get_answer_key_entry
+from .etags import attempt_etag, not_modified, set_etag
+from .grading import grade_section, load_user_answers
+from .question_type_stats import record_attempt_stats
+from .score_snapshot import update_score_snapshot
+from .section_payload import apply_user_answers, get_section_payload
 
 
 # ============================================================================
@@ -132,23 +144,27 @@ def get_user_attempt(attempt_id, user):
         )
 
 
-def _check_answer_correctness(user_answer_text, question):
+def _check_answer_correctness(user_answer_text, question, entry=None):
     """
     Check if a user's answer is correct for a given question.
     For MCMA, returns a tuple of (partial_score, max_possible_score).
     For other types, returns True/False (which is equivalent to (1, 1) or (0, 1)).
+
+    Pass the question's compiled answer key `entry` to grade without queries.
     """
-    if not question:
-        return False
+    if entry is None:
+        if not question:
+            return False
+        entry = build_entry(question)
 
     user_answer = user_answer_text.strip()
-    correct_answer = question.get_correct_answer() or ""
+    correct_answer = entry["correct_answer"]
 
     if not correct_answer:
         return False
 
     # Check if answer is correct based on question type
-    if question.test_head.question_type in [
+    if entry["question_type"] in [
         TestHead.QuestionType.MULTIPLE_CHOICE,
         TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS,
     ]:
@@ -158,7 +174,7 @@ def _check_answer_correctness(user_answer_text, question):
 
         # For MCMA, we need partial credit scoring
         if (
-            question.test_head.question_type
+            entry["question_type"]
             == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS
         ):
             return _calculate_mcma_score(user_sorted, correct_sorted)
@@ -167,7 +183,7 @@ def _check_answer_correctness(user_answer_text, question):
         return user_sorted == correct_sorted
     else:
         # Case-insensitive comparison for text answers
-        return _build_regular_answer_response(user_answer, correct_answer)
+        return user_answer.lower() in entry["accepted"]
 
 
 def _calculate_mcma_score(user_answer, correct_answer):
@@ -205,32 +221,6 @@ def calculate_time_remaining(attempt, section_duration_minutes):
     return int(section_duration_minutes * 60)
 
 
-def _calculate_weighted_score(user_answers_queryset):
-    """
-    Calculate weighted score considering MCMA questions.
-    For MCMA questions, each correct answer counts as 1 toward the total.
-
-    Returns: (total_score, max_possible_score)
-    """
-    total_score = 0
-    max_possible_score = 0
-
-    for ua in user_answers_queryset:
-        result = _check_answer_correctness(ua.answer_text, ua.question)
-
-        if isinstance(result, tuple):
-            # MCMA question - partial scoring
-            score, max_score = result
-            total_score += score
-            max_possible_score += max_score
-        else:
-            # Regular question - binary scoring
-            total_score += 1 if result else 0
-            max_possible_score += 1
-
-    return (total_score, max_possible_score)
-
-
 # ============================================================================
 # TEST ATTEMPT ENDPOINTS
 # ============================================================================
@@ -304,10 +294,89 @@ def check_active_attempt(request):
     return Response({"has_active_attempt": False})
 
 
+# Response field -> columns it is read from (for .values() projection)
+ATTEMPT_LIST_FIELDS = {
+    "id": ("id",),
+    "uuid": ("uuid",),
+    "exam_id": ("exam_id",),
+    "exam_title": ("exam__mock_test__title",),
+    "exam_type": ("exam__mock_test__exam_type",),
+    "status": ("status",),
+    "current_section": ("current_section",),
+    "started_at": ("started_at",),
+    "completed_at": ("completed_at",),
+    "created_at": ("created_at",),
+    "duration_minutes": ("status", "started_at", "completed_at"),
+    "listening_score": ("status", "listening_score"),
+    "reading_score": ("status", "reading_score"),
+    "writing_score": ("status", "writing_score"),
+    "speaking_score": ("status", "speaking_score"),
+    "overall_score": ("status", "overall_score"),
+}
+ATTEMPT_LIST_SCORE_FIELDS = (
+    "listening_score",
+    "reading_score",
+    "writing_score",
+    "speaking_score",
+    "overall_score",
+)
+ATTEMPTS_PAGE_SIZE = 20
+ATTEMPTS_MAX_PAGE_SIZE = 100
+
+
+def _encode_attempt_cursor(row):
+    """Encode the (created_at, id) keyset position of a row as an opaque cursor."""
+    raw = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_attempt_cursor(cursor):
+    """Decode a cursor into (created_at, id). Raises ValueError when invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, attempt_id = raw.rsplit("|", 1)
+        created_at = datetime.fromisoformat(created_at)
+        return created_at, int(attempt_id)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+
+def _serialize_attempt_row(row, fields):
+    """Build an attempts list item from a .values() row."""
+    completed = row.get("status") == "COMPLETED"
+    data = {}
+    for field in fields:
+        if field == "uuid":
+            data[field] = str(row["uuid"])
+        elif field == "exam_title":
+            data[field] = row["exam__mock_test__title"]
+        elif field == "exam_type":
+            data[field] = row["exam__mock_test__exam_type"]
+        elif field == "duration_minutes":
+            data[field] = None
+            if completed and row["started_at"] and row["completed_at"]:
+                delta = row["completed_at"] - row["started_at"]
+                data[field] = round(delta.total_seconds() / 60, 2)
+        elif field in ATTEMPT_LIST_SCORE_FIELDS:
+            # Band columns mirror the frozen score snapshot
+            score = row[field] if completed else None
+            data[field] = round(float(score), 1) if score is not None else None
+        else:
+            data[field] = row[field]
+    return data
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_my_attempts(request):
-    """Get all test attempts for the current user."""
+    """
+    Get test attempts for the current user, newest first.
+
+    Query params:
+        - page_size: items per page (default: 20, max: 100)
+        - cursor: next_cursor of the previous page
+        - fields: comma separated list of fields to return (default: all)
+    """
     # Require email verification to access attempts
     if not request.user.is_verified:
         return Response(
@@ -318,92 +387,59 @@ def get_my_attempts(request):
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    attempts = (
-        ExamAttempt.objects.filter(student=request.user)
-        .select_related("exam", "exam__mock_test")
-        .order_by("-created_at")
-    )
-
-    attempts_data = []
-    for attempt in attempts:
-        # Calculate scores if completed
-        listening_score = None
-        reading_score = None
-        writing_score = None
-        speaking_score = None
-        overall_score = None
-
-        if attempt.status == "COMPLETED":
-            # Get section results
-            try:
-                listening_data = _get_listening_results(attempt)
-                listening_score = listening_data.get("band_score")
-                if listening_score is not None:
-                    listening_score = round(float(listening_score), 1)
-            except:
-                pass
+    fields = list(ATTEMPT_LIST_FIELDS)
+    if request.GET.get("fields"):
+        fields = [f.strip() for f in request.GET["fields"].split(",") if f.strip()]
+        invalid = [f for f in fields if f not in ATTEMPT_LIST_FIELDS]
+        if invalid:
+            return Response(
+                {"error": f"Unknown fields: {', '.join(invalid)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-            try:
-                reading_data = _get_reading_results(attempt)
-                reading_score = reading_data.get("band_score")
-                if reading_score is not None:
-                    reading_score = round(float(reading_score), 1)
-            except:
-                pass
+    try:
+        page_size = int(request.GET.get("page_size", ATTEMPTS_PAGE_SIZE))
+    except ValueError:
+        page_size = ATTEMPTS_PAGE_SIZE
+    page_size = max(1, min(page_size, ATTEMPTS_MAX_PAGE_SIZE))
 
-            try:
-                writing_data = _get_writing_results(attempt)
-                writing_score = writing_data.get("overall_band_score")
-                if writing_score is not None:
-                    writing_score = round(float(writing_score), 1)
-            except:
-                pass
+    attempts = ExamAttempt.objects.filter(student=request.user).order_by(
+        "-created_at", "-id"
+    )
 
-            try:
-                speaking_data = _get_speaking_results(attempt)
-                speaking_score = speaking_data.get("overall_band_score")
-                if speaking_score is not None:
-                    speaking_score = round(float(speaking_score), 1)
-            except:
-                pass
-
-            # Calculate overall score (IELTS rounds to nearest 0.5)
-            scores = [
-                s
-                for s in [listening_score, reading_score, writing_score, speaking_score]
-                if s is not None
-            ]
-            if scores:
-                average = sum(scores) / len(scores)
-                # Round to nearest 0.5 (IELTS standard)
-                overall_score = round(average * 2) / 2
-
-        attempts_data.append(
-            {
-                "id": attempt.id,
-                "uuid": str(attempt.uuid),
-                "exam_id": attempt.exam.id,
-                "exam_title": attempt.exam.mock_test.title,
-                "exam_type": attempt.exam.mock_test.exam_type,
-                "status": attempt.status,
-                "current_section": attempt.current_section,
-                "started_at": attempt.started_at,
-                "completed_at": attempt.completed_at,
-                "created_at": attempt.created_at,
-                "duration_minutes": (
-                    attempt.get_duration_minutes()
-                    if attempt.status == "COMPLETED"
-                    else None
-                ),
-                "listening_score": listening_score,
-                "reading_score": reading_score,
-                "writing_score": writing_score,
-                "speaking_score": speaking_score,
-                "overall_score": overall_score,
-            }
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            created_at, attempt_id = _decode_attempt_cursor(cursor)
+        except ValueError:
+            return Response(
+                {"error": "Invalid cursor."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        attempts = attempts.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=attempt_id)
         )
 
-    return Response({"attempts": attempts_data})
+    # Select only the columns the requested fields need (id/created_at for the
+    # cursor), skipping model instantiation
+    columns = {"id", "created_at"}
+    for field in fields:
+        columns.update(ATTEMPT_LIST_FIELDS[field])
+    rows = list(attempts.values(*columns)[: page_size + 1])
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    return Response(
+        {
+            "attempts": [_serialize_attempt_row(row, fields) for row in rows],
+            "pagination": {
+                "page_size": page_size,
+                "has_next": has_next,
+                "next_cursor": _encode_attempt_cursor(rows[-1]) if has_next else None,
+            },
+        }
+    )
 
 
 @api_view(["POST"])
@@ -565,12 +601,26 @@ def get_section_data(request, attempt_id, section):
     if error_response:
         return error_response
 
+    if section in ("listening", "reading"):
+        # Persist buffered answers so the section shows the latest ones
+        try:
+            flush_attempt_answers(attempt)
+        except AnswerFlushError:
+            pass  # Logged; the section shows the answers saved so far
+
+        etag = attempt_etag(request, attempt, "section", section)
+        cached_response = not_modified(request, etag)
+        if cached_response is not None:
+            return cached_response
+
+        if section == "listening":
+            response = build_listening_data(attempt, request)
+        else:
+            response = build_reading_data(attempt, request)
+        return set_etag(response, etag)
+
     # Route to appropriate section builder
-    if section == "listening":
-        return build_listening_data(attempt, request)
-    elif section == "reading":
-        return build_reading_data(attempt, request)
-    elif section == "writing":
+    if section == "writing":
         return build_writing_data(attempt, request)
     elif section == "speaking":
         return build_speaking_data(attempt, request)
@@ -584,32 +634,15 @@ def build_listening_data(attempt, request):
     """Build listening section data with parts and questions."""
     exam = attempt.exam
 
-    # Get listening parts for this exam
-    parts = (
-        exam.mock_test.listening_parts.all()
-        .prefetch_related(
-            Prefetch(
-                "test_heads",
-                queryset=TestHead.objects.prefetch_related(
-                    Prefetch(
-                        "questions",
-                        queryset=Question.objects.prefetch_related("choices").order_by(
-                            "order"
-                        ),
-                    )
-                ).order_by("id"),
-            )
-        )
-        .order_by("part_number")
+    # Content is cached per MockExam; only the saved answers are per attempt
+    parts = apply_user_answers(
+        get_section_payload(exam.mock_test, "listening", request),
+        load_user_answers(attempt),
     )
 
     # Calculate time remaining
     time_remaining = calculate_time_remaining(attempt, 30)  # 30 minutes for listening
 
-    serializer = ListeningPartSerializer(
-        parts, many=True, context={"request": request, "attempt": attempt}
-    )
-
     # Determine next section based on exam type
     exam_type = exam.mock_test.exam_type
     section_flows = {
@@ -625,7 +658,7 @@ def build_listening_data(attempt, request):
 
     response_data = {
         "section_name": "listening",
-        "parts": serializer.data,
+        "parts": parts,
         "time_remaining": time_remaining,
         "next_section_name": next_section,
     }
@@ -637,32 +670,15 @@ def build_reading_data(attempt, request):
     """Build reading section data with passages and questions."""
     exam = attempt.exam
 
-    # Get reading passages for this exam
-    passages = (
-        exam.mock_test.reading_passages.all()
-        .prefetch_related(
-            Prefetch(
-                "test_heads",
-                queryset=TestHead.objects.prefetch_related(
-                    Prefetch(
-                        "questions",
-                        queryset=Question.objects.prefetch_related("choices").order_by(
-                            "order"
-                        ),
-                    )
-                ).order_by("id"),
-            )
-        )
-        .order_by("passage_number")
+    # Content is cached per MockExam; only the saved answers are per attempt
+    passages = apply_user_answers(
+        get_section_payload(exam.mock_test, "reading", request),
+        load_user_answers(attempt),
     )
 
     # Calculate time remaining
     time_remaining = calculate_time_remaining(attempt, 60)  # 60 minutes for reading
 
-    serializer = ReadingPassageSerializer(
-        passages, many=True, context={"request": request, "attempt": attempt}
-    )
-
     # Determine next section based on exam type
     exam_type = exam.mock_test.exam_type
     section_flows = {
@@ -678,7 +694,7 @@ def build_reading_data(attempt, request):
 
     response_data = {
         "section_name": "reading",
-        "passages": serializer.data,
+        "passages": passages,
         "time_remaining": time_remaining,
         "next_section_name": next_section,
     }
@@ -817,10 +833,15 @@ def submit_answer(request, attempt_id):
     question_id = serializer.validated_data["question_id"]
     answer = serializer.validated_data["answer"]
 
-    question = get_object_or_404(Question, id=question_id)
+    # Grade against the exam's compiled answer key (no per-question queries)
+    entry = get_answer_key_entry(attempt.exam.mock_test, question_id)
+    if entry is None:
+        return Response(
+            {"error": "Question not found."}, status=status.HTTP_404_NOT_FOUND
+        )
 
     # Check if answer is correct
-    correctness_result = _check_answer_correctness(answer, question)
+    correctness_result = _check_answer_correctness(answer, None, entry)
 
     # Handle MCMA partial scoring
     if isinstance(correctness_result, tuple):
@@ -834,11 +855,14 @@ def submit_answer(request, attempt_id):
     # Save or update user answer
     from teacher.models import TeacherExamAttempt, TeacherUserAnswer
 
-    if isinstance(attempt, TeacherExamAttempt):
+    if is_write_behind_enabled():
+        # Buffered in Redis, persisted by flush_answer_buffers_task
+        buffer_answers(attempt, {question_id: answer})
+    elif isinstance(attempt, TeacherExamAttempt):
         # Save to TeacherUserAnswer for teacher exam attempts
         user_answer, created = TeacherUserAnswer.objects.update_or_create(
             exam_attempt=attempt,
-            question=question,
+            question_id=question_id,
             defaults={
                 "answer_text": answer,
                 "is_correct": is_correct,
@@ -848,7 +872,7 @@ def submit_answer(request, attempt_id):
         # Save to UserAnswer for regular exam attempts
         user_answer, created = UserAnswer.objects.update_or_create(
             exam_attempt=attempt,
-            question=question,
+            question_id=question_id,
             defaults={
                 "answer_text": answer,
                 "is_correct": is_correct,
@@ -867,6 +891,67 @@ def submit_answer(request, attempt_id):
     )
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def submit_answers(request, attempt_id):
+    """
+    Submit many reading/listening answers at once.
+
+    Body: {"answers": {"<question_id>": "<answer>", ...}}
+
+    Answers are graded against the exam's compiled answer key and saved with a
+    single bulk upsert (or buffered, see ielts/answer_buffer.py). Questions that
+    don't belong to the exam are skipped and reported in invalid_question_ids.
+    """
+    attempt, error_response = get_user_attempt(attempt_id, request.user)
+    if error_response:
+        return error_response
+
+    serializer = BatchAnswerSubmissionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    answers = serializer.validated_data["answers"]
+    answer_key = get_answer_key(attempt.exam.mock_test)
+
+    results = []
+    invalid_question_ids = []
+    valid_answers = {}
+    for question_id, answer in answers.items():
+        entry = answer_key.get(question_id)
+        if entry is None:
+            invalid_question_ids.append(question_id)
+            continue
+
+        correctness_result = _check_answer_correctness(answer, None, entry)
+        if isinstance(correctness_result, tuple):
+            score, max_score = correctness_result
+        else:
+            score, max_score = (1 if correctness_result else 0), 1
+
+        valid_answers[question_id] = answer
+        results.append(
+            {
+                "question_id": question_id,
+                "is_correct": score == max_score,
+                "score": score,
+                "max_score": max_score,
+            }
+        )
+
+    if valid_answers:
+        buffer_answers(attempt, valid_answers)
+
+    return Response(
+        {
+            "success": True,
+            "saved": len(valid_answers),
+            "results": results,
+            "invalid_question_ids": invalid_question_ids,
+        }
+    )
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def submit_writing(request, attempt_id):
@@ -930,7 +1015,7 @@ def submit_writing(request, attempt_id):
 @permission_classes([IsAuthenticated])
 def submit_speaking(request, attempt_id):
     """Submit a speaking response (audio file) for a specific question."""
-    from .models import SpeakingAnswer, SpeakingQuestion
+    from .tasks import normalize_speaking_answer_task
 
     attempt, error_response = get_user_attempt(attempt_id, request.user)
     if error_response:
@@ -995,12 +1080,22 @@ def submit_speaking(request, attempt_id):
         f"DEBUG: Speaking attempt {'created' if created else 'retrieved'}: {speaking_attempt.id}"
     )
 
+    # Files of a previous recording of this question, replaced below
+    previous_files = (
+        SpeakingAnswer.objects.filter(
+            speaking_attempt=speaking_attempt, question=question
+        )
+        .values_list("audio_file", "normalized_audio")
+        .first()
+    )
+
     # Create or update SpeakingAnswer for this specific question
     speaking_answer, answer_created = SpeakingAnswer.objects.update_or_create(
         speaking_attempt=speaking_attempt,
         question=question,
         defaults={
             "audio_file": audio_file,
+            "normalized_audio": "",
         },
     )
 
@@ -1008,85 +1103,23 @@ def submit_speaking(request, attempt_id):
         f"DEBUG: Speaking answer {'created' if answer_created else 'updated'}: {speaking_answer.id}"
     )
 
-    # Convert WebM to WAV if needed (for Azure Speech SDK compatibility)
-    import os
-    import subprocess
-    import tempfile
-    from django.core.files import File
-    from django.core.files.storage import default_storage
-
-    file_path = speaking_answer.audio_file.name
-    file_ext = os.path.splitext(file_path)[1].lower()
-
-    if file_ext in [".webm", ".mp3", ".ogg", ".m4a"]:
-        try:
-            logger.info(f"Converting {file_ext} to WAV for question {question_key}")
-
-            # Download the file to a temporary location
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=file_ext
-            ) as temp_input:
-                with default_storage.open(file_path, "rb") as audio_file_obj:
-                    temp_input.write(audio_file_obj.read())
-                temp_input_path = temp_input.name
-
-            # Create temporary WAV file
-            temp_wav_path = temp_input_path.replace(file_ext, ".wav")
-
-            # Convert using ffmpeg
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-i",
-                temp_input_path,
-                "-ar",
-                "16000",  # 16kHz sample rate
-                "-ac",
-                "1",  # mono
-                "-sample_fmt",
-                "s16",  # 16-bit PCM
-                "-y",  # overwrite output file
-                temp_wav_path,
-            ]
-
-            result = subprocess.run(
-                ffmpeg_cmd, capture_output=True, text=True, timeout=30
-            )
-
-            if result.returncode == 0:
-                # Delete the old WebM file
-                default_storage.delete(file_path)
-
-                # Upload the WAV file with the same base name
-                wav_filename = file_path.replace(file_ext, ".wav")
-                with open(temp_wav_path, "rb") as wav_file:
-                    speaking_answer.audio_file.save(
-                        os.path.basename(wav_filename), File(wav_file), save=True
-                    )
-
-                logger.info(
-                    f"Successfully converted and replaced with WAV: {wav_filename}"
-                )
-            else:
-                logger.error(f"ffmpeg conversion failed: {result.stderr}")
-
-            # Clean up temporary files
+    # Re-recorded: delete the old upload and its normalized WAV so retries
+    # don't accumulate files in storage
+    for name in previous_files or ():
+        if name and name != speaking_answer.audio_file.name:
             try:
-                os.unlink(temp_input_path)
-                if os.path.exists(temp_wav_path):
-                    os.unlink(temp_wav_path)
+                default_storage.delete(name)
             except Exception as e:
-                logger.warning(f"Failed to delete temp files: {e}")
+                logger.warning(f"Failed to delete replaced recording {name}: {e}")
 
-        except subprocess.TimeoutExpired:
-            logger.error(f"Audio conversion timeout for {question_key}")
-        except FileNotFoundError:
-            logger.error(
-                "ffmpeg not found. Please install ffmpeg to convert audio files."
-            )
-        except Exception as conv_error:
-            logger.error(
-                f"Audio conversion failed for {question_key}: {str(conv_error)}"
-            )
+    # The recording is stored as uploaded; ffmpeg converts it on a worker
+    try:
+        normalize_speaking_answer_task.delay(
+            speaking_answer.id, speaking_answer.audio_file.name
+        )
+    except Exception as e:
+        # Evaluation can still decode the original recording
+        logger.warning(f"Failed to queue audio normalization for {question_key}: {e}")
 
     # Also maintain backward compatibility by updating the JSON field
     if not speaking_attempt.audio_files:
@@ -1126,6 +1159,15 @@ def next_section(request, attempt_id):
     if error_response:
         return error_response
 
+    # Persist buffered answers before leaving the section
+    try:
+        flush_attempt_answers(attempt)
+    except AnswerFlushError:
+        return Response(
+            {"error": "Your answers could not be saved. Please try again."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
     # Refresh from database to ensure we have the latest state
     attempt.refresh_from_db()
 
@@ -1219,6 +1261,22 @@ def next_section(request, attempt_id):
             f"[NEXT SECTION] Saved: current_section={attempt.current_section}, status={attempt.status}"
         )
 
+    if next_section == "COMPLETED" and not is_teacher_exam:
+        try:
+            update_score_snapshot(attempt)
+        except Exception as e:
+            logger.error(
+                f"Failed to update score snapshot for attempt {attempt.id}: {e}",
+                exc_info=True,
+            )
+        try:
+            record_attempt_stats(attempt)
+        except Exception as e:
+            logger.error(
+                f"Failed to update question type stats for attempt {attempt.id}: {e}",
+                exc_info=True,
+            )
+
     # Trigger speaking evaluation if moving from speaking section
     if current == "speaking" and next_section == "COMPLETED":
         try:
@@ -1272,6 +1330,15 @@ def submit_test(request, attempt_id):
     # Check if this is a teacher exam attempt
     is_teacher_exam = isinstance(attempt, TeacherExamAttempt)
 
+    # Persist buffered answers before scoring; never grade without them
+    try:
+        flush_attempt_answers(attempt)
+    except AnswerFlushError:
+        return Response(
+            {"error": "Your answers could not be saved. Please try again."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
     # Mark as completed (handle both ExamAttempt and TeacherExamAttempt)
     attempt.status = "COMPLETED"
     if hasattr(attempt, "current_section"):
@@ -1307,7 +1374,6 @@ def submit_test(request, attempt_id):
         "LISTENING_READING_WRITING",
         "FULL_TEST",
     ]:
-        from ielts.analysis import calculate_band_score
         from decimal import Decimal
 
         # Get section results using the existing attempt object
@@ -1324,6 +1390,24 @@ def submit_test(request, attempt_id):
         # Save the updated attempt with scores
         attempt.save()
 
+    # Freeze the attempt's scores; writing/speaking bands are filled in by the
+    # AI evaluation tasks once they finish
+    if not is_teacher_exam:
+        try:
+            update_score_snapshot(attempt)
+        except Exception as e:
+            logger.error(
+                f"Failed to update score snapshot for attempt {attempt.id}: {e}",
+                exc_info=True,
+            )
+        try:
+            record_attempt_stats(attempt)
+        except Exception as e:
+            logger.error(
+                f"Failed to update question type stats for attempt {attempt.id}: {e}",
+                exc_info=True,
+            )
+
     # Only process WritingAttempt and SpeakingAttempt for regular ExamAttempt
     # TeacherExamAttempt doesn't use these models
     if not is_teacher_exam:
@@ -1448,6 +1532,11 @@ def get_test_results(request, attempt_id):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
+    etag = attempt_etag(request, attempt, "results")
+    cached_response = not_modified(request, etag)
+    if cached_response is not None:
+        return cached_response
+
     exam_type = mock_exam.exam_type
 
     # Handle completed_at vs submitted_at difference
@@ -1516,302 +1605,7 @@ def get_test_results(request, attempt_id):
     if analysis_results:
         insights = identify_strengths_and_weaknesses(analysis_results)
         results["insights"] = insights
-    return Response(results)
-
-
-def _build_mcma_answer_detail(question, user_answer, correct_answer):
-    """Build detailed MCMA answer breakdown with scoring."""
-    user_set = set(user_answer.upper())
-    correct_set = set(correct_answer.upper())
-
-    # Calculate partial score - only count correct selections
-    # Each correct answer is worth 1 point
-    correct_selections = len(user_set & correct_set)
-    score = correct_selections
-    max_score = len(correct_set)
-
-    # Build detailed breakdown
-    breakdown = []
-    for option in sorted(correct_set):
-        if option in user_set:
-            breakdown.append(f"✓ {option} (Correct - selected)")
-        else:
-            breakdown.append(f"✗ {option} (Correct - not selected)")
-
-    for option in sorted(user_set - correct_set):
-        breakdown.append(f"✗ {option} (Incorrect - should not select)")
-
-    is_correct = score == max_score
-
-    return {
-        "question_number": question.order,
-        "question_text": question.question_text,
-        "user_answer": f"Selected: {', '.join(sorted(user_set)) if user_set else 'None'}",
-        "correct_answer": f"Correct answers: {', '.join(sorted(correct_set))}",
-        "is_correct": is_correct,
-        "is_mcma": True,
-        "mcma_score": f"{score}/{max_score}",
-        "mcma_breakdown": breakdown,
-    }
-
-
-def _build_regular_answer_detail(question, user_answer, correct_answer):
-    """Build regular answer detail (non-MCMA)."""
-    is_correct = False
-    if correct_answer:
-        if question.test_head.question_type == TestHead.QuestionType.MULTIPLE_CHOICE:
-            user_sorted = "".join(sorted(user_answer.upper()))
-            correct_sorted = "".join(sorted(correct_answer.upper()))
-            is_correct = user_sorted == correct_sorted
-        else:
-            is_correct = _build_regular_answer_response(user_answer, correct_answer)
-
-    return {
-        "question_number": question.order,
-        "question_text": question.question_text,
-        "user_answer": user_answer or "Not answered",
-        "correct_answer": correct_answer,
-        "is_correct": is_correct,
-        "is_mcma": False,
-    }
-
-
-def _build_regular_answer_response(user_answer, correct_answer):
-    """Build regular answer response (non-MCMA)."""
-    corrects = correct_answer.lower().split("|")
-    for cor_answer in corrects:
-        if user_answer.lower() == cor_answer.lower():
-            return True
-    return False
-
-
-def _build_answer_groups(section_items, user_answers_map, section_type="listening"):
-    """
-    Build detailed answer groups for section review.
-
-    Args:
-        section_items: QuerySet of ListeningPart or ReadingPassage objects
-        user_answers_map: Dict mapping question_id to user_answer
-        section_type: 'listening' or 'reading'
-    """
-    answer_groups = []
-
-    for idx, item in enumerate(section_items, start=1):
-        item_number = (
-            item.part_number if section_type == "listening" else item.passage_number
-        )
-        label = "Part" if section_type == "listening" else "Passage"
-
-        for test_head in item.test_heads.all().order_by("id"):
-            questions = test_head.questions.all().order_by("order")
-
-            if not questions:
-                continue
-
-            answers_list = []
-            for question in questions:
-                user_answer = user_answers_map.get(question.id, "")
-                correct_answer = question.get_correct_answer() or ""
-
-                # Handle MCMA questions
-                if (
-                    question.test_head.question_type
-                    == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS
-                ):
-                    if correct_answer:
-                        answer_detail = _build_mcma_answer_detail(
-                            question, user_answer, correct_answer
-                        )
-                    else:
-                        # No correct answer defined
-                        answer_detail = {
-                            "question_number": question.order,
-                            "question_text": question.question_text,
-                            "user_answer": user_answer or "Not answered",
-                            "correct_answer": "Not available",
-                            "is_correct": False,
-                            "is_mcma": True,
-                        }
-                else:
-                    # Regular question types (MCQ, Fill-in, etc.)
-                    answer_detail = _build_regular_answer_detail(
-                        question, user_answer, correct_answer
-                    )
-
-                # Add part/passage information for frontend grouping
-                if section_type == "listening":
-                    answer_detail["part"] = f"{label} {item_number}"
-                else:
-                    answer_detail["passage"] = f"{label} {item_number}"
-
-                answer_detail["question_type"] = test_head.get_question_type_display()
-
-                answers_list.append(answer_detail)
-
-            answer_groups.append(
-                {
-                    "id": test_head.id,
-                    "title": f"{label} {item_number} - {test_head.get_question_type_display()}",
-                    "test_head": test_head.get_question_type_display(),
-                    "answers": answers_list,
-                }
-            )
-
-    return answer_groups
-
-
-def _build_listening_answer_groups(mock_exam, user_answers_map):
-    """Build detailed answer groups for listening section review."""
-    parts = mock_exam.listening_parts.all().order_by("part_number")
-    return _build_answer_groups(parts, user_answers_map, section_type="listening")
-
-
-def _build_reading_answer_groups(mock_exam, user_answers_map):
-    """Build detailed answer groups for reading section review."""
-    passages = mock_exam.reading_passages.all().order_by("passage_number")
-    return _build_answer_groups(passages, user_answers_map, section_type="reading")
-
-
-def _get_listening_results(attempt):
-    """Get detailed listening section results."""
-    return _get_section_results(attempt, section_type="listening")
-
-
-def _calculate_question_score(question, user_answer, correct_answer):
-    """
-    Calculate score for a single question (handles MCMA partial scoring).
-    Returns: (score, max_score) tuple
-    """
-    if (
-        question.test_head.question_type
-        == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS
-    ):
-        # MCMA with partial scoring
-        user_sorted = "".join(sorted(user_answer.upper()))
-        correct_sorted = "".join(sorted(correct_answer.upper()))
-
-        if correct_answer:
-            user_set = set(user_sorted)
-            correct_set = set(correct_sorted)
-
-            # Each correct selection is worth 1 point
-            # No penalty for incorrect selections
-            correct_selections = len(user_set & correct_set)
-            score = correct_selections
-
-            max_score = len(correct_set)
-            return (score, max_score)
-        else:
-            return (0, 1)
-    else:
-        # Regular question types - binary scoring
-        is_correct = _build_regular_answer_response(user_answer, correct_answer)
-        return (1 if is_correct else 0, 1)
-
-
-def _analyze_performance(questions_qs, user_answers_map, grouping_map=None):
-    """
-    Generic performance analysis for both listening and reading sections.
-
-    Args:
-        questions_qs: QuerySet of questions
-        user_answers_map: Dict mapping question_id to user_answer
-        grouping_map: Optional dict mapping question_id to group label (e.g., "Part 1")
-
-    Returns:
-        Dict with stats and accuracies
-    """
-    from collections import defaultdict
-
-    type_stats = defaultdict(lambda: {"correct": 0, "total": 0})
-    group_stats = (
-        defaultdict(lambda: {"correct": 0, "total": 0}) if grouping_map else None
-    )
-
-    for q in questions_qs:
-        question_type = q.test_head.get_question_type_display()
-        user_answer = user_answers_map.get(q.id, "").strip()
-        correct_answer = q.get_correct_answer() or ""
-
-        # Calculate score using unified function
-        score, max_score = _calculate_question_score(q, user_answer, correct_answer)
-
-        # Update type stats
-        type_stats[question_type]["total"] += max_score
-        type_stats[question_type]["correct"] += score
-
-        # Update group stats if grouping provided
-        if grouping_map and q.id in grouping_map:
-            group_label = grouping_map[q.id]
-            group_stats[group_label]["total"] += max_score
-            group_stats[group_label]["correct"] += score
-
-    # Calculate accuracies
-    accuracy_by_type = {
-        q_type: (stats["correct"] / stats["total"]) if stats["total"] > 0 else 0
-        for q_type, stats in type_stats.items()
-    }
-
-    result = {
-        "type_stats": type_stats,
-        "accuracy_by_type": accuracy_by_type,
-    }
-
-    # Add group stats if available
-    if group_stats:
-        accuracy_by_group = {
-            group: (stats["correct"] / stats["total"]) if stats["total"] > 0 else 0
-            for group, stats in group_stats.items()
-        }
-        result.update(
-            {
-                "group_stats": dict(sorted(group_stats.items())),
-                "accuracy_by_group": dict(sorted(accuracy_by_group.items())),
-            }
-        )
-
-    return result
-
-
-def _analyze_listening_with_parts(
-    listening_questions_qs, user_answers_map, question_to_part_map
-):
-    """Analyze listening performance with exam-specific part mapping."""
-    # Convert part numbers to part labels
-    part_grouping = {qid: f"Part {pnum}" for qid, pnum in question_to_part_map.items()}
-
-    result = _analyze_performance(
-        listening_questions_qs, user_answers_map, part_grouping
-    )
-
-    # Rename group keys for backward compatibility
-    return {
-        "part_stats": result.get("group_stats", {}),
-        "type_stats": result["type_stats"],
-        "accuracy_by_part": result.get("accuracy_by_group", {}),
-        "accuracy_by_type": result["accuracy_by_type"],
-    }
-
-
-def _analyze_reading_with_types(reading_questions_qs, user_answers_map):
-    """Analyze reading performance by question type."""
-    # Reading doesn't need grouping by passage
-    return _analyze_performance(reading_questions_qs, user_answers_map)
-
-
-def _calculate_total_questions(questions_qs):
-    """Calculate total question count (handling MCMA as multiple questions)."""
-    total_count = 0
-    for q in questions_qs:
-        if (
-            q.test_head.question_type
-            == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS
-        ):
-            correct_answer = q.get_correct_answer() or ""
-            total_count += len(set(correct_answer)) if correct_answer else 1
-        else:
-            total_count += 1
-    return total_count
+    return set_etag(Response(results), etag)
 
 
 def _get_section_results(attempt, section_type="listening"):
@@ -1822,95 +1616,12 @@ def _get_section_results(attempt, section_type="listening"):
         attempt: ExamAttempt or TeacherExamAttempt object
         section_type: 'listening' or 'reading'
     """
-    from teacher.models import TeacherExamAttempt, TeacherUserAnswer
-
-    exam = attempt.exam
-    is_teacher_exam = isinstance(attempt, TeacherExamAttempt)
-
-    # Get mock exam - handle both mock_test and mock_exam
-    mock_exam = getattr(exam, "mock_test", None) or getattr(exam, "mock_exam", None)
-    if not mock_exam:
-        # Return empty results if no mock exam found
-        return {
-            "total_questions": 0,
-            "correct_answers": 0,
-            "band_score": 0,
-            "accuracy_by_type": {},
-            "type_stats": [],
-            "answer_groups": [],
-        }
+    return grade_section(attempt, section_type=section_type)
 
-    # Get questions based on section type
-    if section_type == "listening":
-        questions = Question.objects.filter(
-            test_head__listening__in=mock_exam.listening_parts.all()
-        ).select_related("test_head", "test_head__listening")
-        band_type = "listening"
-
-        # Build question to part map
-        grouping_map = {}
-        for part in mock_exam.listening_parts.all():
-            for head in part.test_heads.all():
-                for question in head.questions.all():
-                    grouping_map[question.id] = part.part_number
-    else:  # reading
-        questions = Question.objects.filter(
-            test_head__reading__in=mock_exam.reading_passages.all()
-        ).select_related("test_head")
-        band_type = "academic_reading"
-        grouping_map = None
-
-    # Get user answers - use appropriate model based on attempt type
-    if is_teacher_exam:
-        user_answers = TeacherUserAnswer.objects.filter(
-            exam_attempt=attempt, question__in=questions
-        ).select_related("question", "question__test_head")
-    else:
-        user_answers = UserAnswer.objects.filter(
-            exam_attempt=attempt, question__in=questions
-        ).select_related("question", "question__test_head")
-
-    # Build user answers map
-    user_answers_map = {ua.question_id: ua.answer_text for ua in user_answers}
 
-    # Analyze performance
-    if section_type == "listening":
-        analysis = _analyze_listening_with_parts(
-            questions, user_answers_map, grouping_map
-        )
-    else:
-        analysis = _analyze_reading_with_types(questions, user_answers_map)
-
-    # Calculate scores
-    correct_count, _ = _calculate_weighted_score(user_answers)
-    total_count = _calculate_total_questions(questions)
-    band_score = calculate_band_score(correct_count, total_count, band_type)
-
-    # Build answer groups
-    if section_type == "listening":
-        answer_groups = _build_listening_answer_groups(mock_exam, user_answers_map)
-    else:
-        answer_groups = _build_reading_answer_groups(mock_exam, user_answers_map)
-
-    result = {
-        "total_questions": total_count,
-        "correct_answers": correct_count,
-        "band_score": band_score,
-        "accuracy_by_type": analysis["accuracy_by_type"],
-        "type_stats": analysis["type_stats"],
-        "answer_groups": answer_groups,
-    }
-
-    # Add part-specific data for listening
-    if section_type == "listening":
-        result.update(
-            {
-                "accuracy_by_part": analysis["accuracy_by_part"],
-                "part_stats": analysis["part_stats"],
-            }
-        )
-
-    return result
+def _get_listening_results(attempt):
+    """Get detailed listening section results."""
+    return _get_section_results(attempt, section_type="listening")
 
 
 def _get_reading_results(attempt):
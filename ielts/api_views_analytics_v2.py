@@ -46,12 +46,11 @@ from rest_framework import status
 
 from .models import (
     ExamAttempt,
-    UserAnswer,
     Question,
-    TestHead,
     WritingAttempt,
     SpeakingAttempt,
 )
+from .question_type_stats import get_question_type_stats, question_type_label
 from .analysis import (
     IMPROVEMENT_TIPS,
     STRENGTH_THRESHOLD,
@@ -453,69 +452,20 @@ def get_skill_breakdown_v2(request):
     cutoff_date = get_history_cutoff(tier)
     is_premium = tier in [TIER_PRO, TIER_ULTRA]
 
-    # Build filters
-    answer_filter = Q(exam_attempt__student=user, exam_attempt__status="COMPLETED")
-    if cutoff_date:
-        answer_filter &= Q(exam_attempt__completed_at__gte=cutoff_date)
-
-    # Get answer data with efficient prefetching
-    user_answers = UserAnswer.objects.filter(answer_filter).select_related(
-        "question__test_head"
-    )
-
-    # Aggregate by question type
-    question_type_stats = defaultdict(lambda: {"correct": 0, "total": 0, "section": ""})
-
-    for answer in user_answers:
-        question = answer.question
-        if not question or not question.test_head:
-            continue
-
-        test_head = question.test_head
-        q_type = test_head.get_question_type_display()
-        correct_answer = question.get_correct_answer() or ""
-        user_answer = answer.answer_text or ""
-
-        # Determine section
-        if test_head.reading_id:
-            section = "Reading"
-        elif test_head.listening_id:
-            section = "Listening"
-        else:
-            continue
-
-        key = f"{section}_{q_type}"
-        question_type_stats[key]["section"] = section
-        question_type_stats[key]["type"] = q_type
-
-        # Check correctness
-        if (
-            test_head.question_type
-            == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS
-        ):
-            user_sorted = "".join(sorted(user_answer.upper()))
-            correct_sorted = "".join(sorted(correct_answer.upper()))
-            if correct_answer:
-                user_set = set(user_sorted)
-                correct_set = set(correct_sorted)
-                correct_count = len(user_set & correct_set)
-                question_type_stats[key]["correct"] += correct_count
-                question_type_stats[key]["total"] += len(correct_set)
-        else:
-            question_type_stats[key]["total"] += 1
-            if user_answer.strip().lower() == correct_answer.strip().lower():
-                question_type_stats[key]["correct"] += 1
+    # Reading/Listening results by question type, summed from daily rollups
+    question_type_stats = get_question_type_stats(user, cutoff_date)
 
     # Build skills list
     skills = []
-    for key, stats in question_type_stats.items():
+    for stats in question_type_stats:
         if stats["total"] == 0:
             continue
 
+        q_type = question_type_label(stats["question_type"])
         accuracy = stats["correct"] / stats["total"]
         skill_data = {
-            "section": stats["section"],
-            "question_type": stats["type"],
+            "section": stats["section"].title(),
+            "question_type": q_type,
             "correct": stats["correct"],
             "total": stats["total"],
             "accuracy": round(accuracy * 100, 1),
@@ -529,7 +479,7 @@ def get_skill_breakdown_v2(request):
         # Only include tips for premium users
         if is_premium and accuracy <= WEAKNESS_THRESHOLD:
             skill_data["tip"] = IMPROVEMENT_TIPS.get(
-                stats["type"], IMPROVEMENT_TIPS.get("default", "")
+                q_type, IMPROVEMENT_TIPS.get("default", "")
             )
 
         skills.append(skill_data)
@@ -760,59 +710,26 @@ def get_weakness_analysis_v2(request):
     all_weaknesses = []
 
     # === Analyze Reading/Listening ===
-    answer_filter = Q(exam_attempt__student=user, exam_attempt__status="COMPLETED")
-    if cutoff_date:
-        answer_filter &= Q(exam_attempt__completed_at__gte=cutoff_date)
-
-    user_answers = UserAnswer.objects.filter(answer_filter).select_related(
-        "question__test_head"
-    )
-
-    question_stats = defaultdict(lambda: {"correct": 0, "total": 0, "section": ""})
-
-    for answer in user_answers:
-        question = answer.question
-        if not question or not question.test_head:
-            continue
-
-        test_head = question.test_head
-        q_type = test_head.get_question_type_display()
-        correct_answer = question.get_correct_answer() or ""
-        user_answer = answer.answer_text or ""
-
-        section = (
-            "reading"
-            if test_head.reading_id
-            else "listening" if test_head.listening_id else None
-        )
-        if not section:
-            continue
-
-        key = f"{section}_{q_type}"
-        question_stats[key]["section"] = section
-        question_stats[key]["type"] = q_type
-        question_stats[key]["total"] += 1
-
-        if user_answer.strip().lower() == correct_answer.strip().lower():
-            question_stats[key]["correct"] += 1
+    question_stats = get_question_type_stats(user, cutoff_date)
 
-    for key, stats in question_stats.items():
-        if stats["total"] < 3:  # Need enough data
+    for stats in question_stats:
+        if stats["questions"] < 3 or stats["total"] == 0:  # Need enough data
             continue
 
+        q_type = question_type_label(stats["question_type"])
         accuracy = stats["correct"] / stats["total"]
         if accuracy <= WEAKNESS_THRESHOLD:
             all_weaknesses.append(
                 {
                     "section": stats["section"],
-                    "weakness_type": stats["type"],
+                    "weakness_type": q_type,
                     "current_score": round(accuracy * 9, 1),
                     "target_score": target_score,
                     "priority": "high" if accuracy < 0.3 else "medium",
-                    "attempts": stats["total"],
+                    "attempts": stats["questions"],
                     "improvement_tips": [
                         IMPROVEMENT_TIPS.get(
-                            stats["type"], "Practice more exercises of this type."
+                            q_type, "Practice more exercises of this type."
                         )
                     ],
                 }
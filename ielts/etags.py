@@ -0,0 +1,84 @@
+"""
+Conditional GET support for attempt endpoints.
+
+Section data and results are a function of the exam content (the global
+content version, see ``ielts/answer_key.py``) and of the attempt's own data:
+its answers, writing/speaking evaluations and the attempt row itself. The
+latter is tracked by a per-attempt version token in the cache which is
+replaced whenever any of them change (see ``ielts/signals.py``).
+
+Responses carry a strong ETag built from both versions, so a client that
+already has the current representation gets a 304 after a cache lookup
+instead of a regenerated body.
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .answer_key import get_content_version
+
+ATTEMPT_VERSION_TIMEOUT = 60 * 60 * 24 * 7  # 7 days
+
+
+def _version_key(attempt_model, attempt_id):
+    return f"attempt_version_{attempt_model._meta.label_lower}_{attempt_id}"
+
+
+def get_attempt_version(attempt):
+    """Return the attempt's version token, creating one if it has none."""
+    key = _version_key(attempt._meta.model, attempt.pk)
+    version = cache.get(key)
+    if version is None:
+        # A fresh random token never matches an ETag issued before eviction
+        cache.add(key, uuid.uuid4().hex, timeout=ATTEMPT_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_attempt_version(attempt_model, attempt_id):
+    """Invalidate ETags issued for an ExamAttempt/TeacherExamAttempt."""
+    cache.set(
+        _version_key(attempt_model, attempt_id),
+        uuid.uuid4().hex,
+        timeout=ATTEMPT_VERSION_TIMEOUT,
+    )
+
+
+def attempt_etag(request, attempt, *parts):
+    """
+    Build a strong ETag for an attempt response.
+
+    Args:
+        request: The request; local media URLs in responses depend on its host
+        attempt: ExamAttempt or TeacherExamAttempt object
+        parts: Anything else the response depends on (e.g. the section name)
+    """
+    raw = "|".join(
+        str(part)
+        for part in (
+            get_content_version(),
+            get_attempt_version(attempt),
+            request.build_absolute_uri("/"),
+            *parts,
+        )
+    )
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+
+
+def not_modified(request, etag):
+    """Return a 304 response if the client's If-None-Match matches, else None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_etag(response, etag)
+    return response
+
+
+def set_etag(response, etag):
+    """Attach the ETag; private, always revalidated (bodies are per student)."""
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,244 @@
+"""
+Single-pass Reading/Listening results engine.
+
+The exam structure (parts/passages -> test heads -> questions) is loaded once
+with a prefetch tree, the attempt's answers with one query, and correct
+answers come from the compiled answer key (see ``ielts/answer_key.py``).
+A single traversal then produces the band score, per-type stats, per-part
+stats and the review groups shown on the results page.
+"""
+
+from django.db.models import Prefetch
+
+from .analysis import calculate_band_score
+from .answer_key import build_entry, get_answer_key, grade_entry
+from .models import Question, TestHead, UserAnswer
+
+SECTION_CONFIG = {
+    "listening": {
+        "relation": "listening_parts",
+        "number_field": "part_number",
+        "label": "Part",
+        "band_type": "listening",
+    },
+    "reading": {
+        "relation": "reading_passages",
+        "number_field": "passage_number",
+        "label": "Passage",
+        "band_type": "academic_reading",
+    },
+}
+
+
+def _empty_results():
+    return {
+        "total_questions": 0,
+        "correct_answers": 0,
+        "band_score": 0,
+        "accuracy_by_type": {},
+        "type_stats": [],
+        "answer_groups": [],
+    }
+
+
+def _accuracy(stats):
+    return {
+        key: (value["correct"] / value["total"]) if value["total"] > 0 else 0
+        for key, value in stats.items()
+    }
+
+
+def _load_section_items(mock_exam, section_type):
+    """Load parts/passages with their test heads and questions (3 queries)."""
+    config = SECTION_CONFIG[section_type]
+    return (
+        getattr(mock_exam, config["relation"])
+        .order_by(config["number_field"])
+        .prefetch_related(
+            Prefetch("test_heads", queryset=TestHead.objects.order_by("id")),
+            Prefetch(
+                "test_heads__questions",
+                queryset=Question.objects.order_by("order"),
+            ),
+        )
+    )
+
+
+def load_user_answers(attempt, question_ids=None):
+    """
+    Return {question_id: answer_text} for the attempt (1 query).
+
+    Works for both ExamAttempt and TeacherExamAttempt; limited to
+    question_ids when given.
+    """
+    from teacher.models import TeacherExamAttempt, TeacherUserAnswer
+
+    model = TeacherUserAnswer if isinstance(attempt, TeacherExamAttempt) else UserAnswer
+    answers = model.objects.filter(exam_attempt=attempt)
+    if question_ids is not None:
+        answers = answers.filter(question_id__in=question_ids)
+    return dict(answers.order_by().values_list("question_id", "answer_text"))
+
+
+def _build_answer_detail(question, entry, user_answer, score, max_score):
+    """Build the review entry of a single question."""
+    correct_answer = entry["correct_answer"]
+
+    if entry["question_type"] != TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS:
+        return {
+            "question_number": question.order,
+            "question_text": question.question_text,
+            "user_answer": user_answer or "Not answered",
+            "correct_answer": correct_answer,
+            "is_correct": score == max_score,
+            "is_mcma": False,
+        }
+
+    if not correct_answer:
+        # No correct answer defined
+        return {
+            "question_number": question.order,
+            "question_text": question.question_text,
+            "user_answer": user_answer or "Not answered",
+            "correct_answer": "Not available",
+            "is_correct": False,
+            "is_mcma": True,
+        }
+
+    user_set = set(user_answer.upper())
+    correct_set = set(correct_answer.upper())
+
+    breakdown = []
+    for option in sorted(correct_set):
+        if option in user_set:
+            breakdown.append(f"✓ {option} (Correct - selected)")
+        else:
+            breakdown.append(f"✗ {option} (Correct - not selected)")
+
+    for option in sorted(user_set - correct_set):
+        breakdown.append(f"✗ {option} (Incorrect - should not select)")
+
+    return {
+        "question_number": question.order,
+        "question_text": question.question_text,
+        "user_answer": f"Selected: {', '.join(sorted(user_set)) if user_set else 'None'}",
+        "correct_answer": f"Correct answers: {', '.join(sorted(correct_set))}",
+        "is_correct": score == max_score,
+        "is_mcma": True,
+        "mcma_score": f"{score}/{max_score}",
+        "mcma_breakdown": breakdown,
+    }
+
+
+def grade_section(attempt, section_type="listening"):
+    """
+    Grade the listening or reading section of an attempt.
+
+    Args:
+        attempt: ExamAttempt or TeacherExamAttempt object
+        section_type: 'listening' or 'reading'
+
+    Returns:
+        Dict with total_questions, correct_answers, band_score, accuracy_by_type,
+        type_stats and answer_groups (plus accuracy_by_part and part_stats for
+        listening).
+    """
+    exam = attempt.exam
+
+    # Get mock exam - handle both mock_test and mock_exam
+    mock_exam = getattr(exam, "mock_test", None) or getattr(exam, "mock_exam", None)
+    if not mock_exam:
+        return _empty_results()
+
+    config = SECTION_CONFIG[section_type]
+    label = config["label"]
+    group_field = "part" if section_type == "listening" else "passage"
+
+    items = list(_load_section_items(mock_exam, section_type))
+    question_ids = [
+        question.id
+        for item in items
+        for test_head in item.test_heads.all()
+        for question in test_head.questions.all()
+    ]
+    user_answers_map = load_user_answers(attempt, question_ids)
+    answer_key = get_answer_key(mock_exam)
+
+    total_count = 0
+    correct_count = 0
+    type_stats = {}
+    part_stats = {}
+    answer_groups = []
+
+    for item in items:
+        item_label = f"{label} {getattr(item, config['number_field'])}"
+
+        for test_head in item.test_heads.all():
+            questions = test_head.questions.all()
+            if not questions:
+                continue
+
+            question_type = test_head.get_question_type_display()
+            answers_list = []
+
+            for question in questions:
+                entry = answer_key.get(question.id) or build_entry(question)
+                user_answer = user_answers_map.get(question.id, "")
+
+                score, max_score = grade_entry(entry, user_answer)
+                if not user_answer.strip():
+                    score = 0
+
+                total_count += entry["weight"]
+                correct_count += score
+
+                stats = type_stats.setdefault(question_type, {"correct": 0, "total": 0})
+                stats["correct"] += score
+                stats["total"] += max_score
+
+                if section_type == "listening":
+                    stats = part_stats.setdefault(
+                        item_label, {"correct": 0, "total": 0}
+                    )
+                    stats["correct"] += score
+                    stats["total"] += max_score
+
+                answer_detail = _build_answer_detail(
+                    question, entry, user_answer, score, max_score
+                )
+                # Add part/passage information for frontend grouping
+                answer_detail[group_field] = item_label
+                answer_detail["question_type"] = question_type
+                answers_list.append(answer_detail)
+
+            answer_groups.append(
+                {
+                    "id": test_head.id,
+                    "title": f"{item_label} - {question_type}",
+                    "test_head": question_type,
+                    "answers": answers_list,
+                }
+            )
+
+    result = {
+        "total_questions": total_count,
+        "correct_answers": correct_count,
+        "band_score": calculate_band_score(
+            correct_count, total_count, config["band_type"]
+        ),
+        "accuracy_by_type": _accuracy(type_stats),
+        "type_stats": type_stats,
+        "answer_groups": answer_groups,
+    }
+
+    # Add part-specific data for listening
+    if section_type == "listening":
+        part_stats = dict(sorted(part_stats.items()))
+        result.update(
+            {
+                "accuracy_by_part": _accuracy(part_stats),
+                "part_stats": part_stats,
+            }
+        )
+
+    return result
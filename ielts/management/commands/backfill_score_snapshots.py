@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from ielts.models import ExamAttempt
+from ielts.score_snapshot import update_score_snapshot
+
+
+class Command(BaseCommand):
+    help = "Compute score snapshots for completed exam attempts that have none"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute snapshots that already exist",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only backfill attempts of this user id",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of attempts loaded per database round trip",
+        )
+
+    def handle(self, *args, **options):
+        attempts = ExamAttempt.objects.filter(status="COMPLETED").order_by("id")
+        if not options["all"]:
+            attempts = attempts.filter(score_snapshot__isnull=True)
+        if options["user"]:
+            attempts = attempts.filter(student_id=options["user"])
+
+        total = attempts.count()
+        self.stdout.write(f"Backfilling score snapshots for {total} attempts...")
+
+        updated = 0
+        failed = 0
+        for attempt in attempts.only("id").iterator(chunk_size=options["batch_size"]):
+            try:
+                update_score_snapshot(attempt)
+                updated += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Attempt {attempt.id}: {e}")
+
+            if updated and updated % options["batch_size"] == 0:
+                self.stdout.write(f"  {updated}/{total} done")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated {updated} attempts ({failed} failed)")
+        )
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import TruncDate
+
+from ielts.models import ExamAttempt
+from ielts.question_type_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily question type rollups from completed exam attempts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only rebuild the rollups of this user id",
+        )
+
+    def handle(self, *args, **options):
+        attempts = ExamAttempt.objects.filter(
+            status="COMPLETED", completed_at__isnull=False
+        )
+        if options["user"]:
+            attempts = attempts.filter(student_id=options["user"])
+
+        days = list(
+            attempts.annotate(day=TruncDate("completed_at"))
+            .values_list("student_id", "day")
+            .order_by("student_id", "day")
+            .distinct()
+        )
+        self.stdout.write(
+            f"Rebuilding question type stats for {len(days)} user days..."
+        )
+
+        rows = 0
+        failed = 0
+        for index, (user_id, day) in enumerate(days, start=1):
+            try:
+                rows += rebuild_daily_stats(user_id, day)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"User {user_id} on {day}: {e}")
+
+            if index % 500 == 0:
+                self.stdout.write(f"  {index}/{len(days)} done")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {rows} rows ({failed} user days failed)")
+        )
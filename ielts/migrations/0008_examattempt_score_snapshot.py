@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ielts', '0007_add_chart_type_to_writing_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='score_snapshot',
+            field=models.JSONField(blank=True, help_text='Section bands, raw counts and overall band written on scoring', null=True, verbose_name='Score Snapshot'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-16 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ielts', '0008_examattempt_score_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['student', '-created_at', '-id'], name='exam_attemp_student_fdc4cb_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.7 on 2026-10-16 19:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ielts", "0009_examattempt_history_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionTypeDailyStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Date")),
+                (
+                    "section",
+                    models.CharField(
+                        choices=[("reading", "Reading"), ("listening", "Listening")],
+                        max_length=10,
+                        verbose_name="Section",
+                    ),
+                ),
+                (
+                    "question_type",
+                    models.CharField(
+                        choices=[
+                            ("MCQ", "Multiple Choice"),
+                            ("MCMA", "Multiple Choice (Multiple Answers)"),
+                            ("SA", "Short Answer Questions"),
+                            ("SC", "Sentence Completion"),
+                            ("SUC", "Summary Completion"),
+                            ("NC", "Note Completion"),
+                            ("FCC", "Flow Chart Completion"),
+                            ("TC", "Table Completion"),
+                            ("TFNG", "True/False/Not Given"),
+                            ("YNNG", "Yes/No/Not Given"),
+                            ("MH", "Matching Headings"),
+                            ("MI", "Matching Information"),
+                            ("MF", "Matching Features"),
+                            ("FC", "Form Completion"),
+                            ("ML", "Map Labelling"),
+                            ("DL", "Diagram Labelling"),
+                        ],
+                        max_length=10,
+                        verbose_name="Question Type",
+                    ),
+                ),
+                (
+                    "questions",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Answered questions",
+                        verbose_name="Questions",
+                    ),
+                ),
+                (
+                    "correct",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Points scored", verbose_name="Correct"
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Points available (MCMA questions count every correct option)",
+                        verbose_name="Total",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="question_type_stats",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="User",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Question Type Daily Stat",
+                "verbose_name_plural": "Question Type Daily Stats",
+                "db_table": "question_type_daily_stats",
+                "unique_together": {("user", "date", "section", "question_type")},
+            },
+        ),
+    ]
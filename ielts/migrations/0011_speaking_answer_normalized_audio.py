@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-16 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ielts", "0010_question_type_daily_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="speakinganswer",
+            name="normalized_audio",
+            field=models.FileField(
+                blank=True,
+                help_text="Normalized WAV for speech recognition (empty until converted)",
+                upload_to="speaking_answers/",
+            ),
+        ),
+    ]
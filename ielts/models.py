@@ -754,6 +754,13 @@ class ExamAttempt(models.Model):
         validators=[MinValueValidator(0), MaxValueValidator(9)],
         verbose_name="Overall Score",
     )
+    # Frozen section bands and raw counts, see ielts/score_snapshot.py
+    score_snapshot = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name="Score Snapshot",
+        help_text="Section bands, raw counts and overall band written on scoring",
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
@@ -767,6 +774,8 @@ class ExamAttempt(models.Model):
         indexes = [
             models.Index(fields=["student"]),
             models.Index(fields=["exam", "status"]),
+            # Keyset pagination of a student's attempts history
+            models.Index(fields=["student", "-created_at", "-id"]),
         ]
 
     def __str__(self):
@@ -1136,6 +1145,13 @@ class SpeakingAnswer(models.Model):
         upload_to="speaking_answers/", help_text="Audio recording for this question"
     )
 
+    # 16 kHz mono WAV of audio_file, filled in by normalize_speaking_answer_task
+    normalized_audio = models.FileField(
+        upload_to="speaking_answers/",
+        blank=True,
+        help_text="Normalized WAV for speech recognition (empty until converted)",
+    )
+
     # Transcript (can be generated later via STT)
     transcript = models.TextField(
         null=True, blank=True, help_text="Transcript of the audio answer"
@@ -1210,30 +1226,13 @@ class UserAnswer(models.Model):
 
     def check_correctness(self):
         """Check if the answer is correct and update the is_correct field"""
-        correct_answer = self.question.get_correct_answer()
-        if correct_answer:
-            # Normalize both answers for comparison (lowercase, strip whitespace)
-            user_ans = self.answer_text.strip().lower() if self.answer_text else ""
-            correct_ans = correct_answer.strip().lower()
-
-            # For TFNG, YNNG questions
-            if self.question.test_head and self.question.test_head.question_type in [
-                TestHead.QuestionType.TRUE_FALSE_NOT_GIVEN,
-                TestHead.QuestionType.YES_NO_NOT_GIVEN,
-            ]:
-                self.is_correct = user_ans == correct_ans
-            # For short answer questions (allow slight variations)
-            elif (
-                self.question.test_head
-                and self.question.test_head.question_type
-                == TestHead.QuestionType.SHORT_ANSWER
-            ):
-                # Check if the answer contains the correct answer or vice versa
-                self.is_correct = correct_ans in user_ans or user_ans in correct_ans
-            # For MCQ and other types
-            else:
-                self.is_correct = user_ans == correct_ans
+        from .answer_key import get_answer_key_entry, stored_correctness
 
+        # Read the correct answer from the exam's compiled answer key
+        entry = get_answer_key_entry(
+            getattr(self.exam_attempt.exam, "mock_test", None), self.question_id
+        )
+        self.is_correct = stored_correctness(entry, self.answer_text, self.is_correct)
         return self.is_correct
 
     def save(self, *args, **kwargs):
@@ -1453,3 +1452,56 @@ class Exam(models.Model):
 
         self.enrolled_students.add(student)
         return True
+
+
+class QuestionTypeDailyStat(models.Model):
+    """
+    Per-user, per-day Reading/Listening results by question type.
+
+    Rolled up from completed exam attempts (see ielts/question_type_stats.py)
+    so analytics sum a few rows instead of regrading every answer.
+    """
+
+    SECTION_CHOICES = (
+        ("reading", "Reading"),
+        ("listening", "Listening"),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="question_type_stats",
+        verbose_name="User",
+    )
+    date = models.DateField(verbose_name="Date")
+    section = models.CharField(
+        max_length=10, choices=SECTION_CHOICES, verbose_name="Section"
+    )
+    question_type = models.CharField(
+        max_length=10,
+        choices=TestHead.QuestionType.choices,
+        verbose_name="Question Type",
+    )
+    questions = models.PositiveIntegerField(
+        default=0, verbose_name="Questions", help_text="Answered questions"
+    )
+    correct = models.PositiveIntegerField(
+        default=0, verbose_name="Correct", help_text="Points scored"
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Total",
+        help_text="Points available (MCMA questions count every correct option)",
+    )
+
+    class Meta:
+        db_table = "question_type_daily_stats"
+        verbose_name = "Question Type Daily Stat"
+        verbose_name_plural = "Question Type Daily Stats"
+        # Also serves the (user, date >= cutoff) analytics lookups
+        unique_together = ("user", "date", "section", "question_type")
+
+    def __str__(self):
+        return (
+            f"{self.user.username} - {self.date} - {self.section} {self.question_type}"
+        )
@@ -0,0 +1,149 @@
+"""
+Daily Reading/Listening rollups by question type.
+
+Skill and weakness analytics used to load every answer a user ever gave and
+regrade it row by row. Instead, ``QuestionTypeDailyStat`` keeps one row per
+user, day, section and question type, rebuilt whenever an attempt completes:
+
+    (user, 2025-01-01, "reading", "TFNG") -> questions=13, correct=9, total=13
+
+Answers are graded with the compiled answer key (``ielts/answer_key.py``),
+the same rules as the results page; MCMA questions score one point per
+correct option. Analytics then sum the rows since the tier's cutoff with one
+indexed query.
+
+Existing history is loaded with ``manage.py rebuild_question_type_stats``.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .answer_key import get_answer_key, grade_entry
+from .models import ExamAttempt, QuestionTypeDailyStat, TestHead, UserAnswer
+
+QUESTION_TYPE_LABELS = dict(TestHead.QuestionType.choices)
+
+
+def question_type_label(question_type):
+    """Display name of a question type code (e.g. "TFNG" -> "True/False/Not Given")."""
+    return QUESTION_TYPE_LABELS.get(question_type, question_type)
+
+
+def _grade_answers(attempts):
+    """Return {(section, question_type): counts} for the attempts' answers."""
+    mock_exams = {attempt.id: attempt.exam.mock_test for attempt in attempts}
+    # One answer key fetch per exam, not per answer
+    answer_keys = {}
+    for mock_exam in mock_exams.values():
+        if mock_exam.id not in answer_keys:
+            answer_keys[mock_exam.id] = get_answer_key(mock_exam)
+    answers = (
+        UserAnswer.objects.filter(exam_attempt_id__in=list(mock_exams))
+        .order_by()
+        .values_list(
+            "exam_attempt_id",
+            "question_id",
+            "answer_text",
+            "question__test_head__reading_id",
+            "question__test_head__listening_id",
+        )
+    )
+
+    stats = defaultdict(lambda: {"questions": 0, "correct": 0, "total": 0})
+    for attempt_id, question_id, answer_text, reading_id, listening_id in answers:
+        if reading_id:
+            section = "reading"
+        elif listening_id:
+            section = "listening"
+        else:
+            continue
+
+        entry = answer_keys[mock_exams[attempt_id].id].get(question_id)
+        if not entry or not entry["question_type"] or not entry["correct_answer"]:
+            continue
+
+        score, max_score = grade_entry(entry, answer_text)
+        if not answer_text.strip():
+            score = 0
+
+        counts = stats[(section, entry["question_type"])]
+        counts["questions"] += 1
+        counts["correct"] += score
+        counts["total"] += max_score
+    return stats
+
+
+def rebuild_daily_stats(user_id, date):
+    """
+    Recompute a user's rollup rows of one day from their completed attempts.
+
+    The day's rows are replaced, so this is safe to run repeatedly.
+
+    Returns:
+        Number of rows written
+    """
+    attempts = list(
+        ExamAttempt.objects.filter(
+            student_id=user_id, status="COMPLETED", completed_at__date=date
+        )
+        .exclude(exam__mock_test__isnull=True)
+        .select_related("exam__mock_test")
+    )
+    stats = _grade_answers(attempts) if attempts else {}
+
+    rows = [
+        QuestionTypeDailyStat(
+            user_id=user_id,
+            date=date,
+            section=section,
+            question_type=question_type,
+            **counts,
+        )
+        for (section, question_type), counts in stats.items()
+    ]
+    with transaction.atomic():
+        QuestionTypeDailyStat.objects.filter(user_id=user_id, date=date).delete()
+        # A concurrent rebuild of the same day may have inserted rows already
+        QuestionTypeDailyStat.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["user", "date", "section", "question_type"],
+            update_fields=["questions", "correct", "total"],
+        )
+    return len(rows)
+
+
+def record_attempt_stats(attempt):
+    """Roll up a just-completed ExamAttempt into its day's rows."""
+    if attempt.completed_at:
+        rebuild_daily_stats(
+            attempt.student_id, timezone.localdate(attempt.completed_at)
+        )
+
+
+def get_question_type_stats(user, cutoff_date=None):
+    """
+    Sum a user's rollups by section and question type (1 query).
+
+    Args:
+        user: User object
+        cutoff_date: Only include days on or after this datetime (None = all)
+
+    Returns:
+        List of dicts with section, question_type, questions, correct and total
+    """
+    stats = QuestionTypeDailyStat.objects.filter(user=user)
+    if cutoff_date:
+        stats = stats.filter(date__gte=timezone.localdate(cutoff_date))
+    return list(
+        stats.values("section", "question_type")
+        .annotate(
+            questions=Sum("questions"),
+            correct=Sum("correct"),
+            total=Sum("total"),
+        )
+        .order_by("section", "question_type")
+    )
@@ -0,0 +1,161 @@
+"""
+Frozen per-attempt score snapshots.
+
+Scores are computed when they change (test submission, AI writing/speaking
+evaluation, manual evaluation) and stored on ``ExamAttempt.score_snapshot``
+so listings never have to regrade an attempt:
+
+    {
+        "listening": {"band": 6.5, "correct": 27, "total": 40},
+        "reading": {"band": 7.0, "correct": 31, "total": 40},
+        "writing": {"band": 6.0},
+        "speaking": {"band": None},       # not evaluated yet
+        "overall": 6.5,
+        "scored_at": "2025-01-01T10:00:00+00:00",
+    }
+
+Only the sections of the attempt's exam type are present. The section band
+columns (``listening_score`` ... ``overall_score``) mirror the snapshot.
+"""
+
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .etags import bump_attempt_version
+from .grading import grade_section
+from .models import ExamAttempt, SpeakingAttempt, WritingAttempt
+
+logger = logging.getLogger(__name__)
+
+EXAM_TYPE_SECTIONS = {
+    "LISTENING": ("listening",),
+    "READING": ("reading",),
+    "WRITING": ("writing",),
+    "SPEAKING": ("speaking",),
+    "LISTENING_READING": ("listening", "reading"),
+    "LISTENING_READING_WRITING": ("listening", "reading", "writing"),
+    "FULL_TEST": ("listening", "reading", "writing", "speaking"),
+}
+
+SCORE_FIELDS = {
+    "listening": "listening_score",
+    "reading": "reading_score",
+    "writing": "writing_score",
+    "speaking": "speaking_score",
+}
+
+
+def _round_band(value):
+    return round(float(value), 1) if value is not None else None
+
+
+def _writing_band(attempt):
+    """Average band of evaluated writing tasks (manual band preferred over AI)."""
+    bands = []
+    writing_attempts = WritingAttempt.objects.filter(
+        exam_attempt=attempt,
+        evaluation_status=WritingAttempt.EvaluationStatus.COMPLETED,
+    ).only("answer_text", "band_score", "ai_band_score")
+
+    for wa in writing_attempts:
+        if not wa.answer_text:
+            continue
+        if wa.band_score:
+            bands.append(float(wa.band_score))
+        elif wa.ai_band_score and wa.ai_band_score != "N/A":
+            try:
+                bands.append(float(wa.ai_band_score))
+            except (ValueError, TypeError):
+                continue
+
+    if not bands:
+        return None
+    return round(sum(bands) / len(bands) * 2) / 2
+
+
+def _speaking_band(attempt):
+    band_score = (
+        SpeakingAttempt.objects.filter(
+            exam_attempt=attempt,
+            evaluation_status=SpeakingAttempt.EvaluationStatus.COMPLETED,
+        )
+        .values_list("band_score", flat=True)
+        .first()
+    )
+    return float(band_score) if band_score else None
+
+
+def build_section_score(attempt, section):
+    """Compute the snapshot entry of a single section."""
+    if section in ("listening", "reading"):
+        results = grade_section(attempt, section_type=section)
+        return {
+            "band": _round_band(results["band_score"]),
+            "correct": results["correct_answers"],
+            "total": results["total_questions"],
+        }
+    if section == "writing":
+        return {"band": _round_band(_writing_band(attempt))}
+    return {"band": _round_band(_speaking_band(attempt))}
+
+
+def update_score_snapshot(attempt, sections=None):
+    """
+    Recompute sections of an attempt's score snapshot and save it.
+
+    Args:
+        attempt: ExamAttempt object
+        sections: Sections to recompute; defaults to every section of the
+            exam type. Sections not listed keep their frozen values.
+
+    Returns:
+        The updated snapshot dict (None if the exam has no mock test)
+    """
+    with transaction.atomic():
+        # Lock the row so writing and speaking tasks can't overwrite each other
+        locked = (
+            ExamAttempt.objects.select_for_update()
+            .select_related("exam__mock_test")
+            .get(pk=attempt.pk)
+        )
+        mock_exam = locked.exam.mock_test
+        if not mock_exam:
+            return None
+
+        exam_sections = EXAM_TYPE_SECTIONS.get(mock_exam.exam_type, ())
+        snapshot = dict(locked.score_snapshot or {})
+        for section in sections or exam_sections:
+            if section in exam_sections:
+                snapshot[section] = build_section_score(locked, section)
+
+        bands = [
+            snapshot[section]["band"]
+            for section in exam_sections
+            if section in snapshot and snapshot[section]["band"] is not None
+        ]
+        # Round to nearest 0.5 (IELTS standard)
+        snapshot["overall"] = round(sum(bands) / len(bands) * 2) / 2 if bands else None
+        snapshot["scored_at"] = timezone.now().isoformat()
+
+        update_fields = {"score_snapshot": snapshot}
+        for section, field in SCORE_FIELDS.items():
+            if section in snapshot:
+                band = snapshot[section]["band"]
+                update_fields[field] = Decimal(str(band)) if band is not None else None
+        overall = snapshot["overall"]
+        update_fields["overall_score"] = (
+            Decimal(str(overall)) if overall is not None else None
+        )
+
+        ExamAttempt.objects.filter(pk=locked.pk).update(**update_fields)
+        bump_attempt_version(ExamAttempt, locked.pk)
+
+    # Keep the caller's instance in sync
+    for field, value in update_fields.items():
+        setattr(attempt, field, value)
+
+    logger.debug(f"Updated score snapshot for ExamAttempt {attempt.pk}: {snapshot}")
+    return snapshot
@@ -0,0 +1,114 @@
+"""
+Cached, student-independent Reading/Listening section payloads.
+
+The parts/passages, test heads, questions, choices and matching options of a
+MockExam section are the same for every student, so they are serialized once
+and cached per MockExam, section and content version (see
+``ielts/answer_key.py``). Each request only overlays the attempt's saved
+answers onto a copy of the cached payload.
+
+Local media URLs are made absolute with the request host, so the host is
+part of the cache key.
+"""
+
+import logging
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .answer_key import get_answer_key, get_content_version
+from .models import Choice, Question, TestHead
+from .serializers import ListeningPartSerializer, ReadingPassageSerializer
+
+logger = logging.getLogger(__name__)
+
+SECTION_PAYLOAD_TIMEOUT = 60 * 60 * 24  # 24 hours; invalidation is version based
+
+SECTION_CONFIG = {
+    "listening": {
+        "relation": "listening_parts",
+        "number_field": "part_number",
+        "serializer": ListeningPartSerializer,
+    },
+    "reading": {
+        "relation": "reading_passages",
+        "number_field": "passage_number",
+        "serializer": ReadingPassageSerializer,
+    },
+}
+
+
+def _load_section_items(mock_exam, section):
+    """Load parts/passages with test heads, questions and choices (4 queries)."""
+    config = SECTION_CONFIG[section]
+    return (
+        getattr(mock_exam, config["relation"])
+        .all()
+        .prefetch_related(
+            Prefetch(
+                "test_heads",
+                queryset=TestHead.objects.prefetch_related(
+                    Prefetch(
+                        "questions",
+                        queryset=Question.objects.prefetch_related(
+                            Prefetch("choices", queryset=Choice.objects.order_by("id"))
+                        ).order_by("order"),
+                    )
+                ).order_by("id"),
+            )
+        )
+        .order_by(config["number_field"])
+    )
+
+
+def build_section_payload(mock_exam, section, request):
+    """
+    Serialize the parts/passages of a section without any student data.
+
+    Every question's ``user_answer`` is left empty; see ``apply_user_answers``.
+    """
+    serializer = SECTION_CONFIG[section]["serializer"](
+        _load_section_items(mock_exam, section),
+        many=True,
+        context={
+            "request": request,
+            "user_answers": {},
+            "answer_key": get_answer_key(mock_exam),
+        },
+    )
+    return serializer.data
+
+
+def _cache_key(mock_exam_id, section, version, request):
+    return (
+        f"section_payload_{mock_exam_id}_{section}_v{version}_"
+        f"{request.build_absolute_uri('/')}"
+    )
+
+
+def get_section_payload(mock_exam, section, request):
+    """
+    Return the student-independent payload of a section, building it on
+    cache miss.
+
+    The cache returns a fresh copy on every call, so callers may modify it.
+
+    Returns:
+        List of serialized parts (listening) or passages (reading)
+    """
+    cache_key = _cache_key(mock_exam.id, section, get_content_version(), request)
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = build_section_payload(mock_exam, section, request)
+        cache.set(cache_key, payload, timeout=SECTION_PAYLOAD_TIMEOUT)
+        logger.debug(f"Rendered {section} payload for MockExam {mock_exam.id}")
+    return payload
+
+
+def apply_user_answers(items, user_answers):
+    """Overlay {question_id: answer_text} onto a section payload in place."""
+    for item in items:
+        for test_head in item["test_heads"]:
+            for question in test_head["questions"]:
+                question["user_answer"] = user_answers.get(question["id"], "")
+    return items
@@ -20,6 +20,12 @@ from .models import (
     SpeakingAttempt,
     SpeakingAnswer,
 )
+from .answer_key import build_entry
+
+
+def _is_prefetched(obj, relation):
+    """Whether `relation` was prefetched on obj (e.g. by build_listening_data)."""
+    return relation in getattr(obj, "_prefetched_objects_cache", {})
 
 
 # ============================================================================
@@ -81,7 +87,10 @@ class ChoiceSerializer(serializers.ModelSerializer):
 
     def get_key(self, obj):
         """Generate letter key (A, B, C, D) for choice."""
-        choices = list(obj.question.choices.all().order_by("id"))
+        if _is_prefetched(obj.question, "choices"):
+            choices = sorted(obj.question.choices.all(), key=lambda c: c.id)
+        else:
+            choices = list(obj.question.choices.all().order_by("id"))
         try:
             index = choices.index(obj)
             return chr(65 + index)  # A=65 in ASCII
@@ -122,11 +131,17 @@ class QuestionSerializer(serializers.ModelSerializer):
             TestHead.QuestionType.MULTIPLE_CHOICE,
             TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS,
         ]:
-            return ChoiceSerializer(obj.choices.all().order_by("id"), many=True).data
+            choices = sorted(obj.choices.all(), key=lambda c: c.id)
+            return ChoiceSerializer(choices, many=True).data
         return []
 
     def get_user_answer(self, obj):
         """Get user's answer for this question if available."""
+        # Answers preloaded by the section builders ({question_id: answer_text})
+        user_answers = self.context.get("user_answers")
+        if user_answers is not None:
+            return user_answers.get(obj.id, "")
+
         request = self.context.get("request")
         if request and hasattr(request, "user"):
             attempt = self.context.get("attempt")
@@ -156,7 +171,9 @@ class QuestionSerializer(serializers.ModelSerializer):
             == TestHead.QuestionType.MULTIPLE_CHOICE_MULTIPLE_ANSWERS
         ):
             # Count the number of correct answers
-            correct_answer = obj.get_correct_answer()
+            answer_key = self.context.get("answer_key") or {}
+            entry = answer_key.get(obj.id) or build_entry(obj)
+            correct_answer = entry["correct_answer"]
             if correct_answer:
                 return len(correct_answer)
         return None
@@ -231,10 +248,10 @@ class TestHeadSerializer(serializers.ModelSerializer):
 
     def get_question_range(self, obj):
         """Get the question number range (e.g., '1-5')."""
-        questions = obj.questions.all().order_by("order")
+        questions = sorted(obj.questions.all(), key=lambda q: q.order)
         if questions:
-            first = questions.first().order
-            last = questions.last().order
+            first = questions[0].order
+            last = questions[-1].order
             return f"{first}-{last}"
         return ""
 
@@ -375,9 +392,14 @@ class ListeningPartSerializer(serializers.ModelSerializer):
 
     def get_test_heads(self, obj):
         """Get test heads with questions."""
-        test_heads = (
-            obj.test_heads.all().prefetch_related("questions__choices").order_by("id")
-        )
+        if _is_prefetched(obj, "test_heads"):
+            test_heads = sorted(obj.test_heads.all(), key=lambda th: th.id)
+        else:
+            test_heads = (
+                obj.test_heads.all()
+                .prefetch_related("questions__choices")
+                .order_by("id")
+            )
         return TestHeadSerializer(test_heads, many=True, context=self.context).data
 
     def get_audio_url(self, obj):
@@ -402,6 +424,8 @@ class ListeningPartSerializer(serializers.ModelSerializer):
 
     def get_total_questions(self, obj):
         """Count total questions in this part."""
+        if _is_prefetched(obj, "test_heads"):
+            return sum(len(th.questions.all()) for th in obj.test_heads.all())
         return (
             obj.test_heads.aggregate(total=serializers.models.Count("questions"))[
                 "total"
@@ -436,13 +460,20 @@ class ReadingPassageSerializer(serializers.ModelSerializer):
 
     def get_test_heads(self, obj):
         """Get test heads with questions."""
-        test_heads = (
-            obj.test_heads.all().prefetch_related("questions__choices").order_by("id")
-        )
+        if _is_prefetched(obj, "test_heads"):
+            test_heads = sorted(obj.test_heads.all(), key=lambda th: th.id)
+        else:
+            test_heads = (
+                obj.test_heads.all()
+                .prefetch_related("questions__choices")
+                .order_by("id")
+            )
         return TestHeadSerializer(test_heads, many=True, context=self.context).data
 
     def get_total_questions(self, obj):
         """Count total questions in this passage."""
+        if _is_prefetched(obj, "test_heads"):
+            return sum(len(th.questions.all()) for th in obj.test_heads.all())
         return (
             obj.test_heads.aggregate(total=serializers.models.Count("questions"))[
                 "total"
@@ -912,6 +943,28 @@ class AnswerSubmissionSerializer(serializers.Serializer):
         return value
 
 
+class BatchAnswerSubmissionSerializer(serializers.Serializer):
+    """Serializer for batched answer submissions ({question_id: answer})."""
+
+    MAX_ANSWERS = 200
+
+    answers = serializers.DictField(
+        child=serializers.CharField(allow_blank=True, max_length=255),
+        allow_empty=False,
+    )
+
+    def validate_answers(self, value):
+        """Validate question ids and batch size."""
+        if len(value) > self.MAX_ANSWERS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_ANSWERS} answers can be submitted at once."
+            )
+        try:
+            return {int(question_id): answer for question_id, answer in value.items()}
+        except (TypeError, ValueError):
+            raise serializers.ValidationError("Question ids must be integers.")
+
+
 class WritingSubmissionSerializer(serializers.Serializer):
     """Serializer for writing submissions."""
 
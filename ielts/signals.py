@@ -0,0 +1,92 @@
+"""
+Signal handlers for the IELTS app.
+
+Keep compiled exam artefacts (answer keys, cached section payloads) in sync
+with the content they were built from, and invalidate the ETags of attempt
+responses when the attempt's data changes.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from teacher.models import TeacherExamAttempt, TeacherUserAnswer
+
+from .answer_key import bump_content_version
+from .etags import bump_attempt_version
+from .models import (
+    Choice,
+    ExamAttempt,
+    ListeningPart,
+    MockExam,
+    Question,
+    ReadingPassage,
+    SpeakingAttempt,
+    SpeakingTopic,
+    TestHead,
+    UserAnswer,
+    WritingAttempt,
+    WritingTask,
+)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+@receiver(post_save, sender=TestHead)
+@receiver(post_delete, sender=TestHead)
+def invalidate_answer_keys_on_content_change(sender, **kwargs):
+    """Invalidate compiled answer keys when questions or choices change."""
+    bump_content_version()
+
+
+@receiver(m2m_changed, sender=MockExam.listening_parts.through)
+@receiver(m2m_changed, sender=MockExam.reading_passages.through)
+def invalidate_answer_keys_on_exam_change(sender, action, **kwargs):
+    """Invalidate compiled answer keys when an exam's sections change."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_content_version()
+
+
+@receiver(post_save, sender=ListeningPart)
+@receiver(post_delete, sender=ListeningPart)
+@receiver(post_save, sender=ReadingPassage)
+@receiver(post_delete, sender=ReadingPassage)
+def invalidate_section_payloads_on_section_change(sender, **kwargs):
+    """Invalidate cached section payloads when a part or passage changes."""
+    bump_content_version()
+
+
+@receiver(post_save, sender=MockExam)
+@receiver(post_save, sender=WritingTask)
+@receiver(post_delete, sender=WritingTask)
+@receiver(post_save, sender=SpeakingTopic)
+@receiver(post_delete, sender=SpeakingTopic)
+def invalidate_etags_on_exam_change(sender, **kwargs):
+    """Exam titles, writing prompts and speaking topics are shown in results."""
+    bump_content_version()
+
+
+@receiver(post_save, sender=ExamAttempt)
+@receiver(post_save, sender=TeacherExamAttempt)
+def invalidate_etags_on_attempt_change(sender, instance, **kwargs):
+    """Invalidate ETags of an attempt's responses when the attempt changes."""
+    bump_attempt_version(sender, instance.pk)
+
+
+@receiver(post_save, sender=UserAnswer)
+@receiver(post_delete, sender=UserAnswer)
+@receiver(post_save, sender=WritingAttempt)
+@receiver(post_delete, sender=WritingAttempt)
+@receiver(post_save, sender=SpeakingAttempt)
+@receiver(post_delete, sender=SpeakingAttempt)
+def invalidate_etags_on_answer_change(sender, instance, **kwargs):
+    """Invalidate ETags of an attempt's responses when its answers change."""
+    bump_attempt_version(ExamAttempt, instance.exam_attempt_id)
+
+
+@receiver(post_save, sender=TeacherUserAnswer)
+@receiver(post_delete, sender=TeacherUserAnswer)
+def invalidate_etags_on_teacher_answer_change(sender, instance, **kwargs):
+    """Invalidate ETags of a teacher exam attempt when its answers change."""
+    bump_attempt_version(TeacherExamAttempt, instance.exam_attempt_id)
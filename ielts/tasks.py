@@ -3,7 +3,6 @@ Celery tasks for IELTS exam processing.
 """
 
 import logging
-import os
 from celery import shared_task
 from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
@@ -31,6 +30,7 @@ def process_writing_check_task(self, writing_attempt_id: int):
     """
     from ielts.models import WritingAttempt
     from ai.writing_checker import check_writing, extract_band_score
+    from ielts.score_snapshot import update_score_snapshot
 
     try:
         # Retrieve the WritingAttempt by UUID or integer ID for compatibility
@@ -91,6 +91,12 @@ def process_writing_check_task(self, writing_attempt_id: int):
         writing_attempt.evaluated_at = timezone.now()
         writing_attempt.save()
 
+        # Update exam attempt writing score and score snapshot
+        try:
+            update_score_snapshot(writing_attempt.exam_attempt, sections=["writing"])
+        except Exception as snapshot_exc:
+            logger.error(f"Failed to update score snapshot: {snapshot_exc}")
+
         logger.info(
             f"Successfully completed writing check for WritingAttempt ID: {writing_attempt_id}. "
             f"Band Score: {writing_attempt.ai_band_score}"
@@ -206,6 +212,52 @@ def process_writing_check_task(self, writing_attempt_id: int):
             raise
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def normalize_speaking_answer_task(self, speaking_answer_id: int, audio_name: str):
+    """
+    Produce the 16 kHz mono WAV of an uploaded speaking answer.
+
+    submit_speaking stores the recording as uploaded (WebM, OGG, ...) and
+    queues this task, so ffmpeg runs on a worker instead of in the request.
+    The WAV is recorded in SpeakingAnswer.normalized_audio, but only while
+    audio_name is still the answer's recording: a conversion finishing after
+    the student re-recorded is discarded.
+
+    Args:
+        speaking_answer_id: ID of the SpeakingAnswer
+        audio_name: Storage name of the uploaded recording
+
+    Returns:
+        dict: Result status and the WAV's storage name
+    """
+    from ai.audio_pipeline import AudioConversionError, store_wav_derivative
+    from ielts.models import SpeakingAnswer
+
+    try:
+        wav_name = store_wav_derivative(audio_name)
+    except AudioConversionError as e:
+        # Undecodable uploads won't convert on retry; evaluation falls back
+        # to the original recording
+        logger.error(f"Audio normalization failed for {audio_name}: {e}")
+        return {"status": "failed", "error": str(e)}
+    except Exception as exc:
+        logger.exception(f"Error normalizing speaking answer {speaking_answer_id}")
+        raise self.retry(exc=exc)
+
+    updated = SpeakingAnswer.objects.filter(
+        id=speaking_answer_id, audio_file=audio_name
+    ).update(normalized_audio=wav_name)
+    if not updated:
+        logger.info(
+            f"Speaking answer {speaking_answer_id} changed, discarding {wav_name}"
+        )
+        default_storage.delete(wav_name)
+        return {"status": "stale"}
+
+    logger.info(f"Normalized speaking answer {speaking_answer_id}: {wav_name}")
+    return {"status": "success", "normalized_audio": wav_name}
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
     """
@@ -213,7 +265,7 @@ def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
 
     This task:
     1. Retrieves the SpeakingAttempt and all associated SpeakingAnswers
-    2. Downloads audio files from storage
+    2. Collects the audio files in storage (streamed to ffmpeg, not downloaded)
     3. Transcribes audio using Azure Speech Recognition
     4. Evaluates transcripts using Gemini AI with IELTS criteria
     5. Stores results in database
@@ -227,9 +279,9 @@ def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
     """
     from ielts.models import SpeakingAttempt, SpeakingAnswer
     from ai.speaking_evaluator import evaluate_speaking_attempt
+    from ielts.score_snapshot import update_score_snapshot
+    from ai.audio_pipeline import StoredAudio
     from decimal import Decimal
-    import tempfile
-    import subprocess
 
     try:
         # Retrieve the SpeakingAttempt
@@ -266,7 +318,6 @@ def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
         # Prepare audio files and questions
         audio_files = {}
         questions = []
-        temp_files = []  # Track temporary files for cleanup
 
         for answer in speaking_answers:
             question_id = str(answer.question.id)
@@ -278,89 +329,16 @@ def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
                 f"audio_file.name={answer.audio_file.name if answer.audio_file else 'N/A'}"
             )
 
-            # Download audio file to temporary location
+            # Recordings are streamed from storage into ffmpeg during
+            # transcription, so nothing is downloaded here. The normalized WAV
+            # is used once normalize_speaking_answer_task has produced it.
             if answer.audio_file and answer.audio_file.name:
-                try:
-                    # Create temporary file for original audio
-                    file_ext = os.path.splitext(answer.audio_file.name)[1]
-                    temp_file = tempfile.NamedTemporaryFile(
-                        delete=False, suffix=file_ext
-                    )
-                    temp_files.append(temp_file.name)
-
-                    # Download from storage
-                    if default_storage.exists(answer.audio_file.name):
-                        with default_storage.open(
-                            answer.audio_file.name, "rb"
-                        ) as audio_file:
-                            temp_file.write(audio_file.read())
-                        temp_file.close()
-
-                        # Files should already be converted to WAV on upload
-                        # But keep fallback conversion for legacy files
-                        final_audio_path = temp_file.name
-                        if file_ext.lower() not in [".wav"]:
-                            logger.warning(
-                                f"Non-WAV file detected ({file_ext}) for question {question_id}. "
-                                "Files should be converted on upload. Attempting conversion..."
-                            )
-                            try:
-                                # Create WAV file
-                                wav_file = tempfile.NamedTemporaryFile(
-                                    delete=False, suffix=".wav"
-                                )
-                                temp_files.append(wav_file.name)
-                                wav_file.close()
-
-                                # Use ffmpeg to convert
-                                ffmpeg_cmd = [
-                                    "ffmpeg",
-                                    "-i",
-                                    temp_file.name,
-                                    "-ar",
-                                    "16000",
-                                    "-ac",
-                                    "1",
-                                    "-sample_fmt",
-                                    "s16",
-                                    "-y",
-                                    wav_file.name,
-                                ]
-
-                                result = subprocess.run(
-                                    ffmpeg_cmd,
-                                    capture_output=True,
-                                    text=True,
-                                    timeout=30,
-                                )
-
-                                if result.returncode == 0:
-                                    final_audio_path = wav_file.name
-                                    logger.info(
-                                        f"Converted to WAV for question {question_id}"
-                                    )
-                                else:
-                                    logger.error(f"ffmpeg failed: {result.stderr}")
-
-                            except Exception as conv_error:
-                                logger.error(f"Conversion failed: {str(conv_error)}")
-
-                        audio_files[question_id] = final_audio_path
-                        questions.append(
-                            {"id": answer.question.id, "text": question_text}
-                        )
-
-                        logger.info(f"Downloaded audio for question {question_id}")
-                    else:
-                        logger.warning(
-                            f"Audio file not found in storage: {answer.audio_file.name}"
-                        )
-
-                except Exception as e:
-                    logger.error(
-                        f"Error downloading audio for question {question_id}: {str(e)}"
-                    )
-                    continue
+                audio_name = answer.normalized_audio.name or answer.audio_file.name
+                if default_storage.exists(audio_name):
+                    audio_files[question_id] = StoredAudio(audio_name)
+                    questions.append({"id": answer.question.id, "text": question_text})
+                else:
+                    logger.warning(f"Audio file not found in storage: {audio_name}")
             else:
                 logger.warning(
                     f"Skipping question {question_id}: audio_file field is empty or has no name"
@@ -404,14 +382,6 @@ def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
             audio_files=audio_files, questions=questions, part_type=part_type
         )
 
-        # Clean up temporary files
-        for temp_file in temp_files:
-            try:
-                if os.path.exists(temp_file):
-                    os.unlink(temp_file)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp file {temp_file}: {str(e)}")
-
         if not evaluation_result.get("success"):
             # Handle incomplete test case
             if evaluation_result.get("is_partial"):
@@ -519,11 +489,11 @@ def evaluate_speaking_attempt_task(self, speaking_attempt_id: int):
         speaking_attempt.evaluated_at = timezone.now()
         speaking_attempt.save()
 
-        # Update exam attempt speaking score
-        exam_attempt = speaking_attempt.exam_attempt
-        exam_attempt.speaking_score = speaking_attempt.band_score
-        exam_attempt.overall_score = exam_attempt.calculate_overall_score()
-        exam_attempt.save(update_fields=["speaking_score", "overall_score"])
+        # Update exam attempt speaking score and score snapshot
+        try:
+            update_score_snapshot(speaking_attempt.exam_attempt, sections=["speaking"])
+        except Exception as snapshot_exc:
+            logger.error(f"Failed to update score snapshot: {snapshot_exc}")
 
         logger.info(
             f"Successfully completed speaking evaluation for SpeakingAttempt ID: {speaking_attempt_id}. "
@@ -968,3 +938,27 @@ def batch_precompute_active_users_analytics():
         "status": "success",
         "users_scheduled": scheduled_count,
     }
+
+
+@shared_task
+def flush_answer_buffers_task():
+    """
+    Persist write-behind answer buffers to the database.
+
+    Scheduled by Celery beat every ANSWER_FLUSH_INTERVAL seconds; does nothing
+    unless ANSWER_WRITE_BEHIND is enabled.
+    """
+    from ielts.answer_buffer import flush_dirty_attempts, is_write_behind_enabled
+
+    if not is_write_behind_enabled():
+        return {"status": "disabled"}
+
+    flushed, saved = flush_dirty_attempts()
+    if flushed:
+        logger.info(f"Flushed {saved} buffered answers from {flushed} attempts")
+
+    return {
+        "status": "success",
+        "attempts_flushed": flushed,
+        "answers_saved": saved,
+    }
@@ -1,3 +1,263 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+from . import answer_buffer
+from .grading import grade_section
+from .models import (
+    Choice,
+    Exam,
+    ExamAttempt,
+    ListeningPart,
+    MockExam,
+    Question,
+    ReadingPassage,
+    TestHead,
+    UserAnswer,
+)
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "dashboard": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SectionResultsQueryCountTest(TestCase):
+    """The results engine must not issue queries per part/test head/question."""
+
+    def setUp(self):
+        cache.clear()
+        self.mock_exam = MockExam.objects.create(
+            title="Mock", exam_type="LISTENING_READING"
+        )
+        for part_number in range(1, 5):
+            part = ListeningPart.objects.create(
+                part_number=part_number, title=f"Part {part_number}"
+            )
+            self.mock_exam.listening_parts.add(part)
+            self._add_questions(listening=part)
+        for passage_number in range(1, 4):
+            passage = ReadingPassage.objects.create(
+                passage_number=passage_number, content="Passage"
+            )
+            self.mock_exam.reading_passages.add(passage)
+            self._add_questions(reading=passage)
+
+        student = User.objects.create_user(
+            username="student", password="password", email="student@example.com"
+        )
+        exam = Exam.objects.create(
+            mock_test=self.mock_exam,
+            name="Exam",
+            start_date=timezone.now(),
+            expire_date=timezone.now() + timedelta(days=1),
+            pin_code="123456",
+        )
+        self.attempt = ExamAttempt.objects.create(
+            student=student, exam=exam, status="COMPLETED"
+        )
+        for question in Question.objects.all():
+            UserAnswer.objects.create(
+                exam_attempt=self.attempt, question=question, answer_text="A"
+            )
+
+    def _add_questions(self, **section):
+        text_head = TestHead.objects.create(question_type="SA", **section)
+        for order in range(1, 6):
+            Question.objects.create(
+                test_head=text_head, order=order, correct_answer_text="a|b"
+            )
+        choice_head = TestHead.objects.create(question_type="MCMA", **section)
+        question = Question.objects.create(test_head=choice_head, order=6)
+        for index in range(5):
+            Choice.objects.create(
+                question=question, choice_text=str(index), is_correct=index < 2
+            )
+
+    def test_query_count_is_constant(self):
+        attempt = ExamAttempt.objects.select_related("exam__mock_test").get(
+            id=self.attempt.id
+        )
+
+        # Parts, test heads, questions and answers; the answer key was
+        # compiled while saving the answers. A cold key adds two queries.
+        with self.assertNumQueries(4):
+            listening = grade_section(attempt, "listening")
+        cache.clear()
+        with self.assertNumQueries(6):
+            reading = grade_section(attempt, "reading")
+
+        self.assertEqual(listening["total_questions"], 28)
+        self.assertEqual(listening["correct_answers"], 24)
+        self.assertEqual(len(listening["answer_groups"]), 8)
+        self.assertEqual(listening["part_stats"]["Part 1"], {"correct": 6, "total": 7})
+        self.assertEqual(reading["total_questions"], 21)
+        self.assertEqual(reading["correct_answers"], 18)
+        self.assertNotIn("part_stats", reading)
+
+
+class _FakeRedis:
+    """In-memory stand-in for the Redis commands the answer buffer uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def eval(self, script, numkeys, key, token):
+        # Only the lock release script is used
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(
+            {field: value.encode() for field, value in mapping.items()}
+        )
+
+    def hsetnx(self, key, field, value):
+        self.data.setdefault(key, {}).setdefault(field, value.encode())
+
+    def hgetall(self, key):
+        return {field.encode(): v for field, v in self.data.get(key, {}).items()}
+
+    def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+    def expire(self, key, timeout):
+        pass
+
+    def sadd(self, key, member):
+        self.data.setdefault(key, set()).add(member.encode())
+
+    def srem(self, key, member):
+        self.data.get(key, set()).discard(member.encode())
+
+    def spop(self, key, count):
+        members = list(self.data.get(key, set()))[:count]
+        self.data.get(key, set()).difference_update(members)
+        return members
+
+
+class _FakePipeline:
+    def __init__(self, conn):
+        self.conn = conn
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+
+        return command
+
+    def execute(self):
+        return [
+            getattr(self.conn, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+@override_settings(CACHES=LOCMEM_CACHES, ANSWER_WRITE_BEHIND=True)
+class AnswerBufferFlushTest(TestCase):
+    """Buffered answers must be saved, in order, before an attempt is graded."""
+
+    def setUp(self):
+        cache.clear()
+        mock_exam = MockExam.objects.create(title="Mock", exam_type="LISTENING")
+        part = ListeningPart.objects.create(part_number=1, title="Part 1")
+        mock_exam.listening_parts.add(part)
+        test_head = TestHead.objects.create(question_type="SA", listening=part)
+        self.questions = [
+            Question.objects.create(
+                test_head=test_head, order=order, correct_answer_text="a"
+            )
+            for order in range(1, 4)
+        ]
+        self.student = User.objects.create_user(
+            username="student", password="password", email="student@example.com"
+        )
+        exam = Exam.objects.create(
+            mock_test=mock_exam,
+            name="Exam",
+            start_date=timezone.now(),
+            expire_date=timezone.now() + timedelta(days=1),
+            pin_code="123456",
+        )
+        self.attempt = ExamAttempt.objects.create(
+            student=self.student,
+            exam=exam,
+            status="IN_PROGRESS",
+            current_section="listening",
+        )
+        self.conn = _FakeRedis()
+        patcher = mock.patch.object(
+            answer_buffer, "_get_connection", return_value=self.conn
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ref = answer_buffer._attempt_ref(self.attempt)
+
+    def _saved_answers(self):
+        return dict(
+            UserAnswer.objects.filter(exam_attempt=self.attempt).values_list(
+                "question_id", "answer_text"
+            )
+        )
+
+    def test_flush_waits_for_flush_in_progress(self):
+        first, second, _ = self.questions
+        answer_buffer.buffer_answers(self.attempt, {first.id: "old", second.id: "a"})
+
+        # The periodic flush has taken the buffer but not saved it yet
+        token = answer_buffer._acquire_lock(self.conn, self.ref)
+        in_flight = answer_buffer._take_buffer(self.conn, self.ref)
+        answer_buffer.buffer_answers(self.attempt, {first.id: "new"})
+
+        def finish_periodic_flush(seconds):
+            answer_buffer.save_answers(self.attempt, in_flight)
+            answer_buffer._release_lock(self.conn, self.ref, token)
+
+        with mock.patch.object(
+            answer_buffer.time, "sleep", side_effect=finish_periodic_flush
+        ) as sleep:
+            answer_buffer.flush_attempt_answers(self.attempt)
+
+        sleep.assert_called_once()
+        self.assertEqual(self._saved_answers(), {first.id: "new", second.id: "a"})
+
+    def test_periodic_flush_skips_locked_attempt(self):
+        answer_buffer.buffer_answers(self.attempt, {self.questions[0].id: "a"})
+        answer_buffer._acquire_lock(self.conn, self.ref)
+
+        self.assertEqual(answer_buffer.flush_dirty_attempts(), (0, 0))
+        self.assertEqual(self._saved_answers(), {})
+        self.assertIn(self.ref.encode(), self.conn.data[answer_buffer.DIRTY_SET_KEY])
+
+    def test_submit_is_refused_when_answers_cannot_be_flushed(self):
+        answer_buffer.buffer_answers(self.attempt, {self.questions[0].id: "a"})
+        answer_buffer._acquire_lock(self.conn, self.ref)
+
+        client = APIClient()
+        client.force_authenticate(self.student)
+        with mock.patch.object(answer_buffer, "LOCK_WAIT", 0):
+            response = client.post(f"/exams/api/attempt/{self.attempt.uuid}/submit/")
+
+        self.assertEqual(response.status_code, 503)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, "IN_PROGRESS")
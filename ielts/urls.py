@@ -111,6 +111,11 @@ urlpatterns = [
         api_views.submit_answer,
         name="api_submit_answer",
     ),
+    path(
+        "api/attempt/<str:attempt_id>/submit-answers/",
+        api_views.submit_answers,
+        name="api_submit_answers",
+    ),
     path(
         "api/attempt/<str:attempt_id>/submit-writing/",
         api_views.submit_writing,
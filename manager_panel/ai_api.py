@@ -3,6 +3,8 @@ AI Content Generation API Views
 Handles PDF upload and AI-powered content extraction for IELTS tests.
 """
 
+import logging
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -21,14 +23,7 @@ from ielts.models import (
     Question,
     Choice,
 )
-from ai.content_generator import (
-    detect_content_type_from_pdf,
-    generate_reading_passages_from_pdf,
-    generate_listening_parts_from_pdf,
-    generate_writing_tasks_from_pdf,
-    generate_speaking_topics_from_pdf,
-    generate_cambridge_full_test_from_pdf,
-)
+from manager_panel.models import ContentExtractionJob
 from ai.tts_generator import (
     AzureTTSGenerator,
     generate_speaking_question_audio,
@@ -36,6 +31,8 @@ from ai.tts_generator import (
     batch_generate_speaking_audio,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def check_manager_permission(user):
     """Check if user has manager/admin permissions"""
@@ -44,11 +41,79 @@ def check_manager_permission(user):
     return user.role in ["MANAGER"]
 
 
+CONTENT_TYPES = ("reading", "listening", "writing", "speaking")
+
+
+def _serialize_extraction_job(job, include_result=True):
+    """Job payload for the manager UI; completed jobs carry the extracted data."""
+    data = {
+        "job_id": str(job.uuid),
+        "job_type": job.job_type,
+        "status": job.status,
+        "progress": job.progress,
+        "stage": job.stage,
+        "content_type": job.content_type,
+        "requested_content_type": job.requested_content_type,
+        "file_name": job.file_name,
+        "created_by": job.created_by.username if job.created_by else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at,
+    }
+    if not include_result:
+        return data
+
+    if job.status == ContentExtractionJob.Status.COMPLETED:
+        data["success"] = True
+        data["data"] = job.result
+        data["message"] = (
+            "Full test content extracted successfully. Review and save sections."
+            if job.job_type == ContentExtractionJob.JobType.FULL_TEST
+            else "Content extracted successfully. Please review before saving."
+        )
+    elif job.status == ContentExtractionJob.Status.FAILED:
+        data["success"] = False
+        data["error"] = job.error
+        data["details"] = job.result
+    elif job.result:
+        data["partial_result"] = job.result
+    return data
+
+
+def _queue_extraction_job(request, job_type, requested_content_type=""):
+    """Store the uploaded PDF, create a job for it and queue the extraction."""
+    from .tasks import run_content_extraction_job
+
+    pdf_file = request.FILES["pdf_file"]
+    job = ContentExtractionJob.objects.create(
+        created_by=request.user,
+        job_type=job_type,
+        requested_content_type=requested_content_type,
+        source_file=pdf_file,
+        file_name=pdf_file.name,
+        mime_type=pdf_file.content_type
+        or ("application/pdf" if pdf_file.name.endswith(".pdf") else "text/html"),
+    )
+
+    try:
+        run_content_extraction_job.delay(job.id)
+    except Exception as e:
+        logger.error(f"Failed to queue content extraction job {job.uuid}: {e}")
+        job.status = ContentExtractionJob.Status.FAILED
+        job.error = "Could not queue the extraction. Please try again."
+        job.save(update_fields=["status", "error"])
+        return Response(
+            _serialize_extraction_job(job), status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    return Response(_serialize_extraction_job(job), status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def generate_content_from_pdf(request):
     """
-    Generate IELTS content from PDF using AI.
+    Start extracting IELTS content from a PDF using AI.
 
     POST /manager/api/tests/ai-generate/
 
@@ -56,9 +121,9 @@ def generate_content_from_pdf(request):
         - pdf_file: PDF file
         - content_type: reading | listening | writing | speaking | auto
 
-    Returns:
-        - Extracted content data (not yet saved to database)
-        - Admin can review and then save
+    Returns (202):
+        - Extraction job; poll GET /manager/api/tests/ai-jobs/<job_id>/ for
+          progress and the extracted content (not yet saved to database)
     """
     if not check_manager_permission(request.user):
         return Response(
@@ -82,66 +147,81 @@ def generate_content_from_pdf(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Read PDF bytes
-    pdf_bytes = pdf_file.read()
-    pdf_mime_type = pdf_file.content_type or (
-        "application/pdf" if pdf_file.name.endswith(".pdf") else "text/html"
+    if content_type != "auto" and content_type not in CONTENT_TYPES:
+        return Response(
+            {"error": f"Invalid content type: {content_type}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return _queue_extraction_job(
+        request, ContentExtractionJob.JobType.CONTENT, content_type
     )
 
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_extraction_jobs(request):
+    """
+    List recent content extraction jobs, newest first.
+
+    GET /manager/api/tests/ai-jobs/
+
+    Query params:
+        - status: pending | running | completed | failed (optional)
+        - limit: Number of jobs (default 50, max 200)
+    """
+    if not check_manager_permission(request.user):
+        return Response(
+            {"error": "Manager permissions required"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    jobs = ContentExtractionJob.objects.select_related("created_by").defer("result")
+    job_status = request.query_params.get("status")
+    if job_status:
+        jobs = jobs.filter(status=job_status)
     try:
-        # Auto-detect content type if requested
-        if content_type == "auto":
-            detection_result = detect_content_type_from_pdf(pdf_bytes, pdf_mime_type)
-            if detection_result.get("content_type") != "unknown":
-                content_type = detection_result["content_type"]
-            else:
-                return Response(
-                    {
-                        "error": "Could not automatically detect content type. Please specify manually.",
-                        "detection_result": detection_result,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        limit = min(int(request.query_params.get("limit", 50)), 200)
+    except ValueError:
+        limit = 50
 
-        # Generate content based on type
-        if content_type == "reading":
-            result = generate_reading_passages_from_pdf(pdf_bytes, pdf_mime_type)
-        elif content_type == "listening":
-            result = generate_listening_parts_from_pdf(pdf_bytes, pdf_mime_type)
-        elif content_type == "writing":
-            result = generate_writing_tasks_from_pdf(pdf_bytes, pdf_mime_type)
-        elif content_type == "speaking":
-            result = generate_speaking_topics_from_pdf(pdf_bytes, pdf_mime_type)
-        else:
-            return Response(
-                {"error": f"Invalid content type: {content_type}"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    jobs = list(jobs[:limit])
+    for job in jobs:
+        job.fail_if_stale()
 
-        if result.get("success"):
-            return Response(
-                {
-                    "success": True,
-                    "content_type": content_type,
-                    "data": result,
-                    "message": "Content extracted successfully. Please review before saving.",
-                }
-            )
-        else:
-            return Response(
-                {
-                    "error": result.get("error", "Failed to extract content"),
-                    "details": result,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+    return Response(
+        {"jobs": [_serialize_extraction_job(job, include_result=False) for job in jobs]}
+    )
 
-    except Exception as e:
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_extraction_job(request, job_id):
+    """
+    Get a content extraction job's progress, or its result once finished.
+
+    GET /manager/api/tests/ai-jobs/<job_id>/
+    """
+    if not check_manager_permission(request.user):
         return Response(
-            {"error": f"Error processing PDF: {str(e)}"},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            {"error": "Manager permissions required"},
+            status=status.HTTP_403_FORBIDDEN,
         )
 
+    job = (
+        ContentExtractionJob.objects.select_related("created_by")
+        .filter(uuid=job_id)
+        .first()
+    )
+    if job is None:
+        return Response(
+            {"error": "Extraction job not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    job.fail_if_stale()
+    return Response(_serialize_extraction_job(job))
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -668,16 +748,17 @@ def upload_audio_temp(request):
 @permission_classes([IsAuthenticated])
 def generate_full_test_from_pdf(request):
     """
-    Generate COMPLETE IELTS test(s) from a Cambridge IELTS book PDF or similar.
-    Extracts all sections: Listening, Reading, Writing, Speaking in one request.
+    Start extracting COMPLETE IELTS test(s) from a Cambridge IELTS book PDF or similar.
+    Extracts all sections: Listening, Reading, Writing, Speaking.
 
     POST /manager/api/tests/ai-generate-full/
 
     Body (multipart/form-data):
         - pdf_file: PDF file (Cambridge IELTS book or similar)
 
-    Returns:
-        - Complete test data with all sections for multiple tests
+    Returns (202):
+        - Extraction job; poll GET /manager/api/tests/ai-jobs/<job_id>/ for
+          progress and the complete test data once extracted
     """
     if not check_manager_permission(request.user):
         return Response(
@@ -700,57 +781,7 @@ def generate_full_test_from_pdf(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    # Read PDF bytes
-    pdf_bytes = pdf_file.read()
-    pdf_mime_type = pdf_file.content_type or (
-        "application/pdf" if pdf_file.name.endswith(".pdf") else "text/html"
-    )
-
-    try:
-        result = generate_cambridge_full_test_from_pdf(pdf_bytes, pdf_mime_type)
-
-        if result.get("success"):
-            return Response(
-                {
-                    "success": True,
-                    "content_type": "full_test",
-                    "data": result,
-                    "message": "Full test content extracted successfully. Review and save sections.",
-                }
-            )
-        else:
-            return Response(
-                {
-                    "error": result.get("error", "Failed to extract content"),
-                    "details": result,
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-    except ValueError as e:
-        # Configuration error (missing API key, etc.)
-        return Response(
-            {
-                "error": "AI Configuration Error",
-                "message": str(e),
-                "details": "Please check your AI configuration in the manager panel or ensure GEMINI_API_KEY is set in environment variables.",
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
-    except Exception as e:
-        import traceback
-
-        error_traceback = traceback.format_exc()
-        print(f"AI Generate Full Test Error: {error_traceback}")
-
-        return Response(
-            {
-                "error": f"Error processing PDF: {str(e)}",
-                "error_type": type(e).__name__,
-                "details": "Check server logs for more information. Common issues: 1) Missing GEMINI_API_KEY, 2) Network connectivity to Google API, 3) Invalid PDF format.",
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        )
+    return _queue_extraction_job(request, ContentExtractionJob.JobType.FULL_TEST)
 
 
 @api_view(["POST"])
@@ -0,0 +1,105 @@
+"""
+Cached lookup of the primary AI configuration.
+
+Every AI request needs the primary ``AIConfiguration`` (provider, model and
+API key), which used to be a database query per call, sometimes two. The
+configuration is now kept in two layers:
+
+- the Django cache (Redis), shared by all web and Celery processes, under a
+  key that includes a global configuration version;
+- a per-process copy, which is trusted for ``AI_CONFIG_LOCAL_TTL`` seconds
+  before the shared version is checked again.
+
+The version is bumped whenever an AIConfiguration is saved or deleted (see
+``manager_panel/signals.py``), so changes made in the manager panel reach
+every process within ``AI_CONFIG_LOCAL_TTL`` seconds. Usage counters are
+updated with queryset updates and don't invalidate the cache.
+"""
+
+import logging
+import threading
+import time
+
+from decouple import config
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CONFIG_VERSION_KEY = "ai_config_version"
+PRIMARY_CONFIG_TIMEOUT = 60 * 60 * 24  # 24 hours; invalidation is version based
+
+# How long a process uses its copy without checking the shared version
+AI_CONFIG_LOCAL_TTL = config("AI_CONFIG_LOCAL_TTL", default=5, cast=float)
+
+# Cached in place of None so "no primary configuration" is cached too
+_NO_CONFIG = "none"
+
+_local = {"version": None, "config": None, "checked_at": 0.0}
+_local_lock = threading.Lock()
+
+
+def get_config_version():
+    """Return the current AI configuration version (starts at 1)."""
+    version = cache.get(CONFIG_VERSION_KEY)
+    if version is None:
+        cache.add(CONFIG_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CONFIG_VERSION_KEY) or 1
+    return version
+
+
+def bump_config_version():
+    """Invalidate the cached primary configuration in every process."""
+    try:
+        version = cache.incr(CONFIG_VERSION_KEY)
+    except ValueError:
+        # Key does not exist yet (or was evicted)
+        version = 2
+        cache.set(CONFIG_VERSION_KEY, version, timeout=None)
+    with _local_lock:
+        _local["checked_at"] = 0.0
+    return version
+
+
+def _primary_config_key(version):
+    return f"ai_primary_config_v{version}"
+
+
+def _load_primary_config(version):
+    from .models import AIConfiguration
+
+    key = _primary_config_key(version)
+    cached = cache.get(key)
+    if cached is not None:
+        return None if cached == _NO_CONFIG else cached
+
+    primary = AIConfiguration.get_primary_config()
+    cache.set(key, primary or _NO_CONFIG, timeout=PRIMARY_CONFIG_TIMEOUT)
+    return primary
+
+
+def get_cached_primary_config():
+    """
+    Return the primary active AIConfiguration (or None) from cache.
+
+    The returned instance is shared; don't modify and save it.
+    """
+    now = time.monotonic()
+    if now - _local["checked_at"] < AI_CONFIG_LOCAL_TTL:
+        return _local["config"]
+
+    try:
+        version = get_config_version()
+        if version == _local["version"]:
+            primary = _local["config"]
+        else:
+            primary = _load_primary_config(version)
+    except Exception as e:
+        # Cache backend down: fall back to the database
+        from .models import AIConfiguration
+
+        logger.warning(f"AI configuration cache unavailable: {e}")
+        return AIConfiguration.get_primary_config()
+
+    with _local_lock:
+        _local.update(version=version, config=primary, checked_at=now)
+    return primary
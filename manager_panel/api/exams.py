@@ -1029,25 +1029,10 @@ def evaluate_writing_submission(request, attempt_id, task_id):
     # Refresh from database to get the calculated band_score
     writing_attempt.refresh_from_db()
 
-    # Update ExamAttempt with writing scores
-    from ielts.models import WritingAttempt as WA
-    from decimal import Decimal
-
-    # Calculate average writing score from all completed writing tasks
-    completed_writing_attempts = WA.objects.filter(
-        exam_attempt=attempt, evaluation_status=WA.EvaluationStatus.COMPLETED
-    ).exclude(band_score__isnull=True)
-
-    if completed_writing_attempts.exists():
-        # Sum Decimal values directly without converting to float
-        total_score = sum(wa.band_score for wa in completed_writing_attempts)
-        avg_writing_score = total_score / completed_writing_attempts.count()
-        # Round to nearest 0.5
-        attempt.writing_score = round(avg_writing_score * 2) / 2
-
-        # Recalculate overall score
-        attempt.overall_score = attempt.calculate_overall_score()
-        attempt.save()
+    # Update ExamAttempt writing/overall scores and its score snapshot
+    from ielts.score_snapshot import update_score_snapshot
+
+    update_score_snapshot(attempt, sections=["writing"])
 
     return Response(
         {
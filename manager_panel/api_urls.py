@@ -76,6 +76,8 @@ from .ai_api import (
     save_generated_content,
     upload_audio_temp,
     generate_full_test_from_pdf,
+    get_extraction_jobs,
+    get_extraction_job,
     save_full_test_content,
     upload_batch_audio,
     create_section_practice,
@@ -520,6 +522,12 @@ urlpatterns = [
         name="ai_generate_full_test",
     ),
     path("tests/ai-save-full/", save_full_test_content, name="ai_save_full_test"),
+    path("tests/ai-jobs/", get_extraction_jobs, name="ai_extraction_jobs"),
+    path(
+        "tests/ai-jobs/<uuid:job_id>/",
+        get_extraction_job,
+        name="ai_extraction_job",
+    ),
     path("tests/upload-batch-audio/", upload_batch_audio, name="upload_batch_audio"),
     # Audio Splitting Endpoints (for cutting full listening audio into parts)
     path("tests/audio/analyze/", analyze_audio_file, name="analyze_audio"),
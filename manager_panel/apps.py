@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ManagerPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'manager_panel'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-16 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("manager_panel", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AIResultCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        help_text="SHA-256 of the request", max_length=64, unique=True
+                    ),
+                ),
+                (
+                    "request_type",
+                    models.CharField(
+                        help_text="Type of request (writing_check, ...)", max_length=50
+                    ),
+                ),
+                (
+                    "model_name",
+                    models.CharField(
+                        help_text="Model that produced it", max_length=100
+                    ),
+                ),
+                ("result", models.JSONField(help_text="Parsed AI response")),
+                (
+                    "hits",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Times this result was reused"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "verbose_name": "AI Result Cache Entry",
+                "verbose_name_plural": "AI Result Cache",
+                "db_table": "ai_result_cache",
+            },
+        ),
+    ]
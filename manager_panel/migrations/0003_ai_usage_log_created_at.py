@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager_panel', '0002_ai_result_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiusagelog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:07
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager_panel', '0003_ai_usage_log_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentExtractionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('job_type', models.CharField(choices=[('content', 'Single section'), ('full_test', 'Full test')], max_length=20)),
+                ('requested_content_type', models.CharField(blank=True, help_text='reading | listening | writing | speaking | auto', max_length=20)),
+                ('content_type', models.CharField(blank=True, help_text='Content type that was extracted', max_length=20)),
+                ('source_file', models.FileField(upload_to='ai_extraction/%Y/%m/')),
+                ('file_name', models.CharField(max_length=255)),
+                ('mime_type', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0, help_text='0-100')),
+                ('stage', models.CharField(blank=True, max_length=100)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='content_extraction_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Content Extraction Job',
+                'verbose_name_plural': 'Content Extraction Jobs',
+                'db_table': 'content_extraction_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
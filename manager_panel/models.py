@@ -4,10 +4,15 @@ Manager Panel Models
 Models for manager-specific configurations including AI settings.
 """
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
 import os
+import uuid
 
 User = get_user_model()
 
@@ -114,34 +119,38 @@ class AIConfiguration(models.Model):
 
     def increment_usage(self, tokens_used=0):
         """Increment usage counters"""
+        from django.db.models import F
         from django.utils import timezone
 
-        self.total_requests += 1
-        self.total_tokens_used += tokens_used
-        self.last_used_at = timezone.now()
-        self.last_error = None
-        self.save(
-            update_fields=[
-                "total_requests",
-                "total_tokens_used",
-                "last_used_at",
-                "last_error",
-            ]
+        # Updated in the database so instances shared through the config
+        # cache don't overwrite each other's counts (and don't invalidate it)
+        AIConfiguration.objects.filter(pk=self.pk).update(
+            total_requests=F("total_requests") + 1,
+            total_tokens_used=F("total_tokens_used") + tokens_used,
+            last_used_at=timezone.now(),
+            last_error=None,
         )
 
     def record_error(self, error_message):
         """Record an error"""
         from django.utils import timezone
 
-        self.last_error = error_message
-        self.last_used_at = timezone.now()
-        self.save(update_fields=["last_error", "last_used_at"])
+        AIConfiguration.objects.filter(pk=self.pk).update(
+            last_error=error_message, last_used_at=timezone.now()
+        )
 
     @classmethod
     def get_primary_config(cls):
         """Get the primary active configuration"""
         return cls.objects.filter(is_primary=True, is_active=True).first()
 
+    @classmethod
+    def get_cached_primary_config(cls):
+        """Get the primary active configuration from cache (no query when warm)"""
+        from .ai_config_cache import get_cached_primary_config
+
+        return get_cached_primary_config()
+
     @classmethod
     def get_active_configs(cls):
         """Get all active configurations"""
@@ -261,8 +270,8 @@ class AIUsageLog(models.Model):
         default=0, help_text="Response time in milliseconds"
     )
 
-    # Metadata
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Metadata (set when the call is made; logs are saved in batches)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = "ai_usage_log"
@@ -273,3 +282,152 @@ class AIUsageLog(models.Model):
     def __str__(self):
         status = "✓" if self.success else "✗"
         return f"{status} {self.request_type} - {self.configuration.name} ({self.total_tokens} tokens)"
+
+
+class AIResultCache(models.Model):
+    """
+    Stored results of deterministic AI requests (e.g. writing checks), keyed
+    by a hash of everything that affects the result. See ai/result_cache.py.
+    """
+
+    key = models.CharField(
+        max_length=64, unique=True, help_text="SHA-256 of the request"
+    )
+    request_type = models.CharField(
+        max_length=50, help_text="Type of request (writing_check, ...)"
+    )
+    model_name = models.CharField(max_length=100, help_text="Model that produced it")
+    result = models.JSONField(help_text="Parsed AI response")
+
+    # Usage tracking
+    hits = models.PositiveIntegerField(
+        default=0, help_text="Times this result was reused"
+    )
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "ai_result_cache"
+        verbose_name = "AI Result Cache Entry"
+        verbose_name_plural = "AI Result Cache"
+
+    def __str__(self):
+        return f"{self.request_type} - {self.model_name} ({self.hits} hits)"
+
+
+class ContentExtractionJob(models.Model):
+    """
+    A PDF-to-test content extraction run by Celery.
+
+    The uploaded PDF is kept in storage and the extracted data is stored on
+    the job, so the manager UI can poll it and reviewers can reopen the
+    result later without running the model again.
+    """
+
+    class JobType(models.TextChoices):
+        CONTENT = "content", "Single section"
+        FULL_TEST = "full_test", "Full test"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="content_extraction_jobs",
+    )
+    job_type = models.CharField(max_length=20, choices=JobType.choices)
+    requested_content_type = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="reading | listening | writing | speaking | auto",
+    )
+    content_type = models.CharField(
+        max_length=20, blank=True, help_text="Content type that was extracted"
+    )
+
+    # Source document
+    source_file = models.FileField(upload_to="ai_extraction/%Y/%m/")
+    file_name = models.CharField(max_length=255)
+    mime_type = models.CharField(max_length=100)
+
+    # Progress
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True
+    )
+    progress = models.PositiveSmallIntegerField(default=0, help_text="0-100")
+    stage = models.CharField(max_length=100, blank=True)
+
+    # Output (partial while running)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "content_extraction_job"
+        ordering = ["-created_at"]
+        verbose_name = "Content Extraction Job"
+        verbose_name_plural = "Content Extraction Jobs"
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} - {self.file_name} ({self.status})"
+
+    def update_progress(self, progress, stage, result=None):
+        """Save progress (and partial results) for pollers."""
+        self.progress = progress
+        self.stage = stage
+        update_fields = ["progress", "stage"]
+        if result is not None:
+            self.result = result
+            update_fields.append("result")
+        self.save(update_fields=update_fields)
+
+    def fail_if_stale(self):
+        """
+        Mark the job failed if its task was lost.
+
+        A job still pending or running after CELERY_TASK_TIME_LIMIT was never
+        picked up (no worker) or its worker died or was killed at the hard
+        time limit, so the task will never finish it.
+
+        Returns:
+            True if the job was marked failed
+        """
+        if self.status not in (self.Status.PENDING, self.Status.RUNNING):
+            return False
+        since = self.started_at or self.created_at
+        stale_after = timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+        if timezone.now() - since < stale_after:
+            return False
+
+        error = (
+            "The extraction did not finish in time. Please try again."
+            if self.status == self.Status.RUNNING
+            else "The extraction was never started. Please try again."
+        )
+        completed_at = timezone.now()
+        # Conditional, in case the task finishes the job meanwhile
+        updated = ContentExtractionJob.objects.filter(
+            pk=self.pk, status=self.status
+        ).update(
+            status=self.Status.FAILED, error=error, stage="", completed_at=completed_at
+        )
+        if not updated:
+            self.refresh_from_db()
+            return False
+        self.status = self.Status.FAILED
+        self.error = error
+        self.stage = ""
+        self.completed_at = completed_at
+        return True
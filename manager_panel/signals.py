@@ -0,0 +1,20 @@
+"""
+Signal handlers for the manager panel app.
+
+Invalidate the cached primary AI configuration when any configuration
+changes (see ``manager_panel/ai_config_cache.py``).
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .ai_config_cache import bump_config_version
+from .models import AIConfiguration
+
+
+@receiver(post_save, sender=AIConfiguration)
+@receiver(post_delete, sender=AIConfiguration)
+def invalidate_ai_config_cache(sender, **kwargs):
+    """Bump the configuration version once the change is committed."""
+    transaction.on_commit(bump_config_version)
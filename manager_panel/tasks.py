@@ -0,0 +1,209 @@
+"""
+Celery tasks for the manager panel's AI infrastructure.
+"""
+
+import logging
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_ai_result_cache():
+    """
+    Delete expired AI result cache entries (see ai/result_cache.py).
+
+    Scheduled daily by Celery Beat.
+    """
+    from ai.result_cache import purge_expired_results
+
+    deleted = purge_expired_results()
+    logger.info(f"Purged {deleted} expired AI result cache entries")
+    return {"status": "success", "deleted": deleted}
+
+
+@shared_task
+def flush_ai_usage_buffer(max_batches=20):
+    """
+    Persist buffered AI usage logs (see manager_panel/usage_buffer.py).
+
+    Scheduled by Celery beat every AI_USAGE_FLUSH_INTERVAL seconds; does
+    nothing unless AI_USAGE_BUFFERED is enabled.
+    """
+    from manager_panel.usage_buffer import (
+        FLUSH_BATCH_SIZE,
+        flush_usage_events,
+        is_usage_buffer_enabled,
+    )
+
+    if not is_usage_buffer_enabled():
+        return {"status": "disabled"}
+
+    taken = saved = 0
+    for _ in range(max_batches):
+        batch_taken, batch_saved = flush_usage_events()
+        taken += batch_taken
+        saved += batch_saved
+        if batch_taken < FLUSH_BATCH_SIZE:
+            break
+    if taken:
+        logger.info(f"Flushed {saved} buffered AI usage logs ({taken} events)")
+
+    return {"status": "success", "events_flushed": taken, "logs_saved": saved}
+
+
+@shared_task(ignore_result=True)
+def store_ai_response_capture(capture):
+    """Write a sampled raw AI response to storage (see ai/response_capture.py)."""
+    from ai.response_capture import save_capture
+
+    name = save_capture(capture)
+    logger.info(f"Captured AI response to {name}")
+
+
+@shared_task
+def prune_ai_response_captures():
+    """
+    Delete AI response captures past their retention period.
+
+    Scheduled daily by Celery Beat.
+    """
+    from ai.response_capture import prune_captures
+
+    deleted = prune_captures()
+    if deleted:
+        logger.info(f"Deleted {deleted} expired AI response captures")
+    return {"status": "success", "deleted": deleted}
+
+
+# Leaves the job time to be marked failed before the hard limit kills the task
+EXTRACTION_SOFT_TIME_LIMIT = settings.CELERY_TASK_TIME_LIMIT - 5 * 60
+
+
+@shared_task(bind=True, soft_time_limit=EXTRACTION_SOFT_TIME_LIMIT)
+def run_content_extraction_job(self, job_id):
+    """
+    Extract IELTS content from a job's PDF with AI.
+
+    Progress is saved on the ContentExtractionJob as it goes; the manager UI
+    polls the job until it is completed or failed.
+
+    Args:
+        job_id: ID of the ContentExtractionJob
+
+    Returns:
+        dict: Result status
+    """
+    from django.utils import timezone
+    from ai.content_generator import (
+        detect_content_type_from_pdf,
+        generate_cambridge_full_test_from_pdf,
+        generate_listening_parts_from_pdf,
+        generate_reading_passages_from_pdf,
+        generate_speaking_topics_from_pdf,
+        generate_writing_tasks_from_pdf,
+    )
+    from manager_panel.models import ContentExtractionJob
+
+    generators = {
+        "reading": generate_reading_passages_from_pdf,
+        "listening": generate_listening_parts_from_pdf,
+        "writing": generate_writing_tasks_from_pdf,
+        "speaking": generate_speaking_topics_from_pdf,
+    }
+
+    job = ContentExtractionJob.objects.filter(id=job_id).first()
+    if job is None or job.status != ContentExtractionJob.Status.PENDING:
+        return {"status": "skipped"}
+
+    def finish(status, result=None, error=""):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.progress = 100
+        job.stage = ""
+        job.completed_at = timezone.now()
+        job.save(
+            update_fields=[
+                "status",
+                "result",
+                "error",
+                "progress",
+                "stage",
+                "completed_at",
+            ]
+        )
+        logger.info(f"Content extraction job {job.uuid} {status}")
+        return {"status": status, "job_id": str(job.uuid)}
+
+    job.status = ContentExtractionJob.Status.RUNNING
+    job.started_at = timezone.now()
+    job.progress = 5
+    job.stage = "Reading document"
+    job.save(update_fields=["status", "started_at", "progress", "stage"])
+
+    try:
+        with job.source_file.open("rb") as source_file:
+            pdf_bytes = source_file.read()
+
+        if job.job_type == ContentExtractionJob.JobType.FULL_TEST:
+            job.content_type = "full_test"
+            job.save(update_fields=["content_type"])
+            job.update_progress(10, "Extracting full test")
+
+            def report_progress(done, total, partial_result):
+                job.update_progress(
+                    10 + 85 * done // total,
+                    f"Extracted {done} of {total} sections",
+                    partial_result,
+                )
+
+            result = generate_cambridge_full_test_from_pdf(
+                pdf_bytes, job.mime_type, progress_callback=report_progress
+            )
+        else:
+            content_type = job.requested_content_type
+            if content_type == "auto":
+                job.update_progress(10, "Detecting content type")
+                detection_result = detect_content_type_from_pdf(
+                    pdf_bytes, job.mime_type
+                )
+                content_type = (
+                    detection_result.get("content_type")
+                    or detection_result.get("primary_type")
+                    or "unknown"
+                )
+                if content_type not in generators:
+                    return finish(
+                        ContentExtractionJob.Status.FAILED,
+                        {"detection_result": detection_result},
+                        "Could not automatically detect content type. Please specify manually.",
+                    )
+
+            job.content_type = content_type
+            job.save(update_fields=["content_type"])
+            job.update_progress(30, f"Extracting {content_type} content")
+            result = generators[content_type](pdf_bytes, job.mime_type)
+
+        if result.get("success"):
+            return finish(ContentExtractionJob.Status.COMPLETED, result)
+        return finish(
+            ContentExtractionJob.Status.FAILED,
+            result,
+            result.get("error", "Failed to extract content"),
+        )
+
+    except SoftTimeLimitExceeded:
+        logger.error(f"Content extraction job {job.uuid} hit the time limit")
+        return finish(
+            ContentExtractionJob.Status.FAILED,
+            job.result,
+            "The extraction took too long. Try a smaller document.",
+        )
+    except Exception as e:
+        logger.exception(f"Error in content extraction job {job.uuid}")
+        return finish(
+            ContentExtractionJob.Status.FAILED, None, f"Error processing PDF: {e}"
+        )
@@ -0,0 +1,192 @@
+"""
+Write-behind buffer for AI usage logging.
+
+Every AI call used to write an ``AIUsageLog`` row and save its
+configuration's usage counters before returning. With ``AI_USAGE_BUFFERED``
+enabled (the default), ``record_usage`` appends the event to a Redis list
+instead:
+
+    ai_usage_buffer:events      list of JSON-encoded usage events
+
+``flush_ai_usage_buffer`` (Celery beat, every ``AI_USAGE_FLUSH_INTERVAL``
+seconds) persists the events with one bulk insert per batch and one
+``F()`` update of the counters per configuration. When buffering is disabled
+or Redis is unavailable, events are persisted immediately the same way.
+"""
+
+import json
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ai_usage_buffer"
+EVENTS_KEY = f"{KEY_PREFIX}:events"
+FLUSH_BATCH_SIZE = 1000
+
+
+def is_usage_buffer_enabled():
+    return getattr(settings, "AI_USAGE_BUFFERED", False)
+
+
+def _get_connection():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+
+
+def save_usage_events(events):
+    """
+    Persist usage events: AIUsageLog rows plus configuration counters.
+
+    Events of deleted configurations are dropped, and users that no longer
+    exist are cleared (like on_delete=SET_NULL).
+
+    Returns:
+        Number of usage logs created
+    """
+    from django.contrib.auth import get_user_model
+
+    from .models import AIConfiguration, AIUsageLog
+
+    config_ids = {event["configuration_id"] for event in events}
+    config_ids = set(
+        AIConfiguration.objects.filter(id__in=config_ids).values_list("id", flat=True)
+    )
+    user_ids = {event["user_id"] for event in events if event["user_id"]}
+    user_ids = set(
+        get_user_model().objects.filter(id__in=user_ids).values_list("id", flat=True)
+    )
+
+    logs = []
+    usage = defaultdict(lambda: {"requests": 0, "tokens": 0, "last": None})
+    for event in sorted(events, key=lambda event: event["created_at"]):
+        config_id = event["configuration_id"]
+        if config_id not in config_ids:
+            continue
+        created_at = parse_datetime(event["created_at"])
+        logs.append(
+            AIUsageLog(
+                configuration_id=config_id,
+                user_id=event["user_id"] if event["user_id"] in user_ids else None,
+                endpoint=event["endpoint"],
+                request_type=event["request_type"],
+                input_tokens=event["input_tokens"],
+                output_tokens=event["output_tokens"],
+                total_tokens=event["total_tokens"],
+                success=event["success"],
+                error_message=event["error_message"],
+                response_time_ms=event["response_time_ms"],
+                created_at=created_at,
+            )
+        )
+        # Same counters increment_usage()/record_error() maintain
+        totals = usage[config_id]
+        if event["success"]:
+            totals["requests"] += 1
+            totals["tokens"] += event["total_tokens"]
+        totals["last"] = (created_at, event["error_message"])
+
+    with transaction.atomic():
+        AIUsageLog.objects.bulk_create(logs)
+        for config_id, totals in usage.items():
+            last_used_at, last_error = totals["last"]
+            configuration = AIConfiguration.objects.filter(id=config_id)
+            configuration.update(
+                total_requests=F("total_requests") + totals["requests"],
+                total_tokens_used=F("total_tokens_used") + totals["tokens"],
+            )
+            # Events are flushed late; keep errors recorded directly since
+            # (e.g. by the connection test)
+            configuration.filter(
+                Q(last_used_at__isnull=True) | Q(last_used_at__lte=last_used_at)
+            ).update(last_used_at=last_used_at, last_error=last_error)
+    return len(logs)
+
+
+# ============================================================================
+# BUFFERING
+# ============================================================================
+
+
+def record_usage(
+    configuration,
+    endpoint,
+    request_type,
+    user=None,
+    input_tokens=0,
+    output_tokens=0,
+    total_tokens=0,
+    success=True,
+    error_message=None,
+    response_time_ms=0,
+):
+    """
+    Record one AI call against a configuration.
+
+    Buffered in Redis when AI_USAGE_BUFFERED is on; otherwise, or if Redis
+    is unavailable, saved synchronously.
+    """
+    event = {
+        "configuration_id": configuration.pk,
+        "user_id": getattr(user, "pk", None),
+        "endpoint": endpoint,
+        "request_type": request_type,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": total_tokens,
+        "success": success,
+        "error_message": None if success else error_message,
+        "response_time_ms": response_time_ms,
+        "created_at": timezone.now().isoformat(),
+    }
+
+    if is_usage_buffer_enabled():
+        try:
+            _get_connection().rpush(EVENTS_KEY, json.dumps(event))
+            return
+        except Exception as e:
+            logger.warning(f"AI usage buffer unavailable, saving directly: {e}")
+    save_usage_events([event])
+
+
+def _take_events(conn, batch_size):
+    """Atomically pop up to batch_size events from the head of the buffer."""
+    pipe = conn.pipeline()
+    pipe.lrange(EVENTS_KEY, 0, batch_size - 1)
+    pipe.ltrim(EVENTS_KEY, batch_size, -1)
+    raw_events, _ = pipe.execute()
+    return raw_events
+
+
+def flush_usage_events(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Persist up to batch_size buffered usage events.
+
+    Events are put back at the head of the buffer if saving fails.
+
+    Returns:
+        (events taken, usage logs created) tuple
+    """
+    conn = _get_connection()
+    raw_events = _take_events(conn, batch_size)
+    if not raw_events:
+        return 0, 0
+
+    try:
+        saved = save_usage_events([json.loads(raw) for raw in raw_events])
+    except Exception:
+        conn.lpush(EVENTS_KEY, *reversed(raw_events))
+        raise
+    return len(raw_events), saved
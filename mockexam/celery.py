@@ -5,6 +5,7 @@ Celery configuration for mockexam project.
 import os
 from celery import Celery
 from celery.schedules import crontab
+from decouple import config
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mockexam.settings")
@@ -27,6 +28,26 @@ app.conf.beat_schedule = {
         "task": "ielts.tasks.batch_precompute_active_users_analytics",
         "schedule": crontab(minute=0, hour="*/6"),  # Every 6 hours
     },
+    # Persist write-behind answer buffers (no-op unless ANSWER_WRITE_BEHIND)
+    "flush-answer-buffers": {
+        "task": "ielts.tasks.flush_answer_buffers_task",
+        "schedule": config("ANSWER_FLUSH_INTERVAL", default=10, cast=int),
+    },
+    # Drop expired AI result cache entries (writing checks)
+    "purge-ai-result-cache": {
+        "task": "manager_panel.tasks.purge_ai_result_cache",
+        "schedule": crontab(minute=30, hour=3),  # Daily at 03:30
+    },
+    # Persist buffered AI usage logs (no-op unless AI_USAGE_BUFFERED)
+    "flush-ai-usage-buffer": {
+        "task": "manager_panel.tasks.flush_ai_usage_buffer",
+        "schedule": config("AI_USAGE_FLUSH_INTERVAL", default=30, cast=int),
+    },
+    # Delete sampled AI response captures past their retention period
+    "prune-ai-response-captures": {
+        "task": "manager_panel.tasks.prune_ai_response_captures",
+        "schedule": crontab(minute=45, hour=3),  # Daily at 03:45
+    },
 }
 
 
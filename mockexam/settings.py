@@ -438,6 +438,14 @@ CACHES = {
     },
 }
 
+# Write-behind buffering of exam answers in Redis (see ielts/answer_buffer.py).
+# The flush interval (ANSWER_FLUSH_INTERVAL, seconds) is read in mockexam/celery.py
+ANSWER_WRITE_BEHIND = config("ANSWER_WRITE_BEHIND", default=False, cast=bool)
+
+# Buffering of AI usage logs in Redis (see manager_panel/usage_buffer.py).
+# The flush interval (AI_USAGE_FLUSH_INTERVAL, seconds) is read in mockexam/celery.py
+AI_USAGE_BUFFERED = config("AI_USAGE_BUFFERED", default=True, cast=bool)
+
 # Cache key versioning
 CACHE_MIDDLEWARE_KEY_PREFIX = "mockexam"
 CACHE_MIDDLEWARE_SECONDS = 600  # 10 minutes
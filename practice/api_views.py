@@ -969,11 +969,13 @@ def submit_speaking_answer(request, attempt_uuid):
     """
     Submit a single speaking response (audio file) for a specific question.
     """
+    import logging
     import os
-    import subprocess
-    import tempfile
     from django.core.files.storage import default_storage
-    from django.core.files.base import ContentFile
+    from django.db import transaction
+    from .tasks import normalize_practice_recording_task
+
+    logger = logging.getLogger(__name__)
 
     try:
         attempt = SectionPracticeAttempt.objects.select_related("practice").get(
@@ -1010,64 +1012,28 @@ def submit_speaking_answer(request, attempt_uuid):
     file_ext = os.path.splitext(audio_file.name)[1].lower() or ".webm"
     file_path = f"speaking_answers/practice/{attempt.uuid}/{question_key}{file_ext}"
 
-    saved_path = default_storage.save(file_path, ContentFile(audio_file.read()))
+    saved_path = default_storage.save(file_path, audio_file)
     file_url = default_storage.url(saved_path)
 
-    # Convert WebM to WAV if needed for Azure Speech SDK compatibility
-    if file_ext in [".webm", ".mp3", ".ogg", ".m4a"]:
-        try:
-            # Download to temp file
-            with tempfile.NamedTemporaryFile(
-                delete=False, suffix=file_ext
-            ) as temp_input:
-                with default_storage.open(saved_path, "rb") as audio_obj:
-                    temp_input.write(audio_obj.read())
-                temp_input_path = temp_input.name
-
-            # Convert to WAV
-            temp_wav_path = temp_input_path.replace(file_ext, ".wav")
-            ffmpeg_cmd = [
-                "ffmpeg",
-                "-i",
-                temp_input_path,
-                "-ar",
-                "16000",
-                "-ac",
-                "1",
-                "-sample_fmt",
-                "s16",
-                "-y",
-                temp_wav_path,
-            ]
-            subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-
-            # Save WAV file
-            wav_path = file_path.replace(file_ext, ".wav")
-            with open(temp_wav_path, "rb") as wav_file:
-                saved_wav_path = default_storage.save(
-                    wav_path, ContentFile(wav_file.read())
-                )
-            file_url = default_storage.url(saved_wav_path)
-
-            # Cleanup temp files
-            os.unlink(temp_input_path)
-            os.unlink(temp_wav_path)
-
-        except Exception as e:
-            import logging
-
-            logging.getLogger(__name__).warning(f"FFmpeg conversion failed: {e}")
+    # Store audio URL in attempt answers. The row is locked so this doesn't
+    # overwrite a WAV path written meanwhile by normalize_practice_recording_task.
+    with transaction.atomic():
+        attempt = SectionPracticeAttempt.objects.select_for_update().get(pk=attempt.pk)
+        answers = attempt.answers or {}
+        if "speaking_recordings" not in answers:
+            answers["speaking_recordings"] = {}
+        answers["speaking_recordings"][question_key] = {
+            "file_path": saved_path,
+            "file_url": file_url,
+        }
+        attempt.answers = answers
+        attempt.save()
 
-    # Store audio URL in attempt answers
-    answers = attempt.answers or {}
-    if "speaking_recordings" not in answers:
-        answers["speaking_recordings"] = {}
-    answers["speaking_recordings"][question_key] = {
-        "file_path": saved_path,
-        "file_url": file_url,
-    }
-    attempt.answers = answers
-    attempt.save()
+    # The recording is stored as uploaded; ffmpeg converts it on a worker
+    try:
+        normalize_practice_recording_task.delay(attempt.id, question_key, saved_path)
+    except Exception as e:
+        logger.warning(f"Failed to queue audio normalization for {question_key}: {e}")
 
     return Response(
         {
@@ -1127,9 +1093,9 @@ def submit_speaking_complete(request, attempt_uuid):
 
     # Trigger async evaluation (or do it synchronously for now)
     try:
+        from ai.audio_pipeline import StoredAudio
         from ai.speaking_evaluator import AzureSpeechRecognizer, GeminiSpeakingEvaluator
         from django.core.files.storage import default_storage
-        import tempfile
 
         speech_recognizer = AzureSpeechRecognizer()
         gemini_evaluator = GeminiSpeakingEvaluator()
@@ -1152,64 +1118,52 @@ def submit_speaking_complete(request, attempt_uuid):
         question_evaluations = []
 
         for question_key, recording_info in recordings.items():
-            file_path = recording_info.get("file_path")
+            # Prefer the normalized WAV once it's ready
+            file_path = recording_info.get("wav_path") or recording_info.get(
+                "file_path"
+            )
             if not file_path or not default_storage.exists(file_path):
                 continue
 
-            # Download to temp file for processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-                with default_storage.open(file_path, "rb") as audio_obj:
-                    temp_file.write(audio_obj.read())
-                temp_path = temp_file.name
-
-            try:
-                # Transcribe
-                transcription_result = speech_recognizer.transcribe_audio(temp_path)
-
-                if transcription_result.get("success"):
-                    transcript = transcription_result.get("transcript", "")
-                    transcripts.append(transcript)
-                    pronunciation_scores.append(
-                        transcription_result.get("pronunciation_score", 0)
-                    )
-                    fluency_scores.append(transcription_result.get("fluency_score", 0))
-                    accuracy_scores.append(
-                        transcription_result.get("accuracy_score", 0)
-                    )
-                    all_mispronounced_words.extend(
-                        transcription_result.get("mispronounced_words", [])
-                    )
+            # Transcribe
+            transcription_result = speech_recognizer.transcribe_audio(
+                StoredAudio(file_path)
+            )
 
-                    # Find matching question
-                    question_text = ""
-                    for q in questions:
-                        if f"speaking_{topic.speaking_type}_q{q.order}" == question_key:
-                            question_text = q.question_text
-                            break
+            if transcription_result.get("success"):
+                transcript = transcription_result.get("transcript", "")
+                transcripts.append(transcript)
+                pronunciation_scores.append(
+                    transcription_result.get("pronunciation_score", 0)
+                )
+                fluency_scores.append(transcription_result.get("fluency_score", 0))
+                accuracy_scores.append(transcription_result.get("accuracy_score", 0))
+                all_mispronounced_words.extend(
+                    transcription_result.get("mispronounced_words", [])
+                )
 
-                    question_evaluations.append(
-                        {
-                            "question_key": question_key,
-                            "question_text": question_text,
-                            "transcript": transcript,
-                            "pronunciation_score": transcription_result.get(
-                                "pronunciation_score", 0
-                            ),
-                            "fluency_score": transcription_result.get(
-                                "fluency_score", 0
-                            ),
-                            "accuracy_score": transcription_result.get(
-                                "accuracy_score", 0
-                            ),
-                            "mispronounced_words": transcription_result.get(
-                                "mispronounced_words", []
-                            ),
-                        }
-                    )
-            finally:
-                import os
+                # Find matching question
+                question_text = ""
+                for q in questions:
+                    if f"speaking_{topic.speaking_type}_q{q.order}" == question_key:
+                        question_text = q.question_text
+                        break
 
-                os.unlink(temp_path)
+                question_evaluations.append(
+                    {
+                        "question_key": question_key,
+                        "question_text": question_text,
+                        "transcript": transcript,
+                        "pronunciation_score": transcription_result.get(
+                            "pronunciation_score", 0
+                        ),
+                        "fluency_score": transcription_result.get("fluency_score", 0),
+                        "accuracy_score": transcription_result.get("accuracy_score", 0),
+                        "mispronounced_words": transcription_result.get(
+                            "mispronounced_words", []
+                        ),
+                    }
+                )
 
         if not transcripts:
             attempt.ai_feedback = (
@@ -3,8 +3,6 @@ Celery tasks for Section Practice processing.
 """
 
 import logging
-import os
-import tempfile
 from celery import shared_task
 from django.utils import timezone
 from django.core.files.storage import default_storage
@@ -20,7 +18,7 @@ def evaluate_speaking_practice_task(self, attempt_id: int):
 
     This task:
     1. Retrieves the SectionPracticeAttempt and all associated SpeakingPracticeRecordings
-    2. Downloads audio files from storage
+    2. Collects the audio files in storage (streamed to ffmpeg, not downloaded)
     3. Transcribes audio using Azure Speech Recognition
     4. Evaluates transcripts using Gemini AI with IELTS criteria
     5. Stores results in database
@@ -33,6 +31,7 @@ def evaluate_speaking_practice_task(self, attempt_id: int):
         dict: Result status and data
     """
     from practice.models import SectionPracticeAttempt, SpeakingPracticeRecording
+    from ai.audio_pipeline import StoredAudio
     from ai.speaking_evaluator import evaluate_speaking_attempt
     import uuid as uuid_module
 
@@ -85,7 +84,6 @@ def evaluate_speaking_practice_task(self, attempt_id: int):
         # Prepare audio files and questions
         audio_files = {}
         questions = []
-        temp_files = []  # Track temporary files for cleanup
 
         # Build questions list from the speaking topic
         # Part 1 questions
@@ -113,27 +111,10 @@ def evaluate_speaking_practice_task(self, attempt_id: int):
                     )
                     continue
 
-                # Create temporary file
-                file_ext = os.path.splitext(recording.audio_file.name)[1] or ".webm"
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
-                temp_files.append(temp_file.name)
-
-                # Download from storage
+                # Streamed from storage into ffmpeg during transcription
                 if default_storage.exists(recording.audio_file.name):
-                    with default_storage.open(
-                        recording.audio_file.name, "rb"
-                    ) as audio_file:
-                        temp_file.write(audio_file.read())
-                    temp_file.close()
-
-                    # Convert to WAV if needed (Azure requires WAV)
-                    wav_path = convert_to_wav(temp_file.name)
-                    if wav_path != temp_file.name:
-                        temp_files.append(wav_path)
-
-                    audio_files[recording.question_key] = wav_path
-                    logger.info(
-                        f"Prepared audio for {recording.question_key}: {wav_path}"
+                    audio_files[recording.question_key] = StoredAudio(
+                        recording.audio_file.name
                     )
                 else:
                     logger.warning(
@@ -175,14 +156,6 @@ def evaluate_speaking_practice_task(self, attempt_id: int):
             audio_files=audio_files, questions=questions, part_type=part_type
         )
 
-        # Clean up temporary files
-        for temp_path in temp_files:
-            try:
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp file {temp_path}: {e}")
-
         if evaluation_result.get("success"):
             # Extract overall score
             overall_score = evaluation_result.get("evaluation", {}).get(
@@ -243,57 +216,55 @@ def evaluate_speaking_practice_task(self, attempt_id: int):
         raise self.retry(exc=exc)
 
 
-def convert_to_wav(input_path: str) -> str:
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def normalize_practice_recording_task(
+    self, attempt_id: int, question_key: str, audio_name: str
+):
     """
-    Convert audio file to WAV format using ffmpeg.
+    Produce the 16 kHz mono WAV of an uploaded speaking practice recording.
+
+    The practice counterpart of ielts.tasks.normalize_speaking_answer_task:
+    the WAV's storage name is added to the recording's entry in
+    attempt.answers["speaking_recordings"] as "wav_path", unless the student
+    has re-recorded the question in the meantime.
 
     Args:
-        input_path: Path to the input audio file
+        attempt_id: ID of the SectionPracticeAttempt
+        question_key: Key of the recording in speaking_recordings
+        audio_name: Storage name of the uploaded recording
 
     Returns:
-        Path to the converted WAV file (or original if already WAV)
+        dict: Result status and the WAV's storage name
     """
-    import subprocess
-
-    # If already WAV, return as-is
-    if input_path.lower().endswith(".wav"):
-        return input_path
-
-    output_path = input_path.rsplit(".", 1)[0] + ".wav"
+    from django.db import transaction
+    from ai.audio_pipeline import AudioConversionError, store_wav_derivative
+    from practice.models import SectionPracticeAttempt
 
     try:
-        # Use ffmpeg to convert
-        cmd = [
-            "ffmpeg",
-            "-i",
-            input_path,
-            "-acodec",
-            "pcm_s16le",
-            "-ar",
-            "16000",
-            "-ac",
-            "1",
-            "-y",  # Overwrite output
-            output_path,
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-        if result.returncode == 0:
-            logger.info(f"Successfully converted {input_path} to WAV")
-            return output_path
-        else:
-            logger.warning(
-                f"FFmpeg conversion failed: {result.stderr}. Using original file."
-            )
-            return input_path
-
-    except subprocess.TimeoutExpired:
-        logger.warning(f"FFmpeg conversion timed out for {input_path}")
-        return input_path
-    except FileNotFoundError:
-        logger.warning("FFmpeg not found. Using original file.")
-        return input_path
-    except Exception as e:
-        logger.warning(f"Error converting audio: {e}. Using original file.")
-        return input_path
+        wav_name = store_wav_derivative(audio_name)
+    except AudioConversionError as e:
+        # Undecodable uploads won't convert on retry; evaluation falls back
+        # to the original recording
+        logger.error(f"Audio normalization failed for {audio_name}: {e}")
+        return {"status": "failed", "error": str(e)}
+    except Exception as exc:
+        logger.exception(f"Error normalizing practice recording {audio_name}")
+        raise self.retry(exc=exc)
+
+    with transaction.atomic():
+        attempt = (
+            SectionPracticeAttempt.objects.select_for_update()
+            .filter(id=attempt_id)
+            .first()
+        )
+        answers = (attempt.answers or {}) if attempt else {}
+        recording = answers.get("speaking_recordings", {}).get(question_key)
+        if recording and recording.get("file_path") == audio_name:
+            recording["wav_path"] = wav_name
+            attempt.save(update_fields=["answers"])
+            logger.info(f"Normalized practice recording {question_key}: {wav_name}")
+            return {"status": "success", "wav_path": wav_name}
+
+    logger.info(f"Practice recording {question_key} changed, discarding {wav_name}")
+    default_storage.delete(wav_name)
+    return {"status": "stale"}
@@ -617,32 +617,11 @@ class TeacherUserAnswer(models.Model):
 
     def check_correctness(self):
         """Check if the answer is correct and update the is_correct field"""
-        from ielts.models import TestHead
-
-        correct_answer = self.question.get_correct_answer()
-        if correct_answer:
-            # Normalize both answers for comparison (lowercase, strip whitespace)
-            user_ans = self.answer_text.strip().lower() if self.answer_text else ""
-            correct_ans = correct_answer.strip().lower()
-
-            # For TFNG, YNNG questions
-            if self.question.test_head and self.question.test_head.question_type in [
-                TestHead.QuestionType.TRUE_FALSE_NOT_GIVEN,
-                TestHead.QuestionType.YES_NO_NOT_GIVEN,
-            ]:
-                self.is_correct = user_ans == correct_ans
-            # For short answer questions (allow slight variations)
-            elif (
-                self.question.test_head
-                and self.question.test_head.question_type
-                == TestHead.QuestionType.SHORT_ANSWER
-            ):
-                # Check if the answer contains the correct answer or vice versa
-                self.is_correct = correct_ans in user_ans or user_ans in correct_ans
-            # For MCQ and other types
-            else:
-                self.is_correct = user_ans == correct_ans
+        from ielts.answer_key import get_answer_key_entry, stored_correctness
 
+        # Read the correct answer from the exam's compiled answer key
+        entry = get_answer_key_entry(self.exam_attempt.exam.mock_exam, self.question_id)
+        self.is_correct = stored_correctness(entry, self.answer_text, self.is_correct)
         return self.is_correct
 
     def save(self, *args, **kwargs):